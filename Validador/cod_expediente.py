@@ -0,0 +1,136 @@
+"""
+Validación de COD_EXPEDIENTE (ítem d de feature_attributes): todos los registros de las feature
+classes y tablas de la gdb deben tener el código del expediente que se está validando.
+
+De cada tabla se lee solo la columna COD_EXPEDIENTE (GdbTable.read_columns) y cada bloque se
+compara completo con el expediente, sin espacios al inicio o al final ni distinción de
+mayúsculas; los nulos cuentan como errores. Las tablas sin el campo se omiten: su ausencia la
+informa la comparación de esquemas.
+
+Una gdb cargada con el expediente equivocado tiene errores en todos sus registros, así que la
+lectura se detiene cuando los registros con error de toda la gdb superan
+VALW_EXPEDIENTE_MAX_ERRORES; las tablas que faltan se informan como no verificadas.
+"""
+import os
+import threading
+import pandas as pd
+
+from collections import Counter
+from contextlib import closing
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from Validador.filegdb import GdbTable
+from Validador.gdb_catalog import schema_workers, table_ids
+
+CAMPO = 'COD_EXPEDIENTE'
+# Registros con error en toda la gdb tras los que se deja de leer
+max_errores_expediente = int(os.getenv('VALW_EXPEDIENTE_MAX_ERRORES', '10000'))
+# Registros de COD_EXPEDIENTE por bloque leído (ver GdbTable.read_columns)
+tamano_bloque_expediente = int(os.getenv('VALW_EXPEDIENTE_BLOQUE', '65536'))
+# Valores erróneos de ejemplo por tabla en el mensaje, de los más frecuentes
+valores_expediente = int(os.getenv('VALW_EXPEDIENTE_VALORES', '5'))
+
+COLUMNAS_RESULTADO = ['NOMBRE', 'REGISTROS', 'ERRORES', 'DISTINTOS', 'VALORES', 'COMPLETA']
+
+
+class _Presupuesto:
+    """
+    Registros con error que quedan por contar entre todas las tablas que se leen en paralelo.
+    """
+
+    def __init__(self, maximo: int):
+        self._restante = maximo
+        self._lock = threading.Lock()
+        self.agotado = threading.Event()
+
+    def consumir(self, errores: int) -> None:
+        if not errores:
+            return
+        with self._lock:
+            self._restante -= errores
+            if self._restante < 0:
+                self.agotado.set()
+
+
+def errores_expediente(valores, expediente: str) -> pd.Series:
+    """
+    Valores de una columna que no son el expediente.
+
+    Args:
+        valores: columna COD_EXPEDIENTE leída con read_columns.
+        expediente str: código del expediente.
+    Returns:
+        pd.Series: valores erróneos tal como están en la gdb (None para los nulos).
+    """
+    serie = pd.Series(valores, copy=False)
+    normalizados = serie.astype('string').str.strip().str.upper()
+    return serie[(normalizados != expediente.strip().upper()).fillna(True).to_numpy(dtype=bool)]
+
+
+def validar_expediente(gdb, catalog: pd.DataFrame, expediente: str, nombres: Optional[Iterable[str]] = None,
+                       max_errores: Optional[int] = None, workers: Optional[int] = None) -> pd.DataFrame:
+    """
+    Compara COD_EXPEDIENTE de cada feature class y tabla con el expediente.
+
+    Args:
+        gdb: workspace abierto con open_workspace.
+        catalog pd.DataFrame: catálogo de la gdb (read_catalog).
+        expediente str: código del expediente.
+        nombres Iterable[str]: feature classes y tablas a revisar, por defecto todas las de la gdb.
+        max_errores int: registros con error tras los que se detiene, por defecto
+            VALW_EXPEDIENTE_MAX_ERRORES.
+        workers int: tablas leídas en paralelo, por defecto VALW_SCHEMA_WORKERS.
+    Returns:
+        pd.DataFrame: columnas de COLUMNAS_RESULTADO, un registro por tabla con el campo;
+            REGISTROS son los leídos, DISTINTOS los valores erróneos diferentes y VALORES los más
+            frecuentes. COMPLETA es False si la lectura se detuvo antes de terminar la tabla.
+    """
+    return pd.DataFrame.from_records(list(iterar_expediente(gdb, catalog, expediente, nombres, max_errores, workers)),
+                                     columns=COLUMNAS_RESULTADO)
+
+
+def iterar_expediente(gdb, catalog: pd.DataFrame, expediente: str, nombres: Optional[Iterable[str]] = None,
+                      max_errores: Optional[int] = None, workers: Optional[int] = None) -> Iterator[tuple]:
+    """
+    Registros de validar_expediente, entregados a medida que se termina cada tabla.
+    """
+    ids = table_ids(catalog)
+    objetos = sorted((nombre, ids[nombre]) for nombre in (ids if nombres is None else set(nombres))
+                     if nombre in ids)
+    if not objetos:
+        return
+    presupuesto = _Presupuesto(max_errores_expediente if max_errores is None else max_errores)
+
+    def validar(objeto: Tuple[str, int]) -> Optional[tuple]:
+        return _validar_objeto(gdb, *objeto, expediente, presupuesto)
+
+    with ThreadPoolExecutor(max_workers=min(workers or schema_workers, len(objetos))) as executor:
+        yield from (registro for registro in executor.map(validar, objetos) if registro is not None)
+
+
+def _validar_objeto(gdb, nombre: str, table_id: int, expediente: str,
+                    presupuesto: _Presupuesto) -> Optional[tuple]:
+    """
+    Registro de COLUMNAS_RESULTADO de una tabla, None si no tiene el campo.
+    """
+    with GdbTable.open(gdb, table_id, nombre) as table:
+        campo = next((campo for campo in table.field_names if campo.upper() == CAMPO), None)
+        if campo is None:
+            return None
+        registros = 0
+        valores: Dict[Optional[str], int] = Counter()
+        completa = not presupuesto.agotado.is_set()
+        if completa:
+            # El generador retiene vistas del archivo mapeado: se cierra antes que la tabla
+            with closing(table.read_columns([campo], chunk_size=tamano_bloque_expediente)) as bloques:
+                for bloque in bloques:
+                    registros += len(bloque)
+                    erroneos = errores_expediente(bloque[campo], expediente)
+                    valores.update(erroneos.where(erroneos.notna(), None).tolist())
+                    presupuesto.consumir(len(erroneos))
+                    if presupuesto.agotado.is_set():
+                        completa = registros == len(table.row_offsets()[0])
+                        break
+    frecuentes: List[Optional[str]] = [valor for valor, _ in valores.most_common(valores_expediente)]
+    return nombre, registros, sum(valores.values()), len(valores), frecuentes, completa
@@ -0,0 +1,239 @@
+"""
+Comparación vectorizada entre el catálogo esperado (versión del MDG) y el encontrado en la gdb.
+
+Los validadores de cantidad y de sistema de referencia comparan listas de nombres; aquí se hace
+en un solo merge con indicador y los mensajes se arman por columnas, como plantillas con sus
+parámetros (ver Validador/plantillas.py). El esquema de atributos se compara igual, con un merge por (NOMBRE, NOMBRE_ATRIBUTO).
+
+Los validadores que recorren las tablas de la gdb producen sus mensajes por lotes (en_lotes) en
+lugar de devolver un solo DataFrame; recolectar los junta cuando hace falta.
+"""
+import os
+import numpy as np
+import pandas as pd
+
+from itertools import islice
+from typing import Iterable, Iterator, List, Optional, Sequence, Union
+
+from utils.utils import valw_gdb_mensaje
+from Validador.plantillas import PARAMETROS, parametro
+
+NOMBRE = 'NOMBRE'
+ESTADO = 'ESTADO'
+
+FALTANTE = 'FALTANTE'
+SOBRANTE = 'SOBRANTE'
+CORRECTO = 'CORRECTO'
+
+_ESTADOS = {'left_only': FALTANTE, 'right_only': SOBRANTE, 'both': CORRECTO}
+
+# Diferencias de esquema de un atributo (ítems f a j de feature_attributes)
+ATRIBUTO_FALTANTE = 'ATRIBUTO_FALTANTE'
+ATRIBUTO_SOBRANTE = 'ATRIBUTO_SOBRANTE'
+ALIAS = 'ALIAS'
+TIPO = 'TIPO'
+LONGITUD = 'LONGITUD'
+DOMINIO = 'DOMINIO'
+
+DIFERENCIA_COLUMNS = ['NOMBRE', 'NOMBRE_ATRIBUTO', 'DIFERENCIA', 'ESPERADO', 'ENCONTRADO']
+
+# Columnas de la versión (VALW_OBJETOS_ATRIBUTOS) y de la gdb (SCHEMA_COLUMNS) que se comparan
+_COLUMNAS_ATRIBUTO = {ALIAS: 'ALIAS_ATRIBUTO', TIPO: 'TIPO_ATRIBUTO', LONGITUD: 'TAMANO_ATRIBUTO',
+                      DOMINIO: 'DOMINIO'}
+_SIN_DOMINIO = 'N/A'
+
+# Registros de resultado (tablas o campos) por lote de mensajes de los validadores que producen lotes
+registros_lote = int(os.getenv('VALW_VALIDADORES_LOTE', '50'))
+
+MENSAJE_COLUMNS = [
+    valw_gdb_mensaje.gdb_id_column,
+    valw_gdb_mensaje.validador_id,
+    valw_gdb_mensaje.mensaje_column,
+    valw_gdb_mensaje.bool_column,
+    valw_gdb_mensaje.plantilla_column] + valw_gdb_mensaje.parametro_columns
+
+
+def en_lotes(registros: Iterable[tuple], columnas: List[str], tamano: Optional[int] = None) -> Iterator[pd.DataFrame]:
+    """
+    Agrupa los registros que produce un validador en DataFrames de hasta `tamano` filas
+    (VALW_VALIDADORES_LOTE por defecto), sin leerlos todos antes del primer lote.
+    """
+    registros = iter(registros)
+    while True:
+        lote = list(islice(registros, tamano or registros_lote))
+        if not lote:
+            return
+        yield pd.DataFrame.from_records(lote, columns=columnas)
+
+
+def recolectar(lotes: Iterable[pd.DataFrame]) -> pd.DataFrame:
+    """
+    Registros de VALW_GDB_MENSAJE de todos los lotes de un validador en un solo DataFrame.
+    """
+    lotes = [lote for lote in lotes if len(lote)]
+    if not lotes:
+        return pd.DataFrame(columns=MENSAJE_COLUMNS)
+    return pd.concat(lotes, ignore_index=True)
+
+
+def comparar_catalogos(esperado: pd.DataFrame, encontrado: pd.DataFrame,
+                       clave_esperado: str, clave_encontrado: str) -> pd.DataFrame:
+    """
+    Clasifica cada nombre como faltante, sobrante o correcto en una sola pasada.
+
+    Args:
+        esperado pd.DataFrame: catálogo de la versión del MDG.
+        encontrado pd.DataFrame: catálogo de la gdb.
+        clave_esperado str: columna con el nombre en `esperado`.
+        clave_encontrado str: columna con el nombre en `encontrado`.
+    Returns:
+        pd.DataFrame: una fila por nombre con las columnas NOMBRE y ESTADO (FALTANTE, SOBRANTE o
+            CORRECTO) más las demás columnas de ambos catálogos.
+    """
+    esperado = _por_nombre(esperado, clave_esperado)
+    encontrado = _por_nombre(encontrado, clave_encontrado)
+    comparacion = esperado.merge(encontrado, how='outer', on=NOMBRE, indicator=ESTADO, sort=False)
+    comparacion[ESTADO] = comparacion[ESTADO].map(_ESTADOS).astype(str)
+    return comparacion
+
+
+def mensajes(id_gdb: int, id_validador: int, mensaje: pd.Series,
+             esta_bien: Union[int, pd.Series]) -> pd.DataFrame:
+    """
+    Arma los registros de VALW_GDB_MENSAJE para los mensajes de texto libre de un validador.
+    """
+    return pd.DataFrame({
+        valw_gdb_mensaje.gdb_id_column: id_gdb,
+        valw_gdb_mensaje.validador_id: id_validador,
+        valw_gdb_mensaje.mensaje_column: mensaje,
+        valw_gdb_mensaje.bool_column: esta_bien,
+    }, index=mensaje.index, columns=MENSAJE_COLUMNS)
+
+
+def mensajes_plantilla(id_gdb: int, id_validador: int, plantilla: Union[int, pd.Series],
+                       parametros: Sequence[pd.Series], esta_bien: Union[int, pd.Series]) -> pd.DataFrame:
+    """
+    Arma los registros de VALW_GDB_MENSAJE de un validador como plantillas con sus parámetros,
+    sin el texto (MENSAJE_VAL queda nulo hasta que se lee, ver texto_mensajes).
+
+    Args:
+        id_gdb int: identificador de la gdb en la tabla VALW_GDBS_VALIDAR.
+        id_validador int: ID del validador en VALW_DOM_VALIDADORES.
+        plantilla int | pd.Series: ID de la plantilla, uno para todos o uno por mensaje.
+        parametros Sequence[pd.Series]: valores de {1}, {2}... alineados por índice; se guardan
+            como texto.
+        esta_bien int | pd.Series: 1 si el mensaje es correcto. Si ningún argumento es una
+            serie se arma un solo mensaje.
+    Returns:
+        pd.DataFrame: registros de VALW_GDB_MENSAJE.
+    """
+    if len(parametros) > PARAMETROS:
+        raise ValueError(f'Una plantilla admite hasta {PARAMETROS} parámetros, se dieron {len(parametros)}.')
+    indice = next((serie.index for serie in (plantilla, *parametros, esta_bien) if isinstance(serie, pd.Series)),
+                  pd.RangeIndex(1))
+    columnas = {
+        valw_gdb_mensaje.gdb_id_column: id_gdb,
+        valw_gdb_mensaje.validador_id: id_validador,
+        valw_gdb_mensaje.mensaje_column: None,
+        valw_gdb_mensaje.bool_column: esta_bien,
+        valw_gdb_mensaje.plantilla_column: plantilla,
+    }
+    columnas.update(zip(valw_gdb_mensaje.parametro_columns, map(parametro, parametros)))
+    return pd.DataFrame(columnas, index=indice, columns=MENSAJE_COLUMNS)
+
+
+def mensajes_comparacion(comparacion: pd.DataFrame, id_gdb: int, id_validador: int,
+                         faltante: Optional[int] = None, sobrante: Optional[int] = None,
+                         correcto: Optional[int] = None) -> pd.DataFrame:
+    """
+    Mensajes '<texto> -> <nombre>' de cada estado de la comparación.
+
+    Args:
+        comparacion pd.DataFrame: resultado de comparar_catalogos.
+        id_gdb int: identificador de la gdb en la tabla VALW_GDBS_VALIDAR.
+        id_validador int: ID del validador en VALW_DOM_VALIDADORES.
+        faltante, sobrante, correcto int: plantilla del mensaje de cada estado, con el nombre como
+            {1}; los estados sin plantilla no generan mensajes. Solo los correctos se marcan con
+            ESTA_BIEN = 1.
+    Returns:
+        pd.DataFrame: registros de VALW_GDB_MENSAJE.
+    """
+    plantillas = pd.Series({FALTANTE: faltante, SOBRANTE: sobrante, CORRECTO: correcto}).dropna().astype(int)
+    seleccion = comparacion[comparacion[ESTADO].isin(plantillas.index)]
+    return mensajes_plantilla(
+        id_gdb, id_validador,
+        seleccion[ESTADO].map(plantillas),
+        [seleccion[NOMBRE]],
+        (seleccion[ESTADO] == CORRECTO).astype(int))
+
+
+def comparar_atributos(esperado: pd.DataFrame, encontrado: pd.DataFrame) -> pd.DataFrame:
+    """
+    Diferencias de esquema entre los atributos de la versión y los de la gdb, en un solo merge.
+
+    Solo se comparan las feature classes presentes en ambos lados (las faltantes las informa
+    quantity_feature_class). Los nombres de campo se comparan sin distinguir mayúsculas, como
+    en la gdb; el alias, el tipo y el dominio como texto sin espacios alrededor, con el tipo sin
+    distinguir mayúsculas; la longitud solo en los campos de texto, porque para los numéricos
+    la gdb informa el tamaño fijo del tipo.
+
+    Args:
+        esperado pd.DataFrame: VALW_OBJETOS_ATRIBUTOS (get_version_attributes).
+        encontrado pd.DataFrame: esquema de la gdb (get_feature_attributes).
+    Returns:
+        pd.DataFrame: columnas de DIFERENCIA_COLUMNS, una fila por diferencia; DIFERENCIA es
+            ATRIBUTO_FALTANTE, ATRIBUTO_SOBRANTE, ALIAS, TIPO, LONGITUD o DOMINIO.
+    """
+    objetos = set(esperado['NOMBRE']).intersection(encontrado['NOMBRE'])
+    esperado = _por_atributo(esperado[esperado['NOMBRE'].isin(objetos)])
+    encontrado = _por_atributo(encontrado[encontrado['NOMBRE'].isin(objetos)])
+    comparacion = esperado.merge(encontrado, how='outer', on=['NOMBRE', '_CLAVE'], suffixes=('_V', '_G'),
+                                 indicator=ESTADO, sort=True)
+    ambos = (comparacion[ESTADO] == 'both').to_numpy()
+    nombre_atributo = comparacion['NOMBRE_ATRIBUTO_V'].fillna(comparacion['NOMBRE_ATRIBUTO_G'])
+
+    esperados = {diferencia: _texto(comparacion[f'{columna}_V']) for diferencia, columna in _COLUMNAS_ATRIBUTO.items()}
+    encontrados = {diferencia: _texto(comparacion[f'{columna}_G']) for diferencia, columna in _COLUMNAS_ATRIBUTO.items()}
+    for lado in (esperados, encontrados):
+        lado[DOMINIO] = lado[DOMINIO].replace('', _SIN_DOMINIO)
+        lado[LONGITUD] = lado[LONGITUD].str.replace(r'\.0$', '', regex=True)
+    texto = (esperados[TIPO].str.upper() == 'STRING').to_numpy()
+    diferencias = {
+        ATRIBUTO_FALTANTE: (comparacion[ESTADO] == 'left_only').to_numpy(),
+        ATRIBUTO_SOBRANTE: (comparacion[ESTADO] == 'right_only').to_numpy(),
+        ALIAS: ambos & (esperados[ALIAS] != encontrados[ALIAS]).to_numpy(),
+        TIPO: ambos & (esperados[TIPO].str.upper() != encontrados[TIPO].str.upper()).to_numpy(),
+        LONGITUD: ambos & texto & (esperados[LONGITUD] != encontrados[LONGITUD]).to_numpy(),
+        DOMINIO: ambos & (esperados[DOMINIO] != encontrados[DOMINIO]).to_numpy(),
+    }
+
+    # Una fila por (atributo, diferencia), sin recorrer los atributos
+    marcas = np.column_stack(list(diferencias.values()))
+    filas, columnas = np.nonzero(marcas)
+    tipos = np.array(list(diferencias), dtype=object)[columnas]
+    vacio = pd.Series('', index=comparacion.index)
+    valores_esperados = np.column_stack([esperados.get(diferencia, vacio).to_numpy() for diferencia in diferencias])
+    valores_encontrados = np.column_stack([encontrados.get(diferencia, vacio).to_numpy() for diferencia in diferencias])
+    return pd.DataFrame({
+        'NOMBRE': comparacion['NOMBRE'].to_numpy()[filas],
+        'NOMBRE_ATRIBUTO': nombre_atributo.to_numpy()[filas],
+        'DIFERENCIA': tipos,
+        'ESPERADO': valores_esperados[filas, columnas],
+        'ENCONTRADO': valores_encontrados[filas, columnas],
+    }, columns=DIFERENCIA_COLUMNS)
+
+
+def _por_atributo(atributos: pd.DataFrame) -> pd.DataFrame:
+    columnas = ['NOMBRE', 'NOMBRE_ATRIBUTO'] + list(_COLUMNAS_ATRIBUTO.values())
+    atributos = atributos[atributos['NOMBRE_ATRIBUTO'].notna()][columnas]
+    atributos = atributos.assign(_CLAVE=atributos['NOMBRE_ATRIBUTO'].str.strip().str.upper())
+    return atributos.drop_duplicates(['NOMBRE', '_CLAVE'])
+
+
+def _texto(columna: pd.Series) -> pd.Series:
+    return columna.astype(object).where(columna.notna(), '').astype(str).str.strip()
+
+
+def _por_nombre(catalogo: pd.DataFrame, clave: str) -> pd.DataFrame:
+    catalogo = catalogo[catalogo[clave].notna()].drop_duplicates(clave)
+    return catalogo.rename(columns={clave: NOMBRE})
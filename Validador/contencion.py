@@ -0,0 +1,263 @@
+"""
+Validación de que los registros de todas las feature classes estén dentro de la delimitación del
+proyecto (DELIMIT_PROYEC_PG).
+
+De cada feature class se lee solo la extensión de cada geometría, que está en la cabecera del
+shape (ver read_extent), y las extensiones se indexan en un ArbolR. Luego se consultan en el
+árbol las envolventes de los bordes de la delimitación:
+
+    - un registro cuya envolvente no toca ningún borde está entero dentro o entero fuera, y basta
+      ubicar una esquina de la envolvente;
+    - solo los registros que tocan un borde se decodifican y se comprueban con exactitud: todos
+      sus vértices dentro o sobre el borde (con la tolerancia XY) y ningún segmento que cruce un
+      borde.
+
+Así el costo es casi lineal en la cantidad de registros y no depende de sus vértices. Las
+geometrías nulas, vacías o multipatch no tienen ubicación y se omiten; las que tienen curvas y
+tocan un borde se informan como no verificadas.
+"""
+import os
+import numpy as np
+import pandas as pd
+
+from typing import Iterable, Iterator, List, NamedTuple, Optional, Tuple
+
+from Validador.filegdb import GdbTable, GeometryDef, read_extent, read_points, read_shape
+from Validador.gdb_catalog import table_ids
+from Validador.indice_espacial import ArbolR
+
+DELIMITACION = 'DELIMIT_PROYEC_PG'
+# Registros que tocan un borde comprobados con exactitud a la vez
+candidatos_contencion = int(os.getenv('VALW_CONTENCION_CANDIDATOS', '20000'))
+# OBJECTID de ejemplo por feature class en el mensaje
+muestras_contencion = int(os.getenv('VALW_CONTENCION_MUESTRAS', '5'))
+
+COLUMNAS_RESULTADO = ['NOMBRE', 'REGISTROS', 'FUERA', 'MUESTRA', 'SIN_VERIFICAR', 'MOTIVO']
+
+
+class Delimitacion(NamedTuple):
+    """
+    Bordes de la delimitación del proyecto, indexados para las consultas de contencion.
+    """
+    inicio: np.ndarray
+    fin: np.ndarray
+    bordes: ArbolR
+    geometry: GeometryDef
+    tolerancia: float
+
+
+def leer_delimitacion(gdb, catalog: pd.DataFrame) -> Optional[Delimitacion]:
+    """
+    Bordes de la unión de los registros de DELIMIT_PROYEC_PG, indexados; None si la feature
+    class no existe, no tiene registros o sus geometrías no se pueden decodificar.
+
+    Los bordes repetidos (registros duplicados) se cuentan una vez y los compartidos en sentido
+    contrario por dos registros vecinos se quitan, de modo que la regla par-impar de dentro
+    equivale a la unión de registros que no se superponen.
+    """
+    table_id = table_ids(catalog).get(DELIMITACION)
+    if table_id is None:
+        return None
+    with GdbTable.open(gdb, table_id, DELIMITACION) as table:
+        field = table.geometry_field
+        if field is None or field.geometry is None:
+            return None
+        anillos = []
+        for bloque in table.read_columns([field.name]):
+            for blob in bloque[field.name].tolist():
+                partes = read_shape(blob, field.geometry) if blob is not None else []
+                if partes is None:
+                    return None
+                anillos += [parte for parte in partes if len(parte) >= 2]
+    if not anillos:
+        return None
+    bordes = {}
+    for anillo in anillos:
+        for borde in map(tuple, np.hstack([anillo[:-1], anillo[1:]]).tolist()):
+            bordes[borde] = True
+    bordes = np.array([borde for borde in bordes if (borde[2], borde[3], borde[0], borde[1]) not in bordes
+                       and borde[:2] != borde[2:]], dtype=np.float64).reshape(-1, 4)
+    if not len(bordes):
+        return None
+    inicio, fin = bordes[:, :2].copy(), bordes[:, 2:].copy()
+    return Delimitacion(inicio, fin, ArbolR(_envolventes(inicio, fin)), field.geometry,
+                        field.geometry.xytolerance or 0.0)
+
+
+def dentro(delimitacion: Delimitacion, puntos: np.ndarray) -> np.ndarray:
+    """
+    Máscara de los puntos dentro de la delimitación, por paridad de los bordes que cruza un rayo
+    horizontal hacia la derecha de cada punto. Los huecos quedan fuera.
+    """
+    puntos = np.asarray(puntos, dtype=np.float64).reshape(-1, 2)
+    rayos = np.column_stack([puntos[:, 0], puntos[:, 1], np.full(len(puntos), np.inf), puntos[:, 1]])
+    p, borde = delimitacion.bordes.intersectan(rayos)
+    a, b = delimitacion.inicio[borde], delimitacion.fin[borde]
+    y = puntos[p, 1]
+    # Regla semiabierta: cada vértice del borde cuenta para uno solo de sus dos bordes
+    corta = (a[:, 1] > y) != (b[:, 1] > y)
+    p, a, b, y = p[corta], a[corta], b[corta], y[corta]
+    x_corte = a[:, 0] + (y - a[:, 1]) * (b[:, 0] - a[:, 0]) / (b[:, 1] - a[:, 1])
+    cruces = np.bincount(p[x_corte > puntos[p, 0]], minlength=len(puntos))
+    return cruces % 2 == 1
+
+
+def sobre_borde(delimitacion: Delimitacion, puntos: np.ndarray) -> np.ndarray:
+    """
+    Máscara de los puntos a menos de la tolerancia XY de algún borde de la delimitación.
+    """
+    puntos = np.asarray(puntos, dtype=np.float64).reshape(-1, 2)
+    tolerancia = delimitacion.tolerancia
+    p, borde = delimitacion.bordes.intersectan(np.column_stack([puntos - tolerancia, puntos + tolerancia]))
+    a, b = delimitacion.inicio[borde], delimitacion.fin[borde]
+    segmento = b - a
+    largo = np.maximum((segmento ** 2).sum(axis=1), np.finfo(float).tiny)
+    t = np.clip(((puntos[p] - a) * segmento).sum(axis=1) / largo, 0.0, 1.0)
+    distancia = np.hypot(*(puntos[p] - (a + t[:, None] * segmento)).T)
+    cerca = np.zeros(len(puntos), dtype=bool)
+    cerca[p[distancia <= tolerancia]] = True
+    return cerca
+
+
+def cruzan_borde(delimitacion: Delimitacion, inicio: np.ndarray, fin: np.ndarray) -> np.ndarray:
+    """
+    Máscara de los segmentos (inicio, fin) que atraviesan un borde de la delimitación: los
+    extremos del borde a ambos lados del segmento y los del segmento a ambos lados del borde, a
+    más de la tolerancia XY. Los segmentos que siguen un borde o lo tocan en un vértice no cuentan.
+    """
+    s, borde = delimitacion.bordes.intersectan(_envolventes(inicio, fin))
+    p, q = inicio[s], fin[s]
+    a, b = delimitacion.inicio[borde], delimitacion.fin[borde]
+    d1 = _orientacion(p, q, a)
+    d2 = _orientacion(p, q, b)
+    d3 = _orientacion(a, b, p)
+    d4 = _orientacion(a, b, q)
+    margen = delimitacion.tolerancia * np.hypot(*(b - a).T)
+    cruza = (np.sign(d1) * np.sign(d2) < 0) & (d3 * d4 < 0) & (np.abs(d3) > margen) & (np.abs(d4) > margen)
+    resultado = np.zeros(len(inicio), dtype=bool)
+    resultado[s[cruza]] = True
+    return resultado
+
+
+def validar_contencion(gdb, catalog: pd.DataFrame, nombres: Iterable[str],
+                       delimitacion: Optional[Delimitacion] = None) -> pd.DataFrame:
+    """
+    Cuenta los registros de cada feature class fuera de la delimitación del proyecto.
+
+    Args:
+        gdb: workspace abierto con open_workspace.
+        catalog pd.DataFrame: catálogo de la gdb (read_catalog).
+        nombres Iterable[str]: feature classes a validar; DELIMIT_PROYEC_PG y las que no están en
+            la gdb o no tienen geometría se omiten.
+        delimitacion Delimitacion: delimitación ya leída, por defecto leer_delimitacion.
+    Returns:
+        pd.DataFrame: columnas de COLUMNAS_RESULTADO, un registro por feature class; MUESTRA son
+            los primeros OBJECTID fuera, SIN_VERIFICAR los registros con curvas que tocan un borde
+            y MOTIVO, si no es None, por qué no se verificó la feature class. Vacío si no hay
+            delimitación.
+    """
+    return pd.DataFrame.from_records(list(iterar_contencion(gdb, catalog, nombres, delimitacion)),
+                                     columns=COLUMNAS_RESULTADO)
+
+
+def iterar_contencion(gdb, catalog: pd.DataFrame, nombres: Iterable[str],
+                      delimitacion: Optional[Delimitacion] = None) -> Iterator[tuple]:
+    """
+    Registros de validar_contencion, entregados a medida que se termina cada feature class.
+    """
+    delimitacion = delimitacion or leer_delimitacion(gdb, catalog)
+    if delimitacion is None:
+        return
+    ids = table_ids(catalog)
+    for nombre in sorted(set(nombres) - {DELIMITACION}):
+        if nombre not in ids:
+            continue
+        with GdbTable.open(gdb, ids[nombre], nombre) as table:
+            field = table.geometry_field
+            if field is None or field.geometry is None:
+                continue
+            if field.geometry.wkt != delimitacion.geometry.wkt:
+                registro = (nombre, table.total_rows, 0, [], 0, f'sistema de referencia diferente al de {DELIMITACION}')
+            else:
+                registro = (nombre, *_validar_objeto(table, delimitacion), None)
+        yield registro
+
+
+def _validar_objeto(table: GdbTable, delimitacion: Delimitacion) -> Tuple[int, int, List[int], int]:
+    """
+    Registros leídos, fuera, primeros OBJECTID fuera y sin verificar de una feature class.
+    """
+    field = table.geometry_field
+    oids, envolventes, leidos = [], [], 0
+    for bloque in table.read_columns([field.name]):
+        leidos += len(bloque)
+        for oid, blob in zip(bloque.iloc[:, 0].tolist(), bloque[field.name].tolist()):
+            extension = read_extent(blob, field.geometry) if blob is not None else None
+            if extension is not None:
+                oids.append(oid)
+                envolventes.append(extension)
+    if not oids:
+        return leidos, 0, [], 0
+    oids = np.array(oids, dtype=np.int64)
+    envolventes = np.array(envolventes, dtype=np.float64)
+
+    tolerancia = delimitacion.tolerancia
+    bordes = _envolventes(delimitacion.inicio, delimitacion.fin) + (-tolerancia, -tolerancia, tolerancia, tolerancia)
+    _, tocan = ArbolR(envolventes).intersectan(bordes)
+    candidato = np.zeros(len(oids), dtype=bool)
+    candidato[tocan] = True
+
+    # Envolventes que no tocan ningún borde: enteras dentro o enteras fuera
+    fuera = np.zeros(len(oids), dtype=bool)
+    lejos = np.flatnonzero(~candidato)
+    fuera[lejos] = ~dentro(delimitacion, envolventes[lejos, :2])
+
+    sin_verificar = 0
+    candidatos = np.flatnonzero(candidato)
+    for desde in range(0, len(candidatos), candidatos_contencion):
+        lote = candidatos[desde:desde + candidatos_contencion]
+        resultado = _comprobar(table, delimitacion, oids[lote])
+        fuera[lote] = resultado == 1
+        sin_verificar += int((resultado < 0).sum())
+    return leidos, int(fuera.sum()), oids[fuera][:muestras_contencion].tolist(), sin_verificar
+
+
+def _comprobar(table: GdbTable, delimitacion: Delimitacion, oids: np.ndarray) -> np.ndarray:
+    """
+    Comprobación exacta de los registros que tocan un borde: 1 fuera, 0 dentro, -1 sin verificar.
+    """
+    field = table.geometry_field
+    resultado = np.zeros(len(oids), dtype=np.int8)
+    vertices, de_vertice, inicios, fines, de_segmento = [], [], [], [], []
+    for i, oid in enumerate(oids.tolist()):
+        blob = table.read_row(table.row_offset(oid), [field.name])[field.name]
+        puntos = read_points(blob, field.geometry)
+        partes = [puntos] if puntos is not None else read_shape(blob, field.geometry)
+        if partes is None:
+            resultado[i] = -1
+            continue
+        for parte in partes:
+            vertices.append(parte)
+            de_vertice.append(np.full(len(parte), i))
+            if puntos is None and len(parte) >= 2:
+                inicios.append(parte[:-1])
+                fines.append(parte[1:])
+                de_segmento.append(np.full(len(parte) - 1, i))
+    if vertices:
+        puntos = np.concatenate(vertices)
+        de_vertice = np.concatenate(de_vertice)
+        afuera = ~dentro(delimitacion, puntos)
+        afuera[afuera] = ~sobre_borde(delimitacion, puntos[afuera])
+        resultado[np.unique(de_vertice[afuera])] = 1
+    if inicios:
+        cruza = cruzan_borde(delimitacion, np.concatenate(inicios), np.concatenate(fines))
+        resultado[np.unique(np.concatenate(de_segmento)[cruza])] = 1
+    return resultado
+
+
+def _envolventes(inicio: np.ndarray, fin: np.ndarray) -> np.ndarray:
+    return np.column_stack([np.minimum(inicio, fin), np.maximum(inicio, fin)])
+
+
+def _orientacion(p: np.ndarray, q: np.ndarray, r: np.ndarray) -> np.ndarray:
+    return (q[:, 0] - p[:, 0]) * (r[:, 1] - p[:, 1]) - (q[:, 1] - p[:, 1]) * (r[:, 0] - p[:, 0])
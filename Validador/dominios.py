@@ -0,0 +1,131 @@
+"""
+Validación de los valores de los campos con dominio (ítem k de feature_attributes).
+
+Los dominios se leen una sola vez de GDB_Items (ver read_domains) y cada feature class se lee
+por columnas (GdbTable.read_columns) solo con sus campos con dominio; la pertenencia a un dominio
+de valores codificados y los límites de un dominio de rango se comprueban sobre la columna
+completa de cada bloque, sin recorrer las filas. Los nulos no se consideran violaciones.
+"""
+import os
+import numpy as np
+import pandas as pd
+
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from Validador.filegdb import GdbTable
+from Validador.gdb_catalog import CODED_VALUE_DOMAIN, Domain, schema_workers, table_ids
+
+# OBJECTID de ejemplo por campo en el mensaje
+muestras_dominio = int(os.getenv('VALW_DOMINIO_MUESTRAS', '5'))
+
+COLUMNAS_RESULTADO = ['NOMBRE', 'NOMBRE_ATRIBUTO', 'DOMINIO', 'REGISTROS', 'VIOLACIONES', 'MUESTRA']
+
+
+def fuera_de_dominio(valores, dominio: Domain) -> np.ndarray:
+    """
+    Máscara de los valores no nulos que no cumplen el dominio.
+
+    Args:
+        valores: columna leída con read_columns.
+        dominio Domain: dominio del campo.
+    Returns:
+        np.ndarray: booleano, True en las filas que violan el dominio.
+    """
+    serie = pd.Series(valores, copy=False)
+    presentes = serie.notna().to_numpy()
+    if dominio.type == CODED_VALUE_DOMAIN:
+        if serie.dtype == object:
+            return presentes & ~serie.isin(dominio.codes).to_numpy()
+        columna, codigos = _comparables(serie, dominio.codes)
+        return presentes & ~np.isin(columna, codigos)
+    columna, (minimo, maximo) = _comparables(serie, (dominio.minimum, dominio.maximum))
+    fuera = np.zeros(len(serie), dtype=bool)
+    if minimo is not None:
+        fuera |= columna < minimo
+    if maximo is not None:
+        fuera |= columna > maximo
+    return presentes & fuera
+
+
+def _comparables(serie: pd.Series, valores: Tuple) -> Tuple[np.ndarray, Tuple]:
+    """
+    Columna y valores del dominio en un mismo tipo NumPy (float64 o datetime64).
+    """
+    if pd.api.types.is_datetime64_any_dtype(serie.dtype):
+        return serie.to_numpy(), tuple(None if valor is None else np.datetime64(valor, 'ms') for valor in valores)
+    columna = serie.to_numpy(dtype=np.float64, na_value=np.nan)
+    return columna, tuple(None if valor is None else _numero(valor) for valor in valores)
+
+
+def _numero(valor) -> float:
+    try:
+        return float(valor)
+    except (TypeError, ValueError):
+        # Un código que no es numérico nunca coincide con un campo numérico
+        return np.nan
+
+
+def validar_dominios(gdb, catalog: pd.DataFrame, campos: pd.DataFrame, dominios: Dict[str, Domain],
+                     workers: Optional[int] = None) -> pd.DataFrame:
+    """
+    Cuenta las violaciones de dominio de cada campo.
+
+    Args:
+        gdb: workspace abierto con open_workspace.
+        catalog pd.DataFrame: catálogo de la gdb (read_catalog).
+        campos pd.DataFrame: columnas NOMBRE, NOMBRE_ATRIBUTO y DOMINIO (ver get_feature_attributes),
+            solo los campos con un dominio definido en `dominios`.
+        dominios Dict[str, Domain]: dominios de la gdb (read_domains).
+        workers int: feature classes leídas en paralelo, por defecto VALW_SCHEMA_WORKERS.
+    Returns:
+        pd.DataFrame: columnas de COLUMNAS_RESULTADO, un registro por campo; MUESTRA son los
+            primeros OBJECTID que violan el dominio.
+    """
+    return pd.DataFrame.from_records(list(iterar_dominios(gdb, catalog, campos, dominios, workers)),
+                                     columns=COLUMNAS_RESULTADO)
+
+
+def iterar_dominios(gdb, catalog: pd.DataFrame, campos: pd.DataFrame, dominios: Dict[str, Domain],
+                    workers: Optional[int] = None) -> Iterator[tuple]:
+    """
+    Registros de validar_dominios, entregados a medida que se termina cada feature class.
+    """
+    ids = table_ids(catalog)
+    por_objeto = [(nombre, ids[nombre], dict(zip(grupo['NOMBRE_ATRIBUTO'], grupo['DOMINIO'])))
+                  for nombre, grupo in campos.groupby('NOMBRE', sort=True) if nombre in ids]
+    if not por_objeto:
+        return
+
+    def validar(objeto: Tuple[str, int, Dict[str, str]]) -> List[tuple]:
+        return _validar_objeto(gdb, *objeto, dominios)
+
+    with ThreadPoolExecutor(max_workers=min(workers or schema_workers, len(por_objeto))) as executor:
+        for registros in executor.map(validar, por_objeto):
+            yield from registros
+
+
+def _validar_objeto(gdb, nombre: str, table_id: int, campos: Dict[str, str],
+                    dominios: Dict[str, Domain]) -> List[tuple]:
+    """
+    Registros de COLUMNAS_RESULTADO de una feature class, en una sola lectura de sus columnas.
+    """
+    with GdbTable.open(gdb, table_id, nombre) as table:
+        existentes = set(table.field_names)
+        campos = {campo: dominio for campo, dominio in campos.items() if campo in existentes}
+        if not campos:
+            return []
+        registros = 0
+        violaciones = dict.fromkeys(campos, 0)
+        muestras: Dict[str, List[int]] = {campo: [] for campo in campos}
+        for bloque in table.read_columns(list(campos)):
+            registros += len(bloque)
+            oids = bloque.iloc[:, 0].to_numpy()
+            for campo, dominio in campos.items():
+                fuera = fuera_de_dominio(bloque[campo], dominios[dominio])
+                violaciones[campo] += int(fuera.sum())
+                faltan = muestras_dominio - len(muestras[campo])
+                if faltan > 0:
+                    muestras[campo] += oids[fuera][:faltan].tolist()
+    return [(nombre, campo, dominio, registros, violaciones[campo], muestras[campo])
+            for campo, dominio in campos.items()]
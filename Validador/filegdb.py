@@ -0,0 +1,946 @@
+"""
+Lectura nativa de tablas File Geodatabase (.gdbtable / .gdbtablx) sin arcpy.
+
+Implementa el subconjunto del formato abierto de Esri (versión 10.x, archivos con
+magic 3) necesario para leer el catálogo del sistema y las tablas de la gdb.
+
+Las tablas se leen de la carpeta .gdb (GdbFolder) o directamente del .gdb.zip cargado
+(GdbZip), sin extraerlo.
+"""
+import hashlib
+import mmap
+import os
+import shutil
+import struct
+import tempfile
+import threading
+import uuid
+import zipfile
+import numpy as np
+import pandas as pd
+
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterator, List, NamedTuple, Optional, Sequence, Tuple
+
+from Validador import metricas
+
+
+FGFT_INT16 = 0
+FGFT_INT32 = 1
+FGFT_FLOAT32 = 2
+FGFT_FLOAT64 = 3
+FGFT_STRING = 4
+FGFT_DATETIME = 5
+FGFT_OBJECTID = 6
+FGFT_GEOMETRY = 7
+FGFT_BINARY = 8
+FGFT_RASTER = 9
+FGFT_GUID = 10
+FGFT_GLOBALID = 11
+FGFT_XML = 12
+
+# Nombres equivalentes a field.type de arcpy.ListFields
+FIELD_TYPE_NAMES = {
+    FGFT_INT16: 'SmallInteger',
+    FGFT_INT32: 'Integer',
+    FGFT_FLOAT32: 'Single',
+    FGFT_FLOAT64: 'Double',
+    FGFT_STRING: 'String',
+    FGFT_DATETIME: 'Date',
+    FGFT_OBJECTID: 'OID',
+    FGFT_GEOMETRY: 'Geometry',
+    FGFT_BINARY: 'Blob',
+    FGFT_RASTER: 'Raster',
+    FGFT_GUID: 'Guid',
+    FGFT_GLOBALID: 'GlobalID',
+    FGFT_XML: 'XML',
+}
+
+# Nombres equivalentes a shapeType de arcpy.Describe
+GEOMETRY_TYPE_NAMES = {
+    0: None,
+    1: 'Point',
+    2: 'Multipoint',
+    3: 'Polyline',
+    4: 'Polygon',
+    9: 'MultiPatch',
+}
+
+# Tipos de shape de líneas y polígonos (simples, Z, M, ZM y generales)
+_POLY_SHAPE_TYPES = {3, 10, 13, 23, 5, 15, 19, 25, 50, 51}
+# Tipos de shape de puntos y multipuntos (simples, Z, M, ZM y generales)
+_POINT_SHAPE_TYPES = {1, 9, 11, 21, 52}
+_MULTIPOINT_SHAPE_TYPES = {8, 18, 20, 28, 53}
+_SHAPE_HAS_CURVES = 0x20000000
+# Enteros hasta los que _read_varints los lee uno por uno
+_VARINTS_LOOP = 64
+
+_FIXED_SIZE = {
+    FGFT_INT16: struct.Struct('<h'),
+    FGFT_INT32: struct.Struct('<i'),
+    FGFT_FLOAT32: struct.Struct('<f'),
+    FGFT_FLOAT64: struct.Struct('<d'),
+    FGFT_DATETIME: struct.Struct('<d'),
+}
+_EPOCH = datetime(1899, 12, 30)
+
+
+class GeometryDef(NamedTuple):
+    wkt: str
+    has_z: bool
+    has_m: bool
+    xorigin: float
+    yorigin: float
+    xyscale: float
+    morigin: float
+    mscale: float
+    zorigin: float
+    zscale: float
+    xytolerance: float
+    extent: Tuple[float, float, float, float]
+
+
+class GdbField(NamedTuple):
+    name: str
+    alias: str
+    type: int
+    nullable: bool
+    length: int
+    geometry: Optional[GeometryDef] = None
+
+    @property
+    def type_name(self) -> str:
+        return FIELD_TYPE_NAMES[self.type]
+
+
+def read_varuint(buffer, pos: int) -> Tuple[int, int]:
+    """
+    Lee un entero sin signo de longitud variable (7 bits por byte).
+
+    Returns:
+        valor, posición siguiente
+    """
+    result = 0
+    shift = 0
+    while True:
+        byte = buffer[pos]
+        pos += 1
+        result |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return result, pos
+        shift += 7
+
+
+def read_varint(buffer, pos: int) -> Tuple[int, int]:
+    """
+    Lee un entero con signo de longitud variable. El primer byte trae
+    6 bits de magnitud y el bit 0x40 como signo.
+    """
+    byte = buffer[pos]
+    pos += 1
+    result = byte & 0x3F
+    negative = byte & 0x40
+    shift = 6
+    while byte & 0x80:
+        byte = buffer[pos]
+        pos += 1
+        result |= (byte & 0x7F) << shift
+        shift += 7
+    return (-result if negative else result), pos
+
+
+def read_shape(blob, geometry: GeometryDef, grid: bool = False) -> Optional[List[np.ndarray]]:
+    """
+    Decodifica la geometría comprimida de un registro de polígonos o líneas.
+
+    Args:
+        blob: valor del campo de geometría (bytes).
+        geometry GeometryDef: definición del campo, con origen y escala de las coordenadas.
+        grid bool: devolver las coordenadas enteras de la grilla de almacenamiento (int64), sin
+            origen ni escala, para comparaciones exactas.
+    Returns:
+        List[np.ndarray]: coordenadas XY (n x 2) de cada parte o anillo; lista vacía para una
+            geometría vacía y None si el tipo no está soportado (puntos, multipatch o curvas).
+    """
+    if not blob:
+        return []
+    shape_type, pos = read_varuint(blob, 0)
+    base_type = shape_type & 0xFF
+    if base_type not in _POLY_SHAPE_TYPES or shape_type & _SHAPE_HAS_CURVES:
+        return None
+    n_points, pos = read_varuint(blob, pos)
+    if n_points == 0:
+        return []
+    n_parts, pos = read_varuint(blob, pos)
+    for _ in range(4):
+        # Extensión (xmin, ymin, xmax, ymax); no se necesita para las coordenadas
+        _, pos = read_varuint(blob, pos)
+    counts = []
+    for _ in range(n_parts - 1):
+        count, pos = read_varuint(blob, pos)
+        counts.append(count)
+    counts.append(n_points - sum(counts))
+
+    deltas, pos = _read_varints(blob, pos, 2 * n_points)
+    coords = np.cumsum(deltas.reshape(n_points, 2), axis=0)
+    if not grid:
+        coords = coords / geometry.xyscale
+        coords += (geometry.xorigin, geometry.yorigin)
+    return np.split(coords, np.cumsum(counts)[:-1])
+
+
+
+def read_points(blob, geometry: GeometryDef) -> Optional[np.ndarray]:
+    """
+    Decodifica la geometría de un registro de puntos o multipuntos.
+
+    Returns:
+        np.ndarray: coordenadas XY (n x 2), vacío para una geometría vacía; None si no es de
+            puntos ni de multipuntos.
+    """
+    if not blob:
+        return np.empty((0, 2))
+    shape_type, pos = read_varuint(blob, 0)
+    base_type = shape_type & 0xFF
+    if base_type in _POINT_SHAPE_TYPES:
+        x, pos = read_varuint(blob, pos)
+        y, pos = read_varuint(blob, pos)
+        if x == 0:
+            return np.empty((0, 2))
+        # Las coordenadas de un punto se guardan desplazadas en 1 para reservar el 0 al punto vacío
+        return np.array([[(x - 1) / geometry.xyscale + geometry.xorigin,
+                          (y - 1) / geometry.xyscale + geometry.yorigin]])
+    if base_type not in _MULTIPOINT_SHAPE_TYPES:
+        return None
+    n_points, pos = read_varuint(blob, pos)
+    if n_points == 0:
+        return np.empty((0, 2))
+    for _ in range(4):
+        _, pos = read_varuint(blob, pos)
+    deltas, pos = _read_varints(blob, pos, 2 * n_points)
+    return np.cumsum(deltas.reshape(n_points, 2), axis=0) / geometry.xyscale + (geometry.xorigin, geometry.yorigin)
+
+
+def read_extent(blob, geometry: GeometryDef) -> Optional[Tuple[float, float, float, float]]:
+    """
+    Extensión (xmin, ymin, xmax, ymax) de la geometría de un registro, leída de su cabecera sin
+    decodificar los vértices; también para geometrías con curvas.
+
+    Returns:
+        Tuple[float, float, float, float]: extensión; None si la geometría está vacía o es de un
+            tipo sin extensión en la cabecera (multipatch).
+    """
+    if not blob:
+        return None
+    shape_type, pos = read_varuint(blob, 0)
+    base_type = shape_type & 0xFF
+    if base_type in _POINT_SHAPE_TYPES:
+        points = read_points(blob, geometry)
+        return (points[0, 0], points[0, 1], points[0, 0], points[0, 1]) if len(points) else None
+    if base_type not in _POLY_SHAPE_TYPES and base_type not in _MULTIPOINT_SHAPE_TYPES:
+        return None
+    n_points, pos = read_varuint(blob, pos)
+    if n_points == 0:
+        return None
+    if base_type in _POLY_SHAPE_TYPES:
+        _, pos = read_varuint(blob, pos)
+        if shape_type & _SHAPE_HAS_CURVES:
+            _, pos = read_varuint(blob, pos)
+    xmin, pos = read_varuint(blob, pos)
+    ymin, pos = read_varuint(blob, pos)
+    width, pos = read_varuint(blob, pos)
+    height, pos = read_varuint(blob, pos)
+    return (xmin / geometry.xyscale + geometry.xorigin, ymin / geometry.xyscale + geometry.yorigin,
+            (xmin + width) / geometry.xyscale + geometry.xorigin, (ymin + height) / geometry.xyscale + geometry.yorigin)
+
+def table_file_name(table_id: int) -> str:
+    """
+    Nombre base del archivo de una tabla a partir de su ID en GDB_SystemCatalog.
+    """
+    return f'a{table_id:08x}'
+
+
+class GdbTable:
+    """
+    Tabla de una File Geodatabase.
+
+    Args:
+        data: contenido del archivo .gdbtable (bytes, mmap o cualquier buffer).
+        index: contenido del archivo .gdbtablx.
+        name str: nombre de la tabla, solo para mensajes.
+    """
+
+    def __init__(self, data, index, name: str = ''):
+        self.name = name
+        self._data = data
+        self._index = index
+        self._read_header()
+        self._read_fields()
+        self._read_index_header()
+
+    def __enter__(self) -> 'GdbTable':
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """
+        Libera los archivos mapeados en memoria.
+        """
+        for buffer in (self._data, self._index):
+            if isinstance(buffer, mmap.mmap):
+                buffer.close()
+            elif isinstance(buffer, memoryview):
+                buffer.release()
+
+    @classmethod
+    def open(cls, gdb, table_id: int, name: str = '') -> 'GdbTable':
+        """
+        Abre la tabla número `table_id` de la gdb.
+
+        Args:
+            gdb: ruta de la carpeta .gdb o del .gdb.zip, o un workspace ya abierto (ver open_workspace).
+            table_id int: número de la tabla.
+            name str: nombre de la tabla, solo para mensajes.
+        """
+        if isinstance(gdb, str):
+            with open_workspace(gdb) as workspace:
+                return cls.open(workspace, table_id, name)
+        base = table_file_name(table_id)
+        if not gdb.exists(f'{base}.gdbtable'):
+            raise FileNotFoundError(
+                f'No existe el archivo de la tabla {name or table_id} -> {os.path.join(gdb.path, base)}.gdbtable')
+        return cls(gdb.read(f'{base}.gdbtable'), gdb.read(f'{base}.gdbtablx'), name=name)
+
+    def _read_header(self) -> None:
+        magic, self.valid_rows = struct.unpack_from('<ii', self._data, 0)
+        if magic != 3:
+            raise ValueError(f'Versión de tabla no soportada ({magic}) -> {self.name}')
+        self._fields_offset = struct.unpack_from('<q', self._data, 32)[0]
+
+    def _read_fields(self) -> None:
+        data = self._data
+        pos = self._fields_offset
+        _, _, layer_flags, n_fields = struct.unpack_from('<iiIh', data, pos)
+        pos += 14
+        self.geometry_type = layer_flags & 0xFF
+        fields = []
+        for _ in range(n_fields):
+            name, pos = _read_utf16(data, pos, data[pos], 1)
+            alias, pos = _read_utf16(data, pos, data[pos], 1)
+            field_type = data[pos]
+            pos += 1
+            geometry = None
+            length = 0
+            if field_type == FGFT_OBJECTID or field_type in (FGFT_GUID, FGFT_GLOBALID):
+                length, flags = data[pos], data[pos + 1]
+                pos += 2
+            elif field_type in _FIXED_SIZE:
+                length, flags, default_length = data[pos], data[pos + 1], data[pos + 2]
+                pos += 3 + default_length
+            elif field_type == FGFT_STRING:
+                length = struct.unpack_from('<i', data, pos)[0]
+                flags = data[pos + 4]
+                default_length, pos = read_varuint(data, pos + 5)
+                pos += default_length
+            elif field_type in (FGFT_BINARY, FGFT_XML):
+                flags = data[pos + 1]
+                pos += 2
+            elif field_type == FGFT_GEOMETRY:
+                flags = data[pos + 1]
+                geometry, pos = _read_geometry_def(data, pos + 2)
+            else:
+                raise ValueError(f'Tipo de campo no soportado ({field_type}) -> {self.name}.{name}')
+            fields.append(GdbField(name, alias, field_type, bool(flags & 1), length, geometry))
+        self.fields: List[GdbField] = fields
+        self._nullable_count = sum(1 for field in fields if field.nullable)
+        self._null_bytes = (self._nullable_count + 7) // 8
+
+    def _read_index_header(self) -> None:
+        magic, self._n_blocks, self.total_rows, self._offset_size = struct.unpack_from('<iiii', self._index, 0)
+        if magic != 3:
+            raise ValueError(f'Versión de índice no soportada ({magic}) -> {self.name}')
+        self._block_map = None
+        if self._n_blocks and self._n_blocks * 1024 < self.total_rows:
+            trailer = 16 + self._n_blocks * 1024 * self._offset_size
+            n_words, n_bits = struct.unpack_from('<II', self._index, trailer)
+            bitmap = int.from_bytes(bytes(self._index[trailer + 16:trailer + 16 + n_words * 4]), 'little')
+            block_map = []
+            physical = 0
+            for block in range(n_bits):
+                if bitmap >> block & 1:
+                    block_map.append(physical)
+                    physical += 1
+                else:
+                    block_map.append(-1)
+            self._block_map = block_map
+
+    @property
+    def field_names(self) -> List[str]:
+        return [field.name for field in self.fields]
+
+    @property
+    def geometry_field(self) -> Optional[GdbField]:
+        for field in self.fields:
+            if field.type == FGFT_GEOMETRY:
+                return field
+        return None
+
+    def row_offset(self, object_id: int) -> int:
+        """
+        Posición de la fila en el .gdbtable, 0 si la fila no existe o fue borrada.
+        """
+        row = object_id - 1
+        if row < 0 or row >= self.total_rows:
+            return 0
+        block = row // 1024
+        if self._block_map is not None:
+            block = self._block_map[block] if block < len(self._block_map) else -1
+            if block < 0:
+                return 0
+        start = 16 + (block * 1024 + row % 1024) * self._offset_size
+        return int.from_bytes(bytes(self._index[start:start + self._offset_size]), 'little')
+
+    def row_offsets(self, start: Optional[int] = None, stop: Optional[int] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        OBJECTID y posición de las filas vigentes, leídos del .gdbtablx de una vez.
+
+        Args:
+            start int: primer OBJECTID, por defecto el primero de la tabla.
+            stop int: OBJECTID final (excluido), por defecto después del último; con un rango
+                solo se lee la parte del índice que lo cubre.
+        Returns:
+            oids, offsets Tuple[np.ndarray, np.ndarray]: arreglos int64 alineados.
+        """
+        first = 0 if start is None else max(start - 1, 0)
+        last = self.total_rows if stop is None else min(stop - 1, self.total_rows)
+        if not self._n_blocks or first >= last:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+        if self._block_map is None:
+            rows = np.arange(first, min(last, self._n_blocks * 1024), dtype=np.int64)
+            physical = rows
+        else:
+            block_map = np.asarray(self._block_map, dtype=np.int64)
+            blocks = np.arange(first // 1024, min(-(-last // 1024), len(block_map)), dtype=np.int64)
+            blocks = blocks[block_map[blocks] >= 0]
+            rows = (blocks[:, None] * 1024 + np.arange(1024)).ravel()
+            physical = (block_map[blocks][:, None] * 1024 + np.arange(1024)).ravel()
+            in_range = (rows >= first) & (rows < last)
+            rows, physical = rows[in_range], physical[in_range]
+        index = np.frombuffer(self._index, dtype=np.uint8)
+        raw = index[16 + physical[:, None] * self._offset_size + np.arange(self._offset_size)].astype(np.int64)
+        offsets = (raw << (8 * np.arange(self._offset_size, dtype=np.int64))).sum(axis=1)
+        valid = offsets > 0
+        return rows[valid] + 1, offsets[valid]
+
+    def offsets(self) -> Iterator[Tuple[int, int]]:
+        """
+        Recorre las filas vigentes de la tabla.
+
+        Returns:
+            Iterator[Tuple[int, int]]: (OBJECTID, posición de la fila)
+        """
+        oids, offsets = self.row_offsets()
+        return zip(oids.tolist(), offsets.tolist())
+
+    def read_row(self, offset: int, fields: Optional[Sequence[str]] = None) -> Dict[str, Any]:
+        """
+        Decodifica la fila ubicada en `offset`.
+
+        Args:
+            offset int: posición de la fila en el .gdbtable.
+            fields Sequence[str]: campos a devolver, todos si es None.
+        Returns:
+            Dict[str, Any]: valores de la fila por nombre de campo.
+        """
+        data = self._data
+        wanted = None if fields is None else set(fields)
+        null_flags = data[offset + 4:offset + 4 + self._null_bytes]
+        pos = offset + 4 + self._null_bytes
+        nullable_index = 0
+        row = {}
+        for field in self.fields:
+            if field.type == FGFT_OBJECTID:
+                continue
+            if field.nullable:
+                is_null = null_flags[nullable_index >> 3] & (1 << (nullable_index & 7))
+                nullable_index += 1
+                if is_null:
+                    if wanted is None or field.name in wanted:
+                        row[field.name] = None
+                    continue
+            value, pos = _read_value(data, pos, field.type, wanted is None or field.name in wanted)
+            if wanted is None or field.name in wanted:
+                row[field.name] = value
+        return row
+
+    def rows(self, fields: Optional[Sequence[str]] = None) -> Iterator[Dict[str, Any]]:
+        """
+        Recorre todas las filas vigentes incluyendo el OBJECTID.
+        """
+        oid_name = next((field.name for field in self.fields if field.type == FGFT_OBJECTID), 'OBJECTID')
+        for object_id, offset in self.offsets():
+            row = self.read_row(offset, fields)
+            row[oid_name] = object_id
+            yield row
+
+    def read_columns(self, fields: Sequence[str], chunk_size: int = 65536, start: Optional[int] = None,
+                     stop: Optional[int] = None) -> Iterator[pd.DataFrame]:
+        """
+        Lee solo los campos pedidos por bloques de filas, como columnas.
+
+        Las posiciones de los campos se ubican recorriendo cada fila sin decodificar los demás
+        valores; los campos numéricos y de fecha se extraen del archivo mapeado con NumPy.
+
+        Args:
+            fields Sequence[str]: campos a leer.
+            chunk_size int: filas por bloque.
+            start, stop int: rango de OBJECTID a leer (ver row_offsets), por defecto toda la tabla.
+        Returns:
+            Iterator[pd.DataFrame]: un DataFrame por bloque con OBJECTID y los campos pedidos.
+        """
+        by_name = {field.name: field for field in self.fields}
+        missing = [name for name in fields if name not in by_name]
+        if missing:
+            raise KeyError(f'Campos inexistentes en {self.name} -> {", ".join(missing)}')
+        oid_name = next((field.name for field in self.fields if field.type == FGFT_OBJECTID), 'OBJECTID')
+        wanted = [name for name in fields if by_name[name].type != FGFT_OBJECTID]
+        oids, offsets = self.row_offsets(start, stop)
+        buffer = np.frombuffer(self._data, dtype=np.uint8)
+        for first in range(0, len(oids), chunk_size):
+            chunk_offsets = offsets[first:first + chunk_size]
+            positions = self._field_positions(chunk_offsets, wanted)
+            columns = {oid_name: oids[first:first + chunk_size]}
+            for name in fields:
+                if name == oid_name:
+                    continue
+                columns[name] = self._column(buffer, by_name[name], positions[name])
+            yield pd.DataFrame(columns, columns=[oid_name] + [name for name in fields if name != oid_name])
+
+    def _field_positions(self, offsets: np.ndarray, wanted: Sequence[str]) -> Dict[str, np.ndarray]:
+        """
+        Posición del valor de cada campo pedido en cada fila, -1 si es nulo.
+        """
+        stored = [field for field in self.fields if field.type != FGFT_OBJECTID]
+        last = max((i for i, field in enumerate(stored) if field.name in wanted), default=-1)
+        stored = stored[:last + 1]
+        positions = {name: np.full(len(offsets), -1, dtype=np.int64) for name in wanted}
+
+        # Si todo lo anterior al último campo pedido es de tamaño fijo y no nulo, la posición es constante
+        if all(field.type in _FIXED_SIZE and not field.nullable for field in stored):
+            pos = 4 + self._null_bytes
+            for field in stored:
+                if field.name in positions:
+                    positions[field.name] = offsets + pos
+                pos += _FIXED_SIZE[field.type].size
+            return positions
+
+        # Si no, se avanza campo por campo sobre todas las filas a la vez
+        buffer = np.frombuffer(self._data, dtype=np.uint8)
+        flags = offsets + 4
+        pos = flags + self._null_bytes
+        nullable_index = 0
+        for field in stored:
+            if field.nullable:
+                present = (buffer[flags + (nullable_index >> 3)] & (1 << (nullable_index & 7))) == 0
+                nullable_index += 1
+            else:
+                present = np.ones(len(offsets), dtype=bool)
+            if field.name in positions:
+                positions[field.name] = np.where(present, pos, -1)
+            fixed = _FIXED_SIZE.get(field.type)
+            if fixed is not None:
+                size = fixed.size
+            elif field.type in (FGFT_GUID, FGFT_GLOBALID):
+                size = 16
+            else:
+                length, end = _read_varuints(buffer, pos, present)
+                size = end - pos + length
+            pos = pos + np.where(present, size, 0)
+        return positions
+
+    def _column(self, buffer: np.ndarray, field: GdbField, positions: np.ndarray):
+        """
+        Decodifica los valores de un campo a partir de sus posiciones.
+        """
+        present = positions >= 0
+        fixed = _FIXED_SIZE.get(field.type)
+        if fixed is not None:
+            raw = buffer[positions[present, None] + np.arange(fixed.size)]
+            values = raw.view(fixed.format).ravel()
+            if field.type == FGFT_DATETIME:
+                result = np.full(len(positions), np.datetime64('NaT'), dtype='datetime64[ms]')
+                result[present] = np.datetime64(_EPOCH, 'ms') + np.round(values * 86400000.0).astype('timedelta64[ms]')
+                return result
+            if present.all():
+                return values
+            if field.type in (FGFT_INT16, FGFT_INT32):
+                result = pd.array(_scatter(values.astype(np.int64), present, 0), dtype='Int64')
+                result[~present] = pd.NA
+                return result
+            return _scatter(values.astype(np.float64), present, np.nan)
+        result = np.full(len(positions), None, dtype=object)
+        data = self._data
+        if field.type in (FGFT_STRING, FGFT_XML, FGFT_GEOMETRY, FGFT_BINARY):
+            rows = np.flatnonzero(present)
+            lengths, starts = _read_varuints(buffer, positions[rows], np.ones(len(rows), dtype=bool))
+            bounds = zip(starts.tolist(), (starts + lengths).tolist())
+            if field.type in (FGFT_STRING, FGFT_XML):
+                result[rows] = [str(data[start:end], 'utf-8') for start, end in bounds]
+            else:
+                result[rows] = [bytes(data[start:end]) for start, end in bounds]
+            return result
+        for row in np.flatnonzero(present).tolist():
+            result[row] = _read_value(data, int(positions[row]), field.type, True)[0]
+        return result
+
+
+def read_fields(gdb, table_id: int, name: str = '') -> Tuple[List[GdbField], int]:
+    """
+    Lee solo la definición de campos de una tabla, sin mapear sus filas ni el índice.
+
+    Args:
+        gdb: workspace abierto con open_workspace.
+        table_id int: número de la tabla.
+        name str: nombre de la tabla, solo para mensajes.
+    Returns:
+        fields, geometry_type Tuple[List[GdbField], int]: campos en el orden de la tabla y código
+            del tipo de geometría (ver GEOMETRY_TYPE_NAMES).
+    """
+    table = GdbTable.__new__(GdbTable)
+    table.name = name
+    table._data = _read_table_header(gdb, table_id, name)
+    table._read_header()
+    table._read_fields()
+    return table.fields, table.geometry_type
+
+
+def field_definitions(gdb, table_id: int, name: str = '') -> bytes:
+    """
+    Bytes de la definición de campos de una tabla, sin la cabecera de 40 bytes (que cambia con
+    la cantidad de filas). Sirven para detectar cambios de esquema sin interpretar los campos.
+    """
+    data = _read_table_header(gdb, table_id, name)
+    return data[struct.unpack_from('<q', data, 32)[0]:]
+
+
+def _read_table_header(gdb, table_id: int, name: str) -> bytes:
+    file_name = f'{table_file_name(table_id)}.gdbtable'
+    if not gdb.exists(file_name):
+        raise FileNotFoundError(f'No existe el archivo de la tabla {name or table_id} -> {os.path.join(gdb.path, file_name)}')
+    # Se copian los bytes de la cabecera para no dejar vistas abiertas sobre el zip
+    fields_offset = struct.unpack_from('<q', bytes(gdb.read(file_name, 40)), 32)[0]
+    header_size = struct.unpack_from('<i', bytes(gdb.read(file_name, fields_offset + 4)), fields_offset)[0]
+    return bytes(gdb.read(file_name, fields_offset + 4 + header_size))
+
+
+class GdbFolder:
+    """
+    Workspace sobre la carpeta .gdb en disco.
+
+    Args:
+        path str: ruta de la carpeta .gdb.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+
+    def __enter__(self) -> 'GdbFolder':
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+    def close(self) -> None:
+        pass
+
+    def exists(self, file_name: str) -> bool:
+        return os.path.exists(os.path.join(self.path, file_name))
+
+    def read(self, file_name: str, size: Optional[int] = None):
+        """
+        Contenido del archivo `file_name` de la gdb, mapeado en memoria. Con `size` se leen
+        solo los primeros bytes.
+        """
+        if size is not None:
+            with open(os.path.join(self.path, file_name), 'rb') as file:
+                data = file.read(size)
+        else:
+            data = _map_file(os.path.join(self.path, file_name))
+        metricas.sumar(bytes_gdb=len(data))
+        return data
+
+    def fingerprint(self, file_name: str) -> str:
+        """
+        Huella del contenido del archivo `file_name`: BLAKE2b de sus bytes, leídos por bloques.
+        """
+        digest = hashlib.blake2b(digest_size=16)
+        with open(os.path.join(self.path, file_name), 'rb') as file:
+            for block in iter(lambda: file.read(1 << 20), b''):
+                digest.update(block)
+                metricas.sumar(bytes_gdb=len(block))
+        return f'b2:{digest.hexdigest()}'
+
+    def folder(self) -> str:
+        """
+        Ruta de la carpeta .gdb, p. ej. para arcpy.env.workspace.
+        """
+        return self.path
+
+
+class GdbZip:
+    """
+    Workspace sobre un .gdb.zip sin extraerlo.
+
+    Los miembros almacenados sin compresión se leen por desplazamiento sobre el zip mapeado en
+    memoria, sin copiarlos; los comprimidos se descomprimen solo cuando se abre la tabla.
+
+    Args:
+        path str: ruta del archivo .zip.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._zip = zipfile.ZipFile(path)
+        self._map = None
+        self._map_lock = threading.Lock()
+        self._extract_dir = None
+        self.members, self.gdb_name = _gdb_members(self._zip)
+        if not self.members:
+            self._zip.close()
+            raise ValueError(f'El zip no contiene una File Geodatabase -> {path}')
+
+    def __enter__(self) -> 'GdbZip':
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """
+        Cierra el zip y borra la carpeta extraída por folder(), si la hay.
+        """
+        if self._map is not None:
+            try:
+                self._map.close()
+            except BufferError:
+                # Aún hay tablas abiertas sobre el zip; el mapa se libera con ellas.
+                pass
+            self._map = None
+        self._zip.close()
+        if self._extract_dir is not None:
+            shutil.rmtree(self._extract_dir, ignore_errors=True)
+            self._extract_dir = None
+
+    def exists(self, file_name: str) -> bool:
+        return file_name.lower() in self.members
+
+    def read(self, file_name: str, size: Optional[int] = None):
+        """
+        Contenido del miembro `file_name` de la gdb: una vista sobre el zip si está almacenado o
+        los bytes descomprimidos si está comprimido. Con `size` solo se descomprimen los primeros
+        bytes.
+        """
+        info = self.members.get(file_name.lower())
+        if info is None:
+            raise FileNotFoundError(f'No existe el archivo {file_name} en {self.path}')
+        if info.flag_bits & 0x1:
+            raise ValueError(f'El zip está cifrado -> {self.path}')
+        if info.compress_type != zipfile.ZIP_STORED:
+            if size is None:
+                data = self._zip.read(info)
+            else:
+                with self._zip.open(info) as member:
+                    data = member.read(size)
+            metricas.sumar(bytes_gdb=len(data))
+            return data
+        if info.file_size == 0:
+            return b''
+        with self._map_lock:
+            if self._map is None:
+                with open(self.path, 'rb') as file:
+                    self._map = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        # Cabecera local: 30 bytes + nombre + campo extra, que puede diferir del directorio central
+        name_length, extra_length = struct.unpack_from('<HH', self._map, info.header_offset + 26)
+        start = info.header_offset + 30 + name_length + extra_length
+        end = start + info.file_size if size is None else start + min(size, info.file_size)
+        metricas.sumar(bytes_gdb=end - start)
+        return memoryview(self._map)[start:end]
+
+    def fingerprint(self, file_name: str) -> str:
+        """
+        Huella del contenido del miembro `file_name`: el CRC-32 y el tamaño del directorio central
+        del zip, sin leer ni descomprimir el miembro.
+        """
+        info = self.members.get(file_name.lower())
+        if info is None:
+            raise FileNotFoundError(f'No existe el archivo {file_name} en {self.path}')
+        return f'crc32:{info.CRC:08x}:{info.file_size}'
+
+    def folder(self) -> str:
+        """
+        Extrae solo los archivos de la gdb en una carpeta temporal y devuelve su ruta.
+
+        Solo lo necesitan los pasos que aún usan arcpy; la carpeta se borra al cerrar el workspace.
+        """
+        if self._extract_dir is None:
+            self._extract_dir = tempfile.mkdtemp(prefix='valw_')
+            gdb_path = os.path.join(self._extract_dir, self.gdb_name)
+            os.makedirs(gdb_path)
+            for info in self.members.values():
+                target_path = os.path.join(gdb_path, info.filename.rsplit('/', 1)[-1])
+                with self._zip.open(info) as source, open(target_path, 'wb') as target:
+                    shutil.copyfileobj(source, target)
+        return os.path.join(self._extract_dir, self.gdb_name)
+
+
+def open_workspace(path: str):
+    """
+    Abre la gdb de `path`: un .zip se lee directamente con GdbZip y una carpeta con GdbFolder.
+    """
+    if path.lower().endswith('.zip'):
+        return GdbZip(path)
+    return GdbFolder(path)
+
+
+def _gdb_members(archive: zipfile.ZipFile) -> Tuple[Dict[str, zipfile.ZipInfo], str]:
+    """
+    Miembros de la carpeta del zip que contiene el catálogo del sistema (a00000001.gdbtable).
+    """
+    infos = [info for info in archive.infolist() if not info.is_dir()]
+    catalog = next((info for info in infos
+                    if info.filename.rsplit('/', 1)[-1].lower() == 'a00000001.gdbtable'), None)
+    if catalog is None:
+        return {}, ''
+    prefix = catalog.filename[:-len('a00000001.gdbtable')]
+    members = {info.filename[len(prefix):].lower(): info for info in infos
+               if info.filename.startswith(prefix) and '/' not in info.filename[len(prefix):]}
+    gdb_name = prefix.rstrip('/').rsplit('/', 1)[-1] or os.path.basename(archive.filename)[:-len('.zip')]
+    return members, gdb_name
+
+
+def _map_file(path: str):
+    """
+    Mapea un archivo en memoria de solo lectura. Los archivos vacíos se devuelven como bytes.
+    """
+    with open(path, 'rb') as file:
+        if os.fstat(file.fileno()).st_size == 0:
+            return b''
+        return mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+
+
+def _scatter(values: np.ndarray, present: np.ndarray, fill) -> np.ndarray:
+    result = np.full(len(present), fill, dtype=values.dtype)
+    result[present] = values
+    return result
+
+
+def _read_varuints(buffer: np.ndarray, pos: np.ndarray, mask: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    read_varuint de todas las posiciones `pos` con `mask` a la vez.
+
+    Returns:
+        values, ends Tuple[np.ndarray, np.ndarray]: valor y posición siguiente de cada una.
+    """
+    values = np.zeros(len(pos), dtype=np.int64)
+    ends = pos.copy()
+    active = np.flatnonzero(mask)
+    shift = 0
+    while len(active):
+        byte = buffer[ends[active]].astype(np.int64)
+        values[active] |= (byte & 0x7F) << shift
+        ends[active] += 1
+        active = active[byte >= 0x80]
+        shift += 7
+    return values, ends
+
+
+def _read_varints(buffer, pos: int, count: int) -> Tuple[np.ndarray, int]:
+    """
+    read_varint de `count` enteros consecutivos desde `pos`, a la vez.
+
+    Returns:
+        values, end Tuple[np.ndarray, int]: valores int64 y posición siguiente.
+    """
+    if count <= _VARINTS_LOOP:
+        # En geometrías de pocos vértices el bucle cuesta menos que armar los arreglos
+        values = np.empty(count, dtype=np.int64)
+        for i in range(count):
+            values[i], pos = read_varint(buffer, pos)
+        return values, pos
+    data = np.frombuffer(buffer, dtype=np.uint8, offset=pos)
+    ends = np.flatnonzero(data < 0x80)[:count]
+    if len(ends) < count:
+        raise ValueError('Geometría truncada')
+    size = int(ends[-1]) + 1
+    data = data[:size].astype(np.int64)
+    lengths = np.diff(ends, prepend=-1)
+    starts = ends - lengths + 1
+    # Posición de cada byte dentro de su entero: el primero trae 6 bits y el signo, los demás 7 bits
+    k = np.arange(size) - np.repeat(starts, lengths)
+    parts = np.where(k == 0, data & 0x3F, (data & 0x7F) << np.maximum(7 * k - 1, 0))
+    values = np.add.reduceat(parts, starts)
+    negative = (data[starts] & 0x40) != 0
+    values[negative] = -values[negative]
+    return values, pos + size
+
+
+def _read_utf16(buffer, pos: int, n_chars: int, prefix: int) -> Tuple[str, int]:
+    start = pos + prefix
+    end = start + n_chars * 2
+    return bytes(buffer[start:end]).decode('utf-16-le'), end
+
+
+def _read_geometry_def(data, pos: int) -> Tuple[GeometryDef, int]:
+    wkt_length = struct.unpack_from('<H', data, pos)[0]
+    wkt, pos = _read_utf16(data, pos, wkt_length // 2, 2)
+    flags = data[pos]
+    pos += 1
+    has_m = bool(flags & 2)
+    has_z = bool(flags & 4)
+    xorigin, yorigin, xyscale = struct.unpack_from('<3d', data, pos)
+    pos += 24
+    morigin = mscale = zorigin = zscale = 0.0
+    if has_m:
+        morigin, mscale = struct.unpack_from('<2d', data, pos)
+        pos += 16
+    if has_z:
+        zorigin, zscale = struct.unpack_from('<2d', data, pos)
+        pos += 16
+    xytolerance = struct.unpack_from('<d', data, pos)[0]
+    pos += 8 + 8 * (has_m + has_z)
+    extent = struct.unpack_from('<4d', data, pos)
+    pos += 32
+    # Según la versión puede haber rangos Z/M antes de los tamaños de grilla
+    while pos + 5 <= len(data):
+        n_grids = struct.unpack_from('<I', data, pos + 1)[0]
+        if data[pos] == 0 and 1 <= n_grids <= 3:
+            pos += 5 + 8 * n_grids
+            break
+        pos += 8
+    else:
+        raise ValueError('Definición de geometría sin tamaños de grilla')
+    return GeometryDef(wkt, has_z, has_m, xorigin, yorigin, xyscale, morigin, mscale,
+                       zorigin, zscale, xytolerance, extent), pos
+
+
+def _read_value(data, pos: int, field_type: int, decode: bool) -> Tuple[Any, int]:
+    fixed = _FIXED_SIZE.get(field_type)
+    if fixed is not None:
+        if not decode:
+            return None, pos + fixed.size
+        value = fixed.unpack_from(data, pos)[0]
+        if field_type == FGFT_DATETIME:
+            value = _EPOCH + timedelta(days=value)
+        return value, pos + fixed.size
+    if field_type in (FGFT_GUID, FGFT_GLOBALID):
+        value = '{%s}' % str(uuid.UUID(bytes_le=bytes(data[pos:pos + 16]))).upper() if decode else None
+        return value, pos + 16
+    length, pos = read_varuint(data, pos)
+    end = pos + length
+    if not decode:
+        return None, end
+    if field_type in (FGFT_STRING, FGFT_XML):
+        return bytes(data[pos:end]).decode('utf-8'), end
+    return bytes(data[pos:end]), end
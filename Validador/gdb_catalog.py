@@ -0,0 +1,285 @@
+"""
+Catálogo de una File Geodatabase leído directamente de las tablas del sistema
+(GDB_SystemCatalog, GDB_Items y GDB_ItemTypes) sin arcpy.
+"""
+import os
+import re
+import pandas as pd
+import xml.etree.ElementTree as ET
+
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+from Validador.filegdb import GdbTable, open_workspace, read_fields, GEOMETRY_TYPE_NAMES
+
+SYSTEM_CATALOG_ID = 1
+ITEMS_ID = 4
+ITEM_TYPES_ID = 5
+
+FEATURE_DATASET = 'Feature Dataset'
+FEATURE_CLASS = 'Feature Class'
+TABLE = 'Table'
+CODED_VALUE_DOMAIN = 'Coded Value Domain'
+RANGE_DOMAIN = 'Range Domain'
+
+# Códigos GCS de los datum usuales cuando el WKT proyectado no trae AUTHORITY
+GCS_CODES = {
+    'GCS_MAGNA': 4686,
+    'GCS_WGS_1984': 4326,
+    'GCS_Bogota': 4218,
+}
+
+CATALOG_COLUMNS = ['NOMBRE', 'TIPO', 'RUTA', 'DATASET', 'SRSCODE', 'ID_TABLA', 'DEFINICION']
+
+# Columnas de get_feature_attributes, equivalentes a arcpy.Describe + arcpy.ListFields
+SCHEMA_COLUMNS = ['NOMBRE', 'ALIAS', 'TIPO_GEOMETRIA', 'TIPO_FEATURE', 'NOMBRE_ATRIBUTO', 'ALIAS_ATRIBUTO',
+                  'TIPO_ATRIBUTO', 'TAMANO_ATRIBUTO', 'DOMINIO', 'OBLIGACION']
+# Campos administrados por la gdb que no se validan
+SCHEMA_EXCLUDED_FIELDS = ['OBJECTID', 'SHAPE', 'SHAPE_Length', 'SHAPE_Area']
+
+schema_workers = int(os.getenv('VALW_SCHEMA_WORKERS', '8'))
+
+_AUTHORITY = re.compile(r'AUTHORITY\["EPSG",(\d+)\]')
+_XSI_TYPE = '{http://www.w3.org/2001/XMLSchema-instance}type'
+
+
+class Domain(NamedTuple):
+    """
+    Dominio de atributo de la gdb.
+
+    Args:
+        name str: nombre del dominio.
+        type str: CODED_VALUE_DOMAIN o RANGE_DOMAIN.
+        field_type str: tipo de campo declarado, p. ej. esriFieldTypeString.
+        codes Tuple: códigos válidos de un dominio de valores codificados.
+        minimum, maximum: límites (incluidos) de un dominio de rango.
+    """
+    name: str
+    type: str
+    field_type: str
+    codes: Tuple[Any, ...] = ()
+    minimum: Any = None
+    maximum: Any = None
+
+
+def read_catalog(gdb) -> pd.DataFrame:
+    """
+    Lee en una sola pasada el catálogo de la gdb.
+
+    Args:
+        gdb: ruta de la carpeta .gdb o del .gdb.zip, o un workspace abierto con open_workspace.
+            Del zip solo se leen las tres tablas del sistema.
+    Returns:
+        pd.DataFrame: un registro por ítem con las columnas de CATALOG_COLUMNS. SRSCODE es el
+            código GCS (equivalente a spatialReference.GCSCode de arcpy) para datasets y
+            feature classes, ID_TABLA el número del archivo aXXXXXXXX.gdbtable.
+    """
+    if isinstance(gdb, str):
+        with open_workspace(gdb) as workspace:
+            return read_catalog(workspace)
+    with GdbTable.open(gdb, SYSTEM_CATALOG_ID, 'GDB_SystemCatalog') as system_catalog:
+        tables = {row['Name'].upper(): row['ID'] for row in system_catalog.rows(['Name'])}
+    with GdbTable.open(gdb, ITEM_TYPES_ID, 'GDB_ItemTypes') as types_table:
+        types_by_uuid = {row['UUID']: row['Name'] for row in types_table.rows(['UUID', 'Name'])}
+    with GdbTable.open(gdb, ITEMS_ID, 'GDB_Items') as items:
+        item_rows = list(items.rows(['Type', 'Name', 'Path', 'Definition']))
+
+    records = []
+    for row in item_rows:
+        name = row['Name']
+        if not name:
+            continue
+        path = row['Path'] or ''
+        parts = [part for part in path.split('\\') if part]
+        dataset = parts[0] if len(parts) > 1 else None
+        definition = row['Definition']
+        records.append([
+            name,
+            types_by_uuid.get(row['Type']),
+            path,
+            dataset,
+            _gcs_code(definition),
+            tables.get(name.upper()),
+            definition,
+        ])
+    catalog = pd.DataFrame(records, columns=CATALOG_COLUMNS)
+    catalog['SRSCODE'] = catalog['SRSCODE'].astype('Int64')
+    catalog['ID_TABLA'] = catalog['ID_TABLA'].astype('Int64')
+    return catalog
+
+
+def _gcs_code(definition: Optional[str]) -> Optional[int]:
+    """
+    Código GCS de la referencia espacial declarada en la definición XML del ítem.
+    """
+    if not definition or '<SpatialReference' not in definition:
+        return None
+    spatial_reference = ET.fromstring(definition).find('SpatialReference')
+    if spatial_reference is None:
+        return None
+    if spatial_reference.get('{http://www.w3.org/2001/XMLSchema-instance}type') == 'typens:GeographicCoordinateSystem':
+        wkid = spatial_reference.findtext('WKID') or spatial_reference.findtext('LatestWKID')
+        if wkid:
+            return int(wkid)
+    geogcs = _geogcs(spatial_reference.findtext('WKT') or '')
+    if not geogcs:
+        return 0
+    authority = _AUTHORITY.search(geogcs)
+    if authority:
+        return int(authority.group(1))
+    return GCS_CODES.get(geogcs[len('GEOGCS["'):].split('"')[0], 0)
+
+
+def _geogcs(wkt: str) -> str:
+    """
+    Extrae el bloque GEOGCS[...] de un WKT respetando los corchetes anidados.
+    """
+    start = wkt.find('GEOGCS[')
+    if start < 0:
+        return ''
+    depth = 0
+    for pos in range(start + len('GEOGCS'), len(wkt)):
+        if wkt[pos] == '[':
+            depth += 1
+        elif wkt[pos] == ']':
+            depth -= 1
+            if depth == 0:
+                return wkt[start:pos + 1]
+    return ''
+
+
+def item_types(catalog: pd.DataFrame, tipo: str) -> pd.DataFrame:
+    """
+    Filtra el catálogo por tipo de ítem.
+    """
+    return catalog[catalog['TIPO'] == tipo]
+
+
+def table_ids(catalog: pd.DataFrame) -> Dict[str, int]:
+    """
+    Número de tabla física de cada feature class o tabla del catálogo.
+    """
+    objects = catalog[catalog['TIPO'].isin([FEATURE_CLASS, TABLE]) & catalog['ID_TABLA'].notna()]
+    return dict(zip(objects['NOMBRE'], objects['ID_TABLA'].astype(int)))
+
+
+def read_domains(catalog: pd.DataFrame) -> Dict[str, Domain]:
+    """
+    Dominios de valores codificados y de rango de la gdb, leídos de su definición XML en GDB_Items.
+
+    Args:
+        catalog pd.DataFrame: catálogo de read_catalog.
+    Returns:
+        Dict[str, Domain]: dominio por nombre.
+    """
+    items = catalog[catalog['TIPO'].isin([CODED_VALUE_DOMAIN, RANGE_DOMAIN]) & catalog['DEFINICION'].notna()]
+    domains = {}
+    for name, tipo, definition in zip(items['NOMBRE'], items['TIPO'], items['DEFINICION']):
+        root = ET.fromstring(definition)
+        field_type = root.findtext('FieldType') or ''
+        if tipo == CODED_VALUE_DOMAIN:
+            codes = tuple(_xml_value(code) for code in root.iter('Code'))
+            domains[name] = Domain(name, tipo, field_type, codes=codes)
+        else:
+            domains[name] = Domain(name, tipo, field_type, minimum=_xml_value(root.find('MinValue')),
+                                   maximum=_xml_value(root.find('MaxValue')))
+    return domains
+
+
+def domain_fields(catalog: pd.DataFrame) -> Dict[str, Dict[str, str]]:
+    """
+    Campos con dominio de cada feature class, según su definición XML.
+
+    Returns:
+        Dict[str, Dict[str, str]]: {feature class: {campo: dominio}}, solo las que tienen alguno.
+    """
+    features = item_types(catalog, FEATURE_CLASS)
+    fields = {}
+    for name, definition in zip(features['NOMBRE'], features['DEFINICION']):
+        if not definition or '<DomainName>' not in definition:
+            continue
+        root = ET.fromstring(definition)
+        domains = {info.findtext('Name'): info.findtext('DomainName') for info in root.iter('GPFieldInfoEx')}
+        domains = {field: domain for field, domain in domains.items() if domain}
+        if domains:
+            fields[name] = domains
+    return fields
+
+
+def _xml_value(element: Optional[ET.Element]) -> Any:
+    """
+    Valor de un <Code>, <MinValue> o <MaxValue> según su xsi:type.
+    """
+    if element is None or element.text is None:
+        return None
+    kind = element.get(_XSI_TYPE, 'xs:string')
+    text = element.text
+    if kind in ('xs:short', 'xs:int', 'xs:long'):
+        return int(text)
+    if kind in ('xs:double', 'xs:float'):
+        return float(text)
+    if kind == 'xs:dateTime':
+        timestamp = pd.Timestamp(text)
+        return (timestamp.tz_convert(None) if timestamp.tzinfo else timestamp).to_datetime64()
+    return text
+
+
+def read_feature_schema(gdb, catalog: pd.DataFrame, names: Iterable[str],
+                        workers: Optional[int] = None) -> pd.DataFrame:
+    """
+    Esquema de las feature classes `names`: un registro por campo, sin arcpy.
+
+    Alias, tipo de geometría, tipo de feature, dominio y obligatoriedad salen de la definición
+    XML ya leída en el catálogo; nombre, alias, tipo y longitud de cada campo de la cabecera del
+    .gdbtable, de la que solo se leen los primeros bytes. Las cabeceras se leen en paralelo
+    (la gdb suele estar en una unidad de red) y el DataFrame se arma una sola vez.
+
+    Args:
+        gdb: workspace abierto con open_workspace.
+        catalog pd.DataFrame: catálogo de read_catalog.
+        names Iterable[str]: feature classes a describir; las que no están en la gdb se ignoran.
+        workers int: hilos de lectura, por defecto VALW_SCHEMA_WORKERS.
+    Returns:
+        pd.DataFrame: columnas de SCHEMA_COLUMNS.
+    """
+    features = item_types(catalog, FEATURE_CLASS)
+    features = features[features['NOMBRE'].isin(set(names)) & features['ID_TABLA'].notna()]
+    items = list(zip(features['NOMBRE'], features['ID_TABLA'].astype(int), features['DEFINICION']))
+    if not items:
+        return pd.DataFrame(columns=SCHEMA_COLUMNS)
+
+    def describe(item: Tuple[str, int, str]) -> List[tuple]:
+        return _feature_schema(gdb, *item)
+
+    with ThreadPoolExecutor(max_workers=min(workers or schema_workers, len(items))) as executor:
+        records = [record for records in executor.map(describe, items) for record in records]
+    return pd.DataFrame.from_records(records, columns=SCHEMA_COLUMNS)
+
+
+def _feature_schema(gdb, name: str, table_id: int, definition: str) -> List[tuple]:
+    """
+    Registros de SCHEMA_COLUMNS de una feature class.
+    """
+    fields, geometry_type = read_fields(gdb, table_id, name)
+    root = ET.fromstring(definition) if definition else ET.Element('DEFeatureClassInfo')
+    field_info = {info.findtext('Name'): info for info in root.iter('GPFieldInfoEx')}
+    alias = root.findtext('AliasName') or name
+    shape_type = _strip_prefix(root.findtext('ShapeType'), 'esriGeometry') or GEOMETRY_TYPE_NAMES.get(geometry_type)
+    feature_type = _strip_prefix(root.findtext('FeatureType'), 'esriFT')
+
+    records = []
+    for field in fields:
+        if field.name in SCHEMA_EXCLUDED_FIELDS:
+            continue
+        info = field_info.get(field.name)
+        domain = info.findtext('DomainName') if info is not None else None
+        required = info is not None and info.findtext('Required') == 'true'
+        records.append((name, alias, shape_type, feature_type, field.name, field.alias or field.name,
+                        field.type_name, field.length, domain or 'N/A', required))
+    return records
+
+
+def _strip_prefix(value: Optional[str], prefix: str) -> Optional[str]:
+    if not value:
+        return None
+    return value[len(prefix):] if value.startswith(prefix) else value
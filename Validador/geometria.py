@@ -0,0 +1,189 @@
+"""
+Comparación de identidad entre polígonos, equivalente a ARE_IDENTICAL_TO de
+SelectLayerByLocation, sin herramientas de geoprocesamiento.
+
+Dos polígonos son idénticos si tienen los mismos anillos con los mismos vértices dentro de la
+tolerancia XY, sin importar el sentido de los anillos, el vértice inicial ni los vértices
+repetidos o colineales. Además de la respuesta se informa en qué difieren: distancia de
+Hausdorff entre los bordes y diferencia de área.
+"""
+import math
+import numpy as np
+
+from typing import List, NamedTuple, Optional, Tuple
+
+# Metros por grado en el ecuador, para expresar en metros las diferencias en coordenadas geográficas
+METROS_POR_GRADO = 111319.49079327357
+# Códigos GCS que se comparan sin transformación (MAGNA-SIRGAS y WGS 84 difieren en centímetros)
+GCS_EQUIVALENTES = {4326, 4686}
+TOLERANCIA_GEOGRAFICA = 8.983152841195214e-09
+
+_BLOQUE = 256
+
+
+class ComparacionGeometria(NamedTuple):
+    identicos: bool
+    motivo: str
+    hausdorff: float
+    area: float
+    area_referencia: float
+
+    @property
+    def delta_area(self) -> float:
+        return self.area - self.area_referencia
+
+
+def anillos_esri(esri_json: dict) -> Tuple[List[np.ndarray], Optional[int]]:
+    """
+    Anillos y WKID de un FeatureSet o geometría en ESRI JSON (p. ej. el servicio WFS de la ANM).
+    """
+    features = esri_json.get('features')
+    geometrias = [feature.get('geometry') or {} for feature in features] if features is not None else [esri_json]
+    anillos = [np.asarray(anillo, dtype=float)[:, :2]
+               for geometria in geometrias for anillo in geometria.get('rings', []) if len(anillo)]
+    spatial_reference = esri_json.get('spatialReference') or next(
+        (geometria['spatialReference'] for geometria in geometrias if geometria.get('spatialReference')), {})
+    wkid = spatial_reference.get('latestWkid') or spatial_reference.get('wkid')
+    return anillos, int(wkid) if wkid else None
+
+
+def comparar_poligonos(anillos: List[np.ndarray], referencia: List[np.ndarray], tolerancia: float,
+                       geografico: bool = False) -> ComparacionGeometria:
+    """
+    Compara dos polígonos dados como listas de anillos (sentido Esri: exteriores en sentido
+    horario, huecos en sentido antihorario).
+
+    Descarta primero por extensión, cantidad de anillos y vértices y área; solo si pasan esas
+    pruebas compara los vértices normalizados. La distancia de Hausdorff y las áreas se expresan
+    en metros y hectáreas si `geografico`, en unidades del sistema de coordenadas si no.
+
+    Args:
+        anillos List[np.ndarray]: anillos del polígono a validar.
+        referencia List[np.ndarray]: anillos del polígono de referencia.
+        tolerancia float: tolerancia XY, en unidades de las coordenadas.
+        geografico bool: coordenadas en grados.
+    Returns:
+        ComparacionGeometria
+    """
+    anillos_a = [anillo for anillo in (_normalizar(anillo, tolerancia) for anillo in anillos) if len(anillo) >= 3]
+    anillos_b = [anillo for anillo in (_normalizar(anillo, tolerancia) for anillo in referencia) if len(anillo) >= 3]
+    motivo = _diferencia(anillos_a, anillos_b, anillos, referencia, tolerancia)
+
+    escala_x, escala_y, factor_area = 1.0, 1.0, 1.0
+    if geografico and (anillos or referencia):
+        latitud = float(np.mean(np.concatenate(anillos + referencia)[:, 1]))
+        escala_y = METROS_POR_GRADO
+        escala_x = METROS_POR_GRADO * math.cos(math.radians(latitud))
+        factor_area = escala_x * escala_y / 10000.0
+    escala = np.array([escala_x, escala_y])
+    return ComparacionGeometria(
+        identicos=motivo is None,
+        motivo=motivo or 'idénticos',
+        hausdorff=_hausdorff([anillo * escala for anillo in anillos], [anillo * escala for anillo in referencia]),
+        area=_area(anillos) * factor_area,
+        area_referencia=_area(referencia) * factor_area)
+
+
+def _diferencia(anillos_a: List[np.ndarray], anillos_b: List[np.ndarray],
+                originales_a: List[np.ndarray], originales_b: List[np.ndarray], tolerancia: float) -> Optional[str]:
+    """
+    Motivo por el que los polígonos no son idénticos, o None si lo son.
+    """
+    if not anillos_a or not anillos_b:
+        return 'geometría vacía'
+    if np.abs(_extension(anillos_a) - _extension(anillos_b)).max() > tolerancia:
+        return 'extensión diferente'
+    if len(anillos_a) != len(anillos_b):
+        return f'cantidad de anillos diferente ({len(anillos_a)} vs {len(anillos_b)})'
+    if sorted(map(len, anillos_a)) != sorted(map(len, anillos_b)):
+        return 'cantidad de vértices diferente'
+    perimetro = sum(_perimetro(anillo) for anillo in originales_a)
+    if abs(_area(originales_a) - _area(originales_b)) > 2 * perimetro * tolerancia:
+        return 'área diferente'
+
+    pendientes = list(anillos_b)
+    for anillo in anillos_a:
+        pareja = next((indice for indice, candidato in enumerate(pendientes)
+                       if _mismos_vertices(anillo, candidato, tolerancia)), None)
+        if pareja is None:
+            return 'vértices diferentes'
+        pendientes.pop(pareja)
+    return None
+
+
+def _normalizar(anillo: np.ndarray, tolerancia: float) -> np.ndarray:
+    """
+    Anillo abierto, sin vértices repetidos ni colineales, en sentido antihorario.
+    """
+    anillo = np.asarray(anillo, dtype=float)
+    if len(anillo) > 1 and np.abs(anillo[0] - anillo[-1]).max() <= tolerancia:
+        anillo = anillo[:-1]
+    siguiente = np.roll(anillo, -1, axis=0)
+    anillo = anillo[np.abs(siguiente - anillo).max(axis=1) > tolerancia]
+    while len(anillo) >= 3:
+        anterior, siguiente = np.roll(anillo, 1, axis=0), np.roll(anillo, -1, axis=0)
+        # Distancia de cada vértice a la recta entre sus vecinos
+        base = siguiente - anterior
+        cruz = np.abs(base[:, 0] * (anillo - anterior)[:, 1] - base[:, 1] * (anillo - anterior)[:, 0])
+        colineales = cruz <= tolerancia * np.maximum(np.hypot(base[:, 0], base[:, 1]), tolerancia)
+        if not colineales.any():
+            break
+        # Se quita uno de cada par de colineales contiguos para no borrar esquinas
+        colineales &= ~np.roll(colineales, 1)
+        anillo = anillo[~colineales]
+    if len(anillo) >= 3 and _area_con_signo(anillo) < 0:
+        anillo = anillo[::-1]
+    return anillo
+
+
+def _mismos_vertices(a: np.ndarray, b: np.ndarray, tolerancia: float) -> bool:
+    if len(a) != len(b):
+        return False
+    # Se rota b para que empiece en el vértice más cercano al inicio de a
+    inicio = int(np.argmin(np.abs(b - a[0]).max(axis=1)))
+    return np.abs(np.roll(b, -inicio, axis=0) - a).max() <= tolerancia
+
+
+def _extension(anillos: List[np.ndarray]) -> np.ndarray:
+    puntos = np.concatenate(anillos)
+    return np.concatenate([puntos.min(axis=0), puntos.max(axis=0)])
+
+
+def _area_con_signo(anillo: np.ndarray) -> float:
+    x, y = anillo[:, 0], anillo[:, 1]
+    return 0.5 * float(np.dot(x, np.roll(y, -1)) - np.dot(np.roll(x, -1), y))
+
+
+def _area(anillos: List[np.ndarray]) -> float:
+    # Exteriores en sentido horario (área negativa) y huecos en sentido antihorario
+    return abs(sum(-_area_con_signo(anillo) for anillo in anillos))
+
+
+def _perimetro(anillo: np.ndarray) -> float:
+    return float(np.hypot(*np.diff(anillo, axis=0).T).sum()) if len(anillo) > 1 else 0.0
+
+
+def _hausdorff(anillos_a: List[np.ndarray], anillos_b: List[np.ndarray]) -> float:
+    """
+    Distancia de Hausdorff entre los bordes, medida desde los vértices de cada borde a los
+    segmentos del otro.
+    """
+    if not anillos_a or not anillos_b:
+        return float('nan')
+    return max(_distancia_dirigida(anillos_a, anillos_b), _distancia_dirigida(anillos_b, anillos_a))
+
+
+def _distancia_dirigida(anillos_a: List[np.ndarray], anillos_b: List[np.ndarray]) -> float:
+    puntos = np.concatenate(anillos_a)
+    inicio = np.concatenate([anillo[:-1] for anillo in anillos_b if len(anillo) > 1] or [anillos_b[0]])
+    fin = np.concatenate([anillo[1:] for anillo in anillos_b if len(anillo) > 1] or [anillos_b[0]])
+    segmento = fin - inicio
+    largo = np.maximum((segmento ** 2).sum(axis=1), np.finfo(float).tiny)
+    maximo = 0.0
+    for desde in range(0, len(puntos), _BLOQUE):
+        bloque = puntos[desde:desde + _BLOQUE, None, :]
+        t = np.clip(((bloque - inicio) * segmento).sum(axis=2) / largo, 0.0, 1.0)
+        cercano = inicio + t[:, :, None] * segmento
+        distancia = np.sqrt(((bloque - cercano) ** 2).sum(axis=2)).min(axis=1)
+        maximo = max(maximo, float(distancia.max()))
+    return maximo
@@ -0,0 +1,161 @@
+"""
+Huellas de contenido para revalidar solo lo que cambió cuando una gdb se vuelve a cargar.
+
+Cada validador declara qué lee (ver Entradas): el catálogo de la gdb, el contenido de algunas
+tablas, la definición de campos de las feature classes, el contenido de las que tienen campos
+con dominio o el título de la ANM. Su huella combina
+las huellas de esas entradas con la del catálogo de la versión; si coincide con la de la carga
+anterior del mismo expediente, sus mensajes se reutilizan en lugar de volver a calcularlos.
+
+Las huellas de tablas no interpretan las filas: en un .gdb.zip son el CRC-32 y el tamaño de
+cada miembro (ya están en el directorio central del zip) y en una carpeta .gdb un BLAKE2b del
+archivo.
+"""
+import hashlib
+import json
+import pandas as pd
+
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+from Validador.filegdb import field_definitions, table_file_name
+from Validador.gdb_catalog import FEATURE_CLASS, domain_fields, table_ids
+
+CATALOGO = 'CATALOGO'
+TABLA = 'TABLA'
+CABECERA = 'CABECERA'
+VALIDADOR = 'VALIDADOR'
+
+# Columnas del catálogo que leen los validadores; ID_TABLA cambia al reexportar la gdb
+COLUMNAS_CATALOGO = ['NOMBRE', 'TIPO', 'RUTA', 'DATASET', 'SRSCODE', 'DEFINICION']
+
+
+class Entradas(NamedTuple):
+    """
+    Lo que lee un validador, además del catálogo de la gdb y el de la versión.
+
+    Args:
+        validador str: DESCRIPCION del validador en VALW_DOM_VALIDADORES.
+        contenido Tuple[str, ...]: tablas de la gdb cuyas filas lee.
+        cabeceras bool: lee la definición de campos de las feature classes.
+        dominios bool: lee las filas de las feature classes con campos con dominio.
+        geometrias bool: lee las geometrías de todas las feature classes.
+        expediente bool: lee COD_EXPEDIENTE de todas las feature classes y tablas.
+        titulo bool: lee el título del expediente en el servicio de la ANM.
+    """
+    validador: str
+    contenido: Tuple[str, ...] = ()
+    cabeceras: bool = False
+    dominios: bool = False
+    geometrias: bool = False
+    expediente: bool = False
+    titulo: bool = False
+
+
+def huella(*partes) -> str:
+    """
+    BLAKE2b de las partes como texto.
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    for parte in partes:
+        digest.update(str(parte).encode('utf-8'))
+        digest.update(b'\x1f')
+    return digest.hexdigest()
+
+
+def huella_df(df: pd.DataFrame) -> str:
+    """
+    Huella del contenido de un DataFrame, independiente del orden de las filas.
+    """
+    filas = pd.util.hash_pandas_object(df.astype(str), index=False).sort_values()
+    return huella(list(df.columns), hashlib.blake2b(filas.values.tobytes(), digest_size=16).hexdigest())
+
+
+def huella_catalogo(catalog: pd.DataFrame) -> str:
+    return huella_df(catalog[COLUMNAS_CATALOGO])
+
+
+def huella_tabla(gdb, ids: Dict[str, int], nombre: str) -> Optional[str]:
+    """
+    Huella del contenido de la tabla `nombre` (.gdbtable y .gdbtablx), None si no está en la gdb.
+
+    Args:
+        gdb: workspace abierto con open_workspace.
+        ids Dict[str, int]: número de tabla de cada nombre, ver table_ids.
+        nombre str: nombre de la tabla o feature class.
+    """
+    table_id = ids.get(nombre)
+    if table_id is None:
+        return None
+    base = table_file_name(table_id)
+    return huella(*(gdb.fingerprint(f'{base}.{extension}') if gdb.exists(f'{base}.{extension}') else ''
+                    for extension in ('gdbtable', 'gdbtablx')))
+
+
+def huella_cabecera(gdb, ids: Dict[str, int], nombre: str) -> Optional[str]:
+    """
+    Huella de la definición de campos de la tabla `nombre`, None si no está en la gdb.
+    """
+    table_id = ids.get(nombre)
+    if table_id is None:
+        return None
+    return hashlib.blake2b(field_definitions(gdb, table_id, nombre), digest_size=16).hexdigest()
+
+
+def huella_json(valor) -> str:
+    """
+    Huella de un valor JSON, p. ej. la respuesta del servicio de títulos.
+    """
+    return huella(json.dumps(valor, sort_keys=True, default=str))
+
+
+def huellas_gdb(gdb, catalog: pd.DataFrame, entradas: Dict[str, Entradas], comunes: Iterable,
+               titulo: Optional[str]) -> Tuple[List[Tuple[str, str, str]], Dict[str, Optional[str]]]:
+    """
+    Huellas de la gdb y de las entradas de cada validador.
+
+    Args:
+        gdb: workspace abierto con open_workspace.
+        catalog pd.DataFrame: catálogo de la gdb (read_catalog).
+        entradas Dict[str, Entradas]: entradas declaradas por cada validador.
+        comunes Iterable: partes que afectan a todos los validadores (versión, catálogo de la versión...).
+        titulo Optional[str]: huella del título de la ANM; None si no se pudo consultar.
+    Returns:
+        filas, validadores Tuple[List[Tuple[str, str, str]], Dict[str, Optional[str]]]: registros
+            (TIPO, OBJETO, HUELLA) a guardar y huella de cada validador; None para los que deben
+            ejecutarse siempre.
+    """
+    ids = table_ids(catalog)
+    catalogo = huella_catalogo(catalog)
+    con_dominio = (sorted(domain_fields(catalog)) if any(entrada.dominios for entrada in entradas.values())
+                   else [])
+    con_geometria = (sorted(catalog.loc[catalog['TIPO'] == FEATURE_CLASS, 'NOMBRE'])
+                     if any(entrada.geometrias for entrada in entradas.values()) else [])
+    con_expediente = sorted(ids) if any(entrada.expediente for entrada in entradas.values()) else []
+    contenido = {nombre: tuple(dict.fromkeys(entrada.contenido + (tuple(con_dominio) if entrada.dominios else ()) +
+                                             (tuple(con_geometria) if entrada.geometrias else ()) +
+                                             (tuple(con_expediente) if entrada.expediente else ())))
+                 for nombre, entrada in entradas.items()}
+    tablas = {nombre: huella_tabla(gdb, ids, nombre)
+              for nombre in dict.fromkeys(tabla for tablas in contenido.values() for tabla in tablas)}
+    cabeceras = {}
+    if any(entrada.cabeceras for entrada in entradas.values()):
+        nombres = catalog.loc[catalog['TIPO'] == FEATURE_CLASS, 'NOMBRE']
+        cabeceras = {nombre: huella_cabecera(gdb, ids, nombre) for nombre in sorted(nombres)}
+
+    comunes = list(comunes)
+    validadores = {}
+    for nombre, entrada in entradas.items():
+        if entrada.titulo and titulo is None:
+            validadores[nombre] = None
+            continue
+        validadores[nombre] = huella(
+            nombre, *comunes, catalogo,
+            *(f'{tabla}={tablas[tabla]}' for tabla in contenido[nombre]),
+            *(f'{fc}={cabeceras[fc]}' for fc in cabeceras if entrada.cabeceras),
+            titulo if entrada.titulo else '')
+
+    filas = [(CATALOGO, 'GDB_Items', catalogo)]
+    filas += [(TABLA, nombre, valor) for nombre, valor in tablas.items() if valor is not None]
+    filas += [(CABECERA, nombre, valor) for nombre, valor in cabeceras.items() if valor is not None]
+    filas += [(VALIDADOR, nombre, valor) for nombre, valor in validadores.items() if valor is not None]
+    return filas, validadores
@@ -0,0 +1,109 @@
+"""
+R-tree en memoria sobre envolventes, empaquetado con STR (Sort-Tile-Recursive).
+
+Las envolventes se cargan de una vez: se ordenan por x, se cortan en franjas de
+capacidad * sqrt(n / capacidad) elementos, cada franja se ordena por y y los grupos consecutivos
+de `capacidad` elementos forman los nodos del nivel siguiente, que se empaquetan igual hasta
+llegar a la raíz. Los nodos quedan llenos y con poco solapamiento, sin inserciones una por una.
+
+Las consultas se hacen por lotes y nivel por nivel sobre arreglos de pares (consulta, nodo), de
+modo que miles de consultas cuestan unas pocas operaciones de NumPy por nivel.
+"""
+import math
+import numpy as np
+
+from typing import List, Tuple
+
+# Pares (consulta, nodo) evaluados a la vez en intersectan
+_PARES_POR_LOTE = 1 << 20
+
+
+class ArbolR:
+    """
+    R-tree estático sobre las envolventes (xmin, ymin, xmax, ymax) de `envolventes`.
+
+    Args:
+        envolventes np.ndarray: arreglo n x 4.
+        capacidad int: hijos por nodo.
+    """
+
+    def __init__(self, envolventes: np.ndarray, capacidad: int = 16):
+        envolventes = np.asarray(envolventes, dtype=np.float64).reshape(-1, 4)
+        self.capacidad = capacidad
+        self.cantidad = len(envolventes)
+        # Por nivel, de las hojas a la raíz: envolventes de los nodos y rango de hijos en el nivel anterior
+        self._cajas: List[np.ndarray] = []
+        self._hijos: List[Tuple[np.ndarray, np.ndarray]] = []
+        self._ids = np.empty(0, dtype=np.int64)
+        if not self.cantidad:
+            return
+
+        orden = self._str(envolventes)
+        self._ids = orden
+        cajas = envolventes[orden]
+        self._cajas.append(cajas)
+        while len(cajas) > 1:
+            inicios = np.arange(0, len(cajas), capacidad)
+            padres = np.column_stack([
+                np.minimum.reduceat(cajas[:, 0], inicios), np.minimum.reduceat(cajas[:, 1], inicios),
+                np.maximum.reduceat(cajas[:, 2], inicios), np.maximum.reduceat(cajas[:, 3], inicios)])
+            fines = np.minimum(inicios + capacidad, len(cajas))
+            orden = self._str(padres)
+            cajas = padres[orden]
+            self._cajas.append(cajas)
+            self._hijos.append((inicios[orden], fines[orden]))
+
+    def _str(self, cajas: np.ndarray) -> np.ndarray:
+        """
+        Orden STR de las cajas: franjas por el centro en x y, dentro de cada franja, por el centro en y.
+        """
+        n = len(cajas)
+        por_franja = self.capacidad * math.ceil(math.sqrt(math.ceil(n / self.capacidad)))
+        cx = cajas[:, 0] + cajas[:, 2]
+        cy = cajas[:, 1] + cajas[:, 3]
+        franja = np.empty(n, dtype=np.int64)
+        franja[np.argsort(cx, kind='stable')] = np.arange(n) // por_franja
+        return np.lexsort((cy, franja))
+
+    def intersectan(self, consultas: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Pares de consulta y elemento cuyas envolventes se tocan (bordes incluidos).
+
+        Args:
+            consultas np.ndarray: envolventes m x 4 (xmin, ymin, xmax, ymax).
+        Returns:
+            consulta, elemento Tuple[np.ndarray, np.ndarray]: índices alineados en `consultas` y
+                en las envolventes del árbol.
+        """
+        consultas = np.asarray(consultas, dtype=np.float64).reshape(-1, 4)
+        vacio = np.empty(0, dtype=np.int64)
+        if not self.cantidad or not len(consultas):
+            return vacio, vacio
+        resultados = []
+        # Las consultas se reparten en lotes para acotar los pares en memoria en cada nivel
+        por_lote = max(1, _PARES_POR_LOTE // max(len(self._cajas[-1]) * self.capacidad, 1))
+        for desde in range(0, len(consultas), por_lote):
+            resultados.append(self._intersectan(consultas, np.arange(desde, min(desde + por_lote, len(consultas)))))
+        return (np.concatenate([consulta for consulta, _ in resultados]),
+                np.concatenate([elemento for _, elemento in resultados]))
+
+    def _intersectan(self, consultas: np.ndarray, lote: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        raiz = len(self._cajas) - 1
+        q = np.repeat(lote, len(self._cajas[raiz]))
+        nodo = np.tile(np.arange(len(self._cajas[raiz])), len(lote))
+        for nivel in range(raiz, -1, -1):
+            cajas = self._cajas[nivel][nodo]
+            caja = consultas[q]
+            tocan = ((cajas[:, 0] <= caja[:, 2]) & (caja[:, 0] <= cajas[:, 2]) &
+                     (cajas[:, 1] <= caja[:, 3]) & (caja[:, 1] <= cajas[:, 3]))
+            q, nodo = q[tocan], nodo[tocan]
+            if nivel == 0 or not len(q):
+                break
+            inicios, fines = self._hijos[nivel - 1]
+            cantidades = fines[nodo] - inicios[nodo]
+            q = np.repeat(q, cantidades)
+            primeros = np.repeat(inicios[nodo] - np.cumsum(cantidades) + cantidades, cantidades)
+            nodo = primeros + np.arange(len(q))
+        if not len(q):
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+        return q, self._ids[nodo]
@@ -0,0 +1,268 @@
+"""
+Tiempos y contadores por etapa de la validación.
+
+Cada cargador y validador corre dentro de un tramo (ver tramo) que mide su duración, el tiempo y
+las filas de las consultas a la base de datos, los bytes leídos de la gdb y los registros que
+produce. Los tramos se etiquetan con el ID de la gdb y el expediente (ver gdb) y se acumulan por
+etapa en el proceso; al terminar cada gdb se escriben en formato de texto de Prometheus en
+VALW_METRICAS_ARCHIVO (para el textfile collector de node_exporter) y, con VALW_METRICAS_BD=1,
+en la tabla VALW_GDB_TIEMPOS.
+
+Con VALW_METRICAS=0 (por defecto) tramo, gdb y consulta_bd devuelven un objeto vacío y sumar
+retorna de inmediato, de modo que la instrumentación no cuesta más que una llamada.
+"""
+import contextvars
+import os
+import tempfile
+import threading
+import time
+
+from typing import Dict, List, Optional, Tuple
+
+activas = os.getenv('VALW_METRICAS', '0') == '1'
+# Archivo .prom; {pid} se reemplaza por el ID del proceso para que cada proceso del pool escriba el suyo
+archivo_metricas = os.getenv('VALW_METRICAS_ARCHIVO')
+metricas_bd = os.getenv('VALW_METRICAS_BD', '0') == '1'
+
+# Límites superiores (segundos) del histograma de duración de las etapas
+BUCKETS = (0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 300.0)
+CONTADORES = ('bd_segundos', 'bd_consultas', 'bd_filas', 'bytes_gdb', 'registros')
+
+_tramo_actual: contextvars.ContextVar = contextvars.ContextVar('valw_tramo', default=None)
+_gdb_actual: contextvars.ContextVar = contextvars.ContextVar('valw_gdb', default=None)
+
+
+class Tramo:
+    """
+    Duración y contadores de una etapa. Las consultas y lecturas hechas mientras el tramo está
+    activo (también en otros hilos si se propaga el contexto, ver GrafoTareas) se suman a él.
+    """
+    __slots__ = ('etapa', 'id_gdb', 'expediente', 'segundos', 'valores', '_inicio', '_token')
+
+    def __init__(self, etapa: str):
+        self.etapa = etapa
+        registro = _gdb_actual.get()
+        self.id_gdb = registro.id_gdb if registro is not None else None
+        self.expediente = registro.expediente if registro is not None else None
+        self.segundos = 0.0
+        self.valores = dict.fromkeys(CONTADORES, 0)
+
+    def __enter__(self) -> 'Tramo':
+        self._token = _tramo_actual.set(self)
+        self._inicio = time.perf_counter()
+        return self
+
+    def __exit__(self, *args) -> bool:
+        self.segundos = time.perf_counter() - self._inicio
+        _tramo_actual.reset(self._token)
+        _registro.agregar(self)
+        registro = _gdb_actual.get()
+        if registro is not None:
+            registro.tramos.append(self)
+        return False
+
+    def contar(self, **valores) -> None:
+        for nombre, valor in valores.items():
+            self.valores[nombre] += valor
+
+
+class RegistroGdb:
+    """
+    Tramos de la validación de una gdb. Al cerrar se exportan las métricas del proceso.
+    """
+
+    def __init__(self, id_gdb: int, expediente: str):
+        self.id_gdb = id_gdb
+        self.expediente = expediente
+        self.tramos: List[Tramo] = []
+
+    def __enter__(self) -> 'RegistroGdb':
+        self._token = _gdb_actual.set(self)
+        return self
+
+    def __exit__(self, *args) -> bool:
+        _gdb_actual.reset(self._token)
+        _registro.ultima_gdb(self)
+        if archivo_metricas:
+            exportar(archivo_metricas)
+        return False
+
+
+class _Nulo:
+    """
+    Tramo, registro y consulta vacíos cuando las métricas están desactivadas.
+    """
+    __slots__ = ()
+    tramos = ()
+
+    def __enter__(self) -> '_Nulo':
+        return self
+
+    def __exit__(self, *args) -> bool:
+        return False
+
+    def contar(self, **valores) -> None:
+        pass
+
+
+_NULO = _Nulo()
+
+
+class _ConsultaBd:
+    """
+    Mide una consulta y la suma al tramo activo; las filas se informan con contar(filas=...).
+    """
+    __slots__ = ('_inicio', '_filas')
+
+    def __enter__(self) -> '_ConsultaBd':
+        self._filas = 0
+        self._inicio = time.perf_counter()
+        return self
+
+    def __exit__(self, *args) -> bool:
+        sumar(bd_segundos=time.perf_counter() - self._inicio, bd_consultas=1, bd_filas=self._filas)
+        return False
+
+    def contar(self, filas: int = 0) -> None:
+        self._filas += filas
+
+
+def tramo(etapa: str):
+    """
+    Mide la etapa `etapa`:
+
+        with metricas.tramo('catalogo_gdb') as tramo:
+            catalog = read_catalog(workspace)
+            tramo.contar(registros=len(catalog))
+    """
+    if not activas:
+        return _NULO
+    return Tramo(etapa)
+
+
+def gdb(id_gdb: int, expediente: str):
+    """
+    Etiqueta con la gdb y el expediente los tramos medidos dentro del bloque.
+    """
+    if not activas:
+        return _NULO
+    return RegistroGdb(id_gdb, expediente)
+
+
+def consulta_bd():
+    """
+    Mide una consulta a la base de datos dentro del tramo activo.
+    """
+    if not activas:
+        return _NULO
+    return _ConsultaBd()
+
+
+def sumar(**valores) -> None:
+    """
+    Suma contadores (p. ej. bytes_gdb) al tramo activo, si lo hay.
+    """
+    if not activas:
+        return
+    actual = _tramo_actual.get()
+    if actual is not None:
+        actual.contar(**valores)
+
+
+def contexto() -> Optional[contextvars.Context]:
+    """
+    Copia del contexto para ejecutar tareas en otros hilos dentro del tramo actual; None si las
+    métricas están desactivadas.
+    """
+    return contextvars.copy_context() if activas else None
+
+
+class _Acumulado:
+    """
+    Métricas del proceso por etapa, para la exportación a Prometheus.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.ejecuciones: Dict[str, int] = {}
+        self.segundos: Dict[str, float] = {}
+        self.buckets: Dict[str, List[int]] = {}
+        self.valores: Dict[str, Dict[str, float]] = {}
+        self.ultima: List[Tuple[str, int, str, float]] = []
+
+    def agregar(self, tramo: Tramo) -> None:
+        with self._lock:
+            etapa = tramo.etapa
+            self.ejecuciones[etapa] = self.ejecuciones.get(etapa, 0) + 1
+            self.segundos[etapa] = self.segundos.get(etapa, 0.0) + tramo.segundos
+            buckets = self.buckets.setdefault(etapa, [0] * len(BUCKETS))
+            for i, limite in enumerate(BUCKETS):
+                if tramo.segundos <= limite:
+                    buckets[i] += 1
+            valores = self.valores.setdefault(etapa, dict.fromkeys(CONTADORES, 0))
+            for nombre, valor in tramo.valores.items():
+                valores[nombre] += valor
+
+    def ultima_gdb(self, registro: RegistroGdb) -> None:
+        with self._lock:
+            self.ultima = [(tramo.etapa, registro.id_gdb, registro.expediente, tramo.segundos)
+                           for tramo in registro.tramos]
+
+    def texto(self) -> str:
+        with self._lock:
+            lineas = [
+                '# HELP valw_etapa_segundos Duración de las etapas de la validación.',
+                '# TYPE valw_etapa_segundos histogram',
+            ]
+            for etapa in sorted(self.ejecuciones):
+                for limite, cantidad in zip(BUCKETS, self.buckets[etapa]):
+                    lineas.append(f'valw_etapa_segundos_bucket{{etapa="{_escapar(etapa)}",le="{limite}"}} {cantidad}')
+                lineas.append(f'valw_etapa_segundos_bucket{{etapa="{_escapar(etapa)}",le="+Inf"}} {self.ejecuciones[etapa]}')
+                lineas.append(f'valw_etapa_segundos_sum{{etapa="{_escapar(etapa)}"}} {self.segundos[etapa]}')
+                lineas.append(f'valw_etapa_segundos_count{{etapa="{_escapar(etapa)}"}} {self.ejecuciones[etapa]}')
+            ayudas = {
+                'bd_segundos': 'Tiempo en consultas a la base de datos.',
+                'bd_consultas': 'Consultas a la base de datos.',
+                'bd_filas': 'Filas leídas o escritas en la base de datos.',
+                'bytes_gdb': 'Bytes leídos de la gdb.',
+                'registros': 'Registros producidos (mensajes en los validadores).',
+            }
+            for nombre, ayuda in ayudas.items():
+                lineas.append(f'# HELP valw_etapa_{nombre}_total {ayuda}')
+                lineas.append(f'# TYPE valw_etapa_{nombre}_total counter')
+                for etapa in sorted(self.valores):
+                    lineas.append(f'valw_etapa_{nombre}_total{{etapa="{_escapar(etapa)}"}} {self.valores[etapa][nombre]}')
+            lineas.append('# HELP valw_ultima_gdb_segundos Duración de las etapas de la última gdb validada.')
+            lineas.append('# TYPE valw_ultima_gdb_segundos gauge')
+            for etapa, id_gdb, expediente, segundos in self.ultima:
+                lineas.append(f'valw_ultima_gdb_segundos{{etapa="{_escapar(etapa)}",gdb_id="{id_gdb}",'
+                              f'expediente="{_escapar(expediente)}"}} {segundos}')
+            return '\n'.join(lineas) + '\n'
+
+
+_registro = _Acumulado()
+
+
+def exportar(archivo: str) -> None:
+    """
+    Escribe las métricas del proceso en formato de texto de Prometheus, reemplazando el archivo
+    de forma atómica para que el collector nunca lea uno a medias.
+    """
+    archivo = archivo.replace('{pid}', str(os.getpid()))
+    directorio = os.path.dirname(os.path.abspath(archivo))
+    os.makedirs(directorio, exist_ok=True)
+    descriptor, temporal = tempfile.mkstemp(dir=directorio, suffix='.tmp')
+    with os.fdopen(descriptor, 'w', encoding='utf-8') as salida:
+        salida.write(_registro.texto())
+    os.replace(temporal, archivo)
+
+
+def texto_prometheus() -> str:
+    """
+    Métricas acumuladas del proceso en formato de texto de Prometheus.
+    """
+    return _registro.texto()
+
+
+def _escapar(valor) -> str:
+    return str(valor).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
@@ -0,0 +1,295 @@
+import os
+import re
+import pandas as pd
+import requests
+
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Set, Tuple
+
+from Validador.validator_web import (get_catalog, get_feature_attributes, quantity_dataset,
+                                    quantity_feature_class, quantity_tables, reference_system,
+                                    spatial_matching, quantity_required, feature_attributes,
+                                    domain_values, geometry_validity, expedient_code,
+                                    feature_containment, ids_validadores)
+from Validador.version_info import (get_version_datasets, get_version_feature_classes, get_version_tables,
+                                    get_version_required, get_version_attributes)
+from Validador.filegdb import open_workspace
+from Validador import metricas
+from Validador.gdb_catalog import read_catalog
+from Validador.huellas import Entradas, huella, huella_df, huella_json, huellas_gdb
+from Validador.tareas import GrafoTareas, Resultado
+from Validador.titulos_anm import proveedor_titulos
+from Validador.version_cache import clave, en_cache, firma_version
+from database.cola import finalizar
+from database.huellas import guardar_huellas, huellas_validadores
+from database.mensajes import EscritorMensajes, borrar_mensajes, copiar_mensajes
+from database.tiempos import guardar_tiempos
+from database.gdb_path_to_validate import update_estado
+from utils.arcgis import arcpy
+from utils.utils import valw_dom_validadores
+
+# Revalidar solo los validadores cuyas entradas cambiaron (ver validar_gdb)
+revalidacion_incremental = os.getenv('VALW_INCREMENTAL', '1') != '0'
+
+# Tareas de validar_gdb cuyos mensajes se guardan, en este orden, con lo que lee cada una
+ENTRADAS = {
+    'espacial': Entradas('ESPACIAL', contenido=('DELIMIT_PROYEC_PG',), geometrias=True, titulo=True),
+    'srs': Entradas(valw_dom_validadores.srs),
+    'datasets': Entradas(valw_dom_validadores.datasets),
+    'feature_classes': Entradas(valw_dom_validadores.features),
+    'tablas': Entradas(valw_dom_validadores.tables),
+    'obligatorios': Entradas('OBLIGATORIEDAD'),
+    'atributos': Entradas(valw_dom_validadores.attibutes, cabeceras=True, dominios=True,
+                          geometrias=True, expediente=True),
+}
+VALIDADORES = list(ENTRADAS)
+
+
+class CatalogoVersion(NamedTuple):
+    """
+    Información de referencia del MDG contra la que se valida cada gdb.
+    """
+    datasets: pd.DataFrame
+    feature_classes: pd.DataFrame
+    tablas: pd.DataFrame
+    obligatorios: List[str]
+    atributos: pd.DataFrame
+
+
+def cargar_catalogo_version(connection, documento_tecnico: str, etapa: str, version: str,
+                            usar_cache: bool = True) -> CatalogoVersion:
+    """
+    Obtiene el catálogo de la versión del MDG, de la caché en disco si sigue vigente.
+
+    Args:
+        connection: capa de acceso a datos (BaseDatos).
+        documento_tecnico str: documento técnico de la tabla de obligatoriedad.
+        etapa str: etapa de la tabla de obligatoriedad.
+        version str: versión del MDG, clave de la caché.
+        usar_cache bool: False para consultar siempre la base de datos.
+    Returns:
+        CatalogoVersion
+    """
+    def consultar_version():
+        grafo = GrafoTareas('version')
+        grafo.agregar('datasets', get_version_datasets, connection)
+        grafo.agregar('feature_classes', get_version_feature_classes, connection)
+        grafo.agregar('tablas', get_version_tables, connection)
+        grafo.agregar('atributos', get_version_attributes, connection)
+        return tuple(grafo.ejecutar().values())
+
+    def consultar_obligatorios():
+        return get_version_required(connection, documento_tecnico, etapa)
+
+    if not usar_cache:
+        datasets, feature_classes, tablas, atributos = consultar_version()
+        obligatorios = consultar_obligatorios()
+    else:
+        firmas = {}
+
+        def firma():
+            if 'firma' not in firmas:
+                firmas['firma'] = firma_version(connection, version)
+            return firmas['firma']
+
+        datasets, feature_classes, tablas, atributos = en_cache(
+            clave('version', version), firma, consultar_version)
+        obligatorios = en_cache(
+            clave('obligatorios', version, documento_tecnico, etapa), firma, consultar_obligatorios)
+
+    return CatalogoVersion(
+        datasets=datasets,
+        feature_classes=feature_classes,
+        tablas=tablas,
+        obligatorios=obligatorios,
+        atributos=atributos)
+
+
+def expediente_de_ruta(ruta_gdb: str) -> str:
+    """
+    Código del expediente a partir del nombre de la gdb, p. ej. IDO-08061_20220307.gdb -> IDO-08061.
+    """
+    return re.split(r'[\\/]', ruta_gdb.rstrip('\\/'))[-1].split('_')[0]
+
+
+def huella_catalogo_version(catalogo: CatalogoVersion) -> str:
+    """
+    Huella del contenido del catálogo de la versión, incluida la obligatoriedad del documento y etapa.
+    """
+    return huella(huella_df(catalogo.datasets), huella_df(catalogo.feature_classes), huella_df(catalogo.tablas),
+                  huella_df(catalogo.atributos), sorted(catalogo.obligatorios))
+
+
+def validacion_anterior(connection, id_bd_gdb: int, expediente: str) -> Tuple[Optional[int], Dict[str, str]]:
+    """
+    Carga anterior con la que comparar las huellas: la misma gdb si ya se validó o, si no, la
+    última carga validada del mismo expediente.
+
+    Returns:
+        id, huellas Tuple[Optional[int], Dict[str, str]]: ID de la gdb anterior (None si no hay) y
+            huella de cada validador.
+    """
+    df = huellas_validadores(connection, id_bd_gdb, expediente)
+    if df.empty:
+        return None, {}
+    df = df[(df['GDB_ID'] == id_bd_gdb) | (df['RUTA'].map(expediente_de_ruta) == expediente)]
+    if df.empty:
+        return None, {}
+    propias = df[df['GDB_ID'] == id_bd_gdb]
+    id_anterior = id_bd_gdb if not propias.empty else int(df['GDB_ID'].max())
+    anteriores = df[df['GDB_ID'] == id_anterior]
+    return id_anterior, dict(zip(anteriores['OBJETO'], anteriores['HUELLA']))
+
+
+def validar_gdb(connection, id_bd_gdb: int, ruta_gdb: str, expediente: str, version: str,
+                catalogo: CatalogoVersion, incremental: Optional[bool] = None, nodo: Optional[str] = None) -> None:
+    """
+    Ejecuta los validadores sobre una gdb y persiste sus mensajes en una sola transacción.
+
+    Los cargadores y validadores se declaran como un grafo de tareas (ver GrafoTareas): los que
+    no dependen entre sí corren en paralelo, de modo que el tiempo lo fija la rama más lenta
+    (p. ej. el servicio WFS de spatial_matching) y no la suma de todas. Los mensajes de cada
+    validador pasan al EscritorMensajes apenas termina, y sus lotes se insertan mientras corren
+    los demás; los validadores que recorren los registros de la gdb (contención, dominios,
+    geometrías y COD_EXPEDIENTE) entregan sus mensajes por lotes mientras leen, con a lo sumo
+    VALW_TAREAS_LOTES lotes en espera. La transacción se confirma al final.
+
+    Si la gdb o el expediente ya se validaron, solo se ejecutan los validadores cuyas entradas
+    (ver ENTRADAS) cambiaron; los mensajes de los demás se conservan o se copian de la carga
+    anterior.
+
+    Con VALW_METRICAS=1 cada etapa se mide como un tramo etiquetado con la gdb y el expediente
+    (ver Validador/metricas.py).
+
+    Args:
+        connection: capa de acceso a datos (BaseDatos).
+        id_bd_gdb int: identificador de la gdb en la tabla VALW_GDBS_VALIDAR.
+        ruta_gdb str: ruta de la carpeta .gdb o del .gdb.zip cargado, que se lee sin extraerlo.
+        expediente str: código del expediente.
+        version str: versión del MDG.
+        catalogo CatalogoVersion: catálogo de la versión ya cargado.
+        incremental bool: False para ejecutar todos los validadores; VALW_INCREMENTAL si es None.
+        nodo str: nodo de worker.py que tiene la gdb arrendada (ver database/cola.py). La gdb
+            pasa a 'Finalizado' en la transacción de los mensajes y solo si el arrendamiento
+            sigue a su nombre; si venció y la tomó otro nodo, se revierte y se lanza RuntimeError.
+    """
+    if incremental is None:
+        incremental = revalidacion_incremental
+    with metricas.gdb(id_bd_gdb, expediente) as registro:
+        with metricas.tramo('validar_gdb'):
+            _validar(connection, id_bd_gdb, ruta_gdb, expediente, version, catalogo, incremental, nodo)
+    if registro.tramos and metricas.metricas_bd:
+        guardar_tiempos(connection, id_bd_gdb, expediente, registro.tramos)
+
+
+def _validar(connection, id_bd_gdb: int, ruta_gdb: str, expediente: str, version: str,
+             catalogo: CatalogoVersion, incremental: bool, nodo: Optional[str]) -> None:
+    with open_workspace(ruta_gdb) as workspace:
+        with metricas.tramo('catalogo_gdb') as tramo:
+            catalog = read_catalog(workspace)
+            tramo.contar(registros=len(catalog))
+        with metricas.tramo('huellas'):
+            # El contenido del catálogo ya está en memoria: no se consulta la base de datos por cada gdb
+            filas, huellas = huellas_gdb(
+                workspace, catalog, ENTRADAS, [version, huella_catalogo_version(catalogo), expediente],
+                _huella_titulo(expediente))
+            id_anterior, anteriores = (validacion_anterior(connection, id_bd_gdb, expediente) if incremental
+                                       else (None, {}))
+        ejecutar = [nombre for nombre in VALIDADORES
+                    if huellas[nombre] is None or anteriores.get(nombre) != huellas[nombre]]
+        reutilizar = [nombre for nombre in VALIDADORES if nombre not in ejecutar]
+        if reutilizar:
+            arcpy.AddMessage(f'GDB {id_bd_gdb}: se reutilizan los mensajes de la gdb {id_anterior} '
+                             f'para {", ".join(reutilizar)}')
+        ids = ids_validadores(connection)
+
+        def preparar(conn) -> None:
+            if id_anterior == id_bd_gdb:
+                borrar_mensajes(conn, id_bd_gdb, [ids[ENTRADAS[nombre].validador] for nombre in ejecutar])
+            else:
+                borrar_mensajes(conn, id_bd_gdb)
+                if id_anterior is not None:
+                    copiar_mensajes(conn, id_anterior, id_bd_gdb,
+                                    [ids[ENTRADAS[nombre].validador] for nombre in reutilizar])
+
+        # Los mensajes de cada validador se escriben apenas termina o produce un lote, mientras los demás siguen
+        with EscritorMensajes(connection, id_bd_gdb, preparar=preparar) as sumidero:
+            def escribir(nombre: str, resultado) -> None:
+                if nombre in ENTRADAS:
+                    sumidero.agregar_df(resultado)
+
+            def escribir_lote(nombre: str, lote: pd.DataFrame) -> None:
+                sumidero.agregar_df(lote)
+
+            _ejecutar_validadores(connection, id_bd_gdb, expediente, version, catalogo,
+                                  workspace, catalog, set(ejecutar), escribir, escribir_lote)
+            with metricas.tramo('escritura_mensajes') as tramo:
+                sumidero.vaciar(final=True)
+                guardar_huellas(sumidero.conexion, id_bd_gdb, filas)
+                tramo.contar(registros=sumidero.total)
+            # Con el arrendamiento vencido otro nodo ya borró y está escribiendo los mensajes de la
+            # gdb: los de este nodo se revierten para no duplicarlos
+            if nodo is not None and not finalizar(sumidero.conexion, id_bd_gdb, nodo):
+                raise RuntimeError(f'La GDB {id_bd_gdb} ya no está arrendada a {nodo}; se descartan sus mensajes')
+
+    if nodo is None:
+        update_estado(connection, id=id_bd_gdb, estado='Finalizado')
+
+def _ejecutar_validadores(connection, id_bd_gdb: int, expediente: str, version: str, catalogo: CatalogoVersion,
+                          workspace, catalog: pd.DataFrame, ejecutar: Set[str],
+                          al_terminar: Optional[Callable[[str, Any], None]] = None,
+                          al_producir: Optional[Callable[[str, Any], None]] = None) -> Dict[str, pd.DataFrame]:
+    """
+    Ejecuta en un grafo de tareas los validadores `ejecutar` y solo los cargadores que necesitan;
+    `al_terminar` recibe la salida de cada tarea apenas termina y `al_producir` cada lote de
+    mensajes de las que producen lotes (ver GrafoTareas.ejecutar).
+    """
+    grafo = GrafoTareas('validacion')
+    # Get Feature Datasets, Feature Classes and Tables
+    listas = grafo.agregar('listas_gdb', get_catalog, catalog)
+    ds, fc, tbl = Resultado(listas.tarea, 0), Resultado(listas.tarea, 1), Resultado(listas.tarea, 2)
+
+    # Validator 1 - Spatial Matching
+    if 'espacial' in ejecutar:
+        grafo.agregar('espacial', spatial_matching, connection, id_bd_gdb, expediente, workspace, catalog)
+        # Every feature of every feature class inside DELIMIT_PROYEC_PG, R-tree over the envelopes (streamed)
+        grafo.agregar('contencion', feature_containment, connection, id_bd_gdb, workspace, catalog)
+    # Validator 2 - Reference System
+    if 'srs' in ejecutar:
+        grafo.agregar('srs', reference_system, version, connection, id_bd_gdb, catalogo.datasets, ds)
+    # Validator 3 - Quantity of datasets
+    if 'datasets' in ejecutar:
+        grafo.agregar('datasets', quantity_dataset, connection, id_bd_gdb, catalogo.datasets, ds)
+    # Validator 4 - Quantity of feature classes
+    if 'feature_classes' in ejecutar:
+        grafo.agregar('feature_classes', quantity_feature_class, connection, id_bd_gdb, catalogo.feature_classes, fc)
+    # Validator 5 - Quantity of tables
+    if 'tablas' in ejecutar:
+        grafo.agregar('tablas', quantity_tables, connection, id_bd_gdb, catalogo.tablas, tbl)
+    # Validator 6 - Required
+    if 'obligatorios' in ejecutar:
+        grafo.agregar('obligatorios', quantity_required, connection, id_bd_gdb, catalogo.obligatorios, fc)
+    # Validator 7 - Attributive
+    if 'atributos' in ejecutar:
+        # Get Feature Attributes
+        attributes = grafo.agregar('atributos_gdb', get_feature_attributes, workspace, catalog,
+                                   catalogo.feature_classes, fc)
+        # Validate domain (#k), whole columns per feature class (streamed)
+        grafo.agregar('dominios', domain_values, connection, id_bd_gdb, workspace, catalog, attributes)
+        # Validate geometry (#b), by OID ranges (streamed)
+        grafo.agregar('geometrias', geometry_validity, connection, id_bd_gdb, workspace, catalog, attributes)
+        # Validate COD_EXPEDIENTE (#d), only that column of every feature class and table (streamed)
+        grafo.agregar('cod_expediente', expedient_code, connection, id_bd_gdb, expediente, workspace, catalog)
+        grafo.agregar('atributos', feature_attributes, connection, id_bd_gdb, catalogo.atributos, attributes)
+
+    return grafo.ejecutar(al_terminar=al_terminar, al_producir=al_producir)
+
+
+def _huella_titulo(expediente: str) -> Optional[str]:
+    """
+    Huella del título del expediente en el servicio de la ANM (de la caché si está vigente); None
+    si no se puede consultar, en cuyo caso spatial_matching se ejecuta e informa el error.
+    """
+    try:
+        return huella_json(proveedor_titulos().titulo(expediente))
+    except (requests.RequestException, ValueError):
+        return None
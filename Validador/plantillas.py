@@ -0,0 +1,198 @@
+"""
+Catálogo de plantillas de los mensajes de VALW_GDB_MENSAJE.
+
+Los validadores no arman el texto de cada mensaje: emiten el ID de una plantilla y hasta
+PARAMETROS valores, y el texto se arma recién al leerlo, con texto_mensajes o con la vista
+VALW_GDB_MENSAJE_TEXTO (ver database/mensajes.py), que reemplazan {1}, {2}... por los
+parámetros. El texto que guarda MENSAJE_VAL es idéntico al que se guardaba antes.
+
+Las plantillas se copian a VALW_MENSAJE_PLANTILLA y los mensajes ya guardados dependen de su
+texto: nunca se cambia el texto de un ID existente, un mensaje con otra redacción es una
+plantilla nueva.
+"""
+import pandas as pd
+
+from typing import Dict, Optional, Sequence
+
+from utils.utils import valw_gdb_mensaje, valw_mensaje_plantilla
+
+PARAMETROS = len(valw_gdb_mensaje.parametro_columns)
+
+# Cantidad de datasets, feature classes y tablas (mensajes_comparacion)
+DATASET_FALTANTE = 1
+DATASET_SOBRANTE = 2
+DATASET_CORRECTO = 3
+FEATURE_CLASS_FALTANTE = 4
+FEATURE_CLASS_SOBRANTE = 5
+FEATURE_CLASS_CORRECTO = 6
+TABLA_FALTANTE = 7
+TABLA_SOBRANTE = 8
+TABLA_CORRECTA = 9
+# Sistema de referencia y obligatoriedad
+SRS_CORRECTO = 10
+SRS_INCORRECTO = 11
+OBLIGATORIO_CUMPLE = 12
+OBLIGATORIO_FALTANTE = 13
+# Atributos (feature_attributes y sus validadores)
+GEOMETRIA_TIPO = 14
+TOPOLOGIA = 15
+ATRIBUTO_FALTANTE = 16
+ATRIBUTO_SOBRANTE = 17
+ATRIBUTO_ALIAS = 18
+ATRIBUTO_TIPO = 19
+ATRIBUTO_LONGITUD = 20
+ATRIBUTO_DOMINIO = 21
+DOMINIO_CORRECTO = 22
+DOMINIO_FUERA = 23
+DOMINIO_INEXISTENTE = 24
+GEOMETRIA_VALIDA = 25
+GEOMETRIA_NULA = 26
+GEOMETRIA_VACIA = 27
+GEOMETRIA_POCOS_VERTICES = 28
+GEOMETRIA_ANILLO_ABIERTO = 29
+GEOMETRIA_VERTICES_DUPLICADOS = 30
+GEOMETRIA_AUTOINTERSECCION = 31
+GEOMETRIA_SIN_VERIFICAR = 32
+EXPEDIENTE_CORRECTO = 33
+EXPEDIENTE_ERRADO = 34
+EXPEDIENTE_ERRADO_PARCIAL = 35
+EXPEDIENTE_SIN_VERIFICAR = 36
+# Espacial
+DELIMITACION_COINCIDE = 37
+DELIMITACION_NO_COINCIDE = 38
+CONTENCION_DENTRO = 39
+CONTENCION_FUERA = 40
+CONTENCION_CURVAS = 41
+CONTENCION_FUERA_CURVAS = 42
+CONTENCION_SIN_VERIFICAR = 43
+DELIMITACION_SIN_VERIFICAR = 44
+
+PLANTILLAS: Dict[int, str] = {
+    DATASET_FALTANTE: 'Dataset del MDG faltante -> {1}',
+    DATASET_SOBRANTE: 'Dataset no incluido en el MDG -> {1}',
+    DATASET_CORRECTO: 'Dataset correcto -> {1}',
+    FEATURE_CLASS_FALTANTE: 'Feature class del MDG faltante -> {1}',
+    FEATURE_CLASS_SOBRANTE: 'Feature class no incluido en el MDG -> {1}',
+    FEATURE_CLASS_CORRECTO: 'Feature class correcto -> {1}',
+    TABLA_FALTANTE: 'Tabla o ficha del MDG faltante -> {1}',
+    TABLA_SOBRANTE: 'Tabla o ficha no incluido en el MDG -> {1}',
+    TABLA_CORRECTA: 'Tabla o ficha correcta -> {1}',
+    SRS_CORRECTO: 'Sistema de referencia correcto GCS MAGNA (EPSG: {1}) -> {2}',
+    SRS_INCORRECTO: 'Sistema de referencia, incorrecto el sistema debe ser GCS MAGNA (EPSG: {1}) -> {2}',
+    OBLIGATORIO_CUMPLE: 'Feature class cumple con la Tabla de Obligatoriedad -> {1}',
+    OBLIGATORIO_FALTANTE: 'Feature class obligatorio faltante según la Tabla de Obligatoriedad -> {1}',
+    GEOMETRIA_TIPO: 'Error tipo de geometría -> {1}',
+    TOPOLOGIA: 'Error topólogico -> {1}',
+    ATRIBUTO_FALTANTE: 'Error atributo faltante -> {1}.{2}',
+    ATRIBUTO_SOBRANTE: 'Error atributo no definido en el modelo -> {1}.{2}',
+    ATRIBUTO_ALIAS: 'Error alias del atributo (esperado {3}, encontrado {4}) -> {1}.{2}',
+    ATRIBUTO_TIPO: 'Error tipo del atributo (esperado {3}, encontrado {4}) -> {1}.{2}',
+    ATRIBUTO_LONGITUD: 'Error longitud del atributo (esperado {3}, encontrado {4}) -> {1}.{2}',
+    ATRIBUTO_DOMINIO: 'Error dominio del atributo (esperado {3}, encontrado {4}) -> {1}.{2}',
+    DOMINIO_CORRECTO: 'Valores dentro del dominio {3} -> {1}.{2}',
+    DOMINIO_FUERA: 'Valores fuera del dominio {3} ({4} de {5} registros, OBJECTID {6}) -> {1}.{2}',
+    DOMINIO_INEXISTENTE: 'Dominio {3} inexistente en la gdb -> {1}.{2}',
+    GEOMETRIA_VALIDA: 'Geometrías válidas -> {1}',
+    GEOMETRIA_NULA: 'Error de geometría: geometría nula ({2} de {3} registros, OBJECTID {4}) -> {1}',
+    GEOMETRIA_VACIA: 'Error de geometría: geometría vacía ({2} de {3} registros, OBJECTID {4}) -> {1}',
+    GEOMETRIA_POCOS_VERTICES:
+        'Error de geometría: parte con pocos vértices ({2} de {3} registros, OBJECTID {4}) -> {1}',
+    GEOMETRIA_ANILLO_ABIERTO: 'Error de geometría: anillo sin cerrar ({2} de {3} registros, OBJECTID {4}) -> {1}',
+    GEOMETRIA_VERTICES_DUPLICADOS:
+        'Error de geometría: vértices duplicados ({2} de {3} registros, OBJECTID {4}) -> {1}',
+    GEOMETRIA_AUTOINTERSECCION:
+        'Error de geometría: autointersección ({2} de {3} registros, OBJECTID {4}) -> {1}',
+    GEOMETRIA_SIN_VERIFICAR:
+        'Error de geometría: tipo de geometría sin verificar ({2} de {3} registros, OBJECTID {4}) -> {1}',
+    EXPEDIENTE_CORRECTO: 'COD_EXPEDIENTE igual al expediente {2} -> {1}',
+    EXPEDIENTE_ERRADO: 'Error COD_EXPEDIENTE diferente al expediente {2} ({3} de {4} registros, valores {5}) -> {1}',
+    EXPEDIENTE_ERRADO_PARCIAL:
+        'Error COD_EXPEDIENTE diferente al expediente {2} ({3} de {4} registros leídos, valores {5}) -> {1}',
+    EXPEDIENTE_SIN_VERIFICAR:
+        'COD_EXPEDIENTE sin verificar, se superó el límite de {6} registros con error -> {1}',
+    DELIMITACION_COINCIDE: 'La delimitación del título minero coincide con el polígono estructurado en AnnA '
+                           'Minería -> DELIMIT_PROYEC_PG',
+    DELIMITACION_NO_COINCIDE: 'La delimitación del título minero no coincide con el polígono estructurado en AnnA '
+                              'Minería -> DELIMIT_PROYEC_PG{1}',
+    DELIMITACION_SIN_VERIFICAR: 'Coincidencia de la delimitación del título minero sin verificar: la geometría '
+                                '(proyectada, en otro sistema de referencia o con curvas) solo se puede comparar '
+                                'con ArcGIS, no disponible -> DELIMIT_PROYEC_PG',
+    CONTENCION_DENTRO: 'Registros dentro de DELIMIT_PROYEC_PG -> {1}',
+    CONTENCION_FUERA: 'Error registros fuera de DELIMIT_PROYEC_PG ({2} de {3} registros, OBJECTID {4}) -> {1}',
+    CONTENCION_CURVAS: '{5} registros con curvas sin verificar en DELIMIT_PROYEC_PG -> {1}',
+    CONTENCION_FUERA_CURVAS: 'Error registros fuera de DELIMIT_PROYEC_PG ({2} de {3} registros, OBJECTID {4}); '
+                             '{5} registros con curvas sin verificar en DELIMIT_PROYEC_PG -> {1}',
+    CONTENCION_SIN_VERIFICAR: 'Contención en DELIMIT_PROYEC_PG sin verificar ({6}) -> {1}',
+}
+
+
+def renderizar(plantilla: int, parametros: Sequence[Optional[str]]) -> str:
+    """
+    Texto de un mensaje. Los parámetros nulos se reemplazan por '', como en la vista.
+    """
+    texto = PLANTILLAS[plantilla]
+    for numero, valor in enumerate(parametros, start=1):
+        texto = texto.replace(f'{{{numero}}}', '' if valor is None else valor)
+    return texto
+
+
+def texto_mensajes(df: pd.DataFrame) -> pd.Series:
+    """
+    MENSAJE_VAL de los registros de VALW_GDB_MENSAJE: el texto libre si lo tienen o, si no, su
+    plantilla con los parámetros.
+    """
+    textos = df[valw_gdb_mensaje.mensaje_column]
+    if valw_gdb_mensaje.plantilla_column not in df.columns:
+        return textos
+    plantillas = df[valw_gdb_mensaje.plantilla_column]
+    parametros = df[valw_gdb_mensaje.parametro_columns].astype(object)
+    parametros = parametros.where(parametros.notna(), None).to_numpy(dtype=object).tolist()
+    return pd.Series([
+        texto if pd.isna(plantilla) else renderizar(int(plantilla), valores)
+        for texto, plantilla, valores in zip(textos.tolist(), plantillas.tolist(), parametros)],
+        index=df.index, dtype=object)
+
+
+def parametro(valores: pd.Series) -> pd.Series:
+    """
+    Columna de texto para un parámetro: los nulos quedan como None y los enteros que un where
+    convirtió en float se escriben sin decimales.
+    """
+    return valores.astype(object).where(valores.notna(), None).map(_texto)
+
+
+def _texto(valor) -> Optional[str]:
+    if valor is None or isinstance(valor, str):
+        return valor
+    if isinstance(valor, float) and valor.is_integer():
+        return str(int(valor))
+    return str(valor)
+
+
+def lista(valores: Sequence) -> str:
+    """
+    Parámetro con una lista de valores, p. ej. los OBJECTID de ejemplo.
+    """
+    return ', '.join(map(str, valores))
+
+
+def sql_vista_mensajes(prefijo: str) -> str:
+    """
+    CREATE VIEW de VALW_GDB_MENSAJE_TEXTO: los registros de VALW_GDB_MENSAJE con MENSAJE_VAL
+    armado desde la plantilla cuando el mensaje se guardó como plantilla, con el mismo texto que
+    texto_mensajes.
+
+    Args:
+        prefijo str: esquema con punto antes de cada tabla, p. ej. 'MJEREZ.' ('' sin esquema).
+    """
+    texto = f'P.{valw_mensaje_plantilla.texto_column}'
+    for numero, columna in enumerate(valw_gdb_mensaje.parametro_columns, start=1):
+        # REPLACE con un NULL devuelve NULL fuera de Oracle
+        texto = f"REPLACE({texto}, '{{{numero}}}', COALESCE(M.{columna}, ''))"
+    return f"""CREATE VIEW {prefijo}{valw_gdb_mensaje.vista_name} AS
+    SELECT M.{valw_gdb_mensaje.gdb_id_column}, M.{valw_gdb_mensaje.validador_id},
+        COALESCE(M.{valw_gdb_mensaje.mensaje_column}, {texto}) AS {valw_gdb_mensaje.mensaje_column},
+        M.{valw_gdb_mensaje.bool_column}, M.{valw_gdb_mensaje.plantilla_column}
+    FROM {prefijo}{valw_gdb_mensaje.table_name} M
+    LEFT JOIN {prefijo}{valw_mensaje_plantilla.table_name} P
+        ON P.{valw_mensaje_plantilla.id} = M.{valw_gdb_mensaje.plantilla_column}"""
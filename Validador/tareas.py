@@ -0,0 +1,242 @@
+"""
+Grafo de tareas para ejecutar en paralelo los cargadores y validadores que no dependen entre sí.
+
+Cada tarea declara sus argumentos; los que son Resultado(...) son salidas de otras tareas y
+definen las dependencias. Las tareas listas se ejecutan en hilos (la mayoría espera a la base de
+datos, al servicio WFS o al disco) o en el Executor que se indique, y los resultados se devuelven
+en el orden en que se declararon las tareas. Con `al_terminar` cada resultado se entrega también
+apenas su tarea termina, p. ej. para escribir los mensajes de un validador sin esperar a los demás.
+
+Una tarea que devuelve un generador (p. ej. un validador que produce sus mensajes por lotes) se
+consume en su hilo y cada lote se entrega con `al_producir` en el hilo que llama a ejecutar, sin
+guardarlo: entre todas las tareas hay a lo sumo VALW_TAREAS_LOTES lotes esperando a que se
+entreguen y las que producen más rápido se detienen hasta que haya lugar. Así la escritura de
+los lotes se superpone con el cálculo de los siguientes y la memoria no depende de la cantidad
+de mensajes.
+"""
+import inspect
+import os
+import queue
+import threading
+
+from contextlib import closing
+from concurrent.futures import Executor, Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, NamedTuple, Optional, Tuple
+
+from Validador import metricas
+
+max_hilos = int(os.getenv('VALW_TAREAS_HILOS', '8'))
+# Lotes producidos y aún no entregados, entre todas las tareas
+max_lotes = int(os.getenv('VALW_TAREAS_LOTES', '4'))
+
+
+class Resultado(NamedTuple):
+    """
+    Referencia a la salida de la tarea `tarea`; con `indice` se toma ese elemento de la salida.
+    """
+    tarea: str
+    indice: Optional[int] = None
+
+
+class Tarea(NamedTuple):
+    nombre: str
+    funcion: Callable
+    args: Tuple[Any, ...]
+    kwargs: Dict[str, Any]
+
+    @property
+    def dependencias(self) -> Tuple[str, ...]:
+        valores = list(self.args) + list(self.kwargs.values())
+        return tuple(dict.fromkeys(valor.tarea for valor in valores if isinstance(valor, Resultado)))
+
+
+class _Lote(NamedTuple):
+    datos: Any
+
+
+class _Canal:
+    """
+    Eventos de una ejecución del grafo hacia el hilo que la coordina: lotes de las tareas que
+    producen y tareas terminadas. Los lotes ocupan un cupo hasta que se entregan.
+    """
+
+    def __init__(self, cupos: int):
+        self.eventos: queue.Queue = queue.Queue()
+        self.cupos = threading.Semaphore(cupos)
+        self.cancelado = threading.Event()
+        # Tareas cuya salida fue un generador
+        self.productoras = set()
+
+    def producir(self, nombre: str, lote: Any) -> bool:
+        """
+        Encola un lote cuando hay cupo; False si la ejecución se canceló.
+        """
+        self.cupos.acquire()
+        if self.cancelado.is_set():
+            self.cupos.release()
+            return False
+        self.eventos.put((nombre, _Lote(lote)))
+        return True
+
+
+class GrafoTareas:
+    """
+    Conjunto de tareas con sus dependencias.
+
+    Cada tarea se mide como un tramo (ver metricas) llamado '<etapa>.<nombre>', o solo
+    '<nombre>' si no se indica la etapa.
+
+    Ejemplo:
+        grafo = GrafoTareas()
+        grafo.agregar('catalogo', read_catalog, workspace)
+        grafo.agregar('listas', get_catalog, Resultado('catalogo'))
+        grafo.agregar('datasets', quantity_dataset, bd, id, ds_version, Resultado('listas', 0))
+        resultados = grafo.ejecutar()
+
+    Las tareas que devuelven un generador no tienen salida para otras tareas (su resultado es
+    None) y solo se pueden ejecutar en hilos.
+    """
+
+    def __init__(self, etapa: Optional[str] = None):
+        self.etapa = etapa
+        self.tareas: Dict[str, Tarea] = {}
+
+    def agregar(self, nombre: str, funcion: Callable, *args, **kwargs) -> Resultado:
+        """
+        Declara la tarea `nombre` = funcion(*args, **kwargs).
+
+        Returns:
+            Resultado: referencia a la salida de la tarea, para usar como argumento de otras.
+        """
+        if nombre in self.tareas:
+            raise ValueError(f'Tarea duplicada -> {nombre}')
+        self.tareas[nombre] = Tarea(nombre, funcion, args, kwargs)
+        return Resultado(nombre)
+
+    def ejecutar(self, executor: Optional[Executor] = None, hilos: Optional[int] = None,
+                 al_terminar: Optional[Callable[[str, Any], None]] = None,
+                 al_producir: Optional[Callable[[str, Any], None]] = None,
+                 lotes: Optional[int] = None) -> Dict[str, Any]:
+        """
+        Ejecuta las tareas tan pronto como sus dependencias terminan.
+
+        Si una tarea falla no se inician más tareas, se espera a las que están en curso y se
+        relanza la excepción.
+
+        Args:
+            executor Executor: dónde ejecutar las tareas, p. ej. un ProcessPoolExecutor si las
+                funciones y sus argumentos se pueden serializar. Por defecto un ThreadPoolExecutor.
+            hilos int: hilos del ThreadPoolExecutor por defecto, VALW_TAREAS_HILOS si es None.
+            al_terminar Callable[[str, Any], None]: se llama con el nombre y la salida de cada tarea
+                al terminar, en el hilo que llama a ejecutar; si falla se trata como un error de la tarea.
+                No se llama para las tareas que producen lotes.
+            al_producir Callable[[str, Any], None]: se llama igual con cada lote de las tareas que
+                devuelven un generador; si es None los lotes se descartan.
+            lotes int: lotes sin entregar entre todas las tareas, VALW_TAREAS_LOTES si es None.
+        Returns:
+            Dict[str, Any]: salida de cada tarea, en el orden en que se declararon.
+        """
+        self._verificar()
+        if executor is None:
+            with ThreadPoolExecutor(max_workers=hilos or max_hilos, thread_name_prefix='valw') as propio:
+                return self._ejecutar(propio, al_terminar, al_producir, lotes or max_lotes)
+        return self._ejecutar(executor, al_terminar, al_producir, lotes or max_lotes)
+
+    def _ejecutar(self, executor: Executor, al_terminar: Optional[Callable[[str, Any], None]],
+                  al_producir: Optional[Callable[[str, Any], None]], lotes: int) -> Dict[str, Any]:
+        resultados: Dict[str, Any] = {}
+        pendientes = dict(self.tareas)
+        en_curso: Dict[Future, str] = {}
+        canal = _Canal(lotes)
+        error = None
+        while pendientes or en_curso:
+            if error is None:
+                for nombre, tarea in list(pendientes.items()):
+                    if all(dependencia in resultados for dependencia in tarea.dependencias):
+                        del pendientes[nombre]
+                        args = [self._valor(valor, resultados) for valor in tarea.args]
+                        kwargs = {clave: self._valor(valor, resultados) for clave, valor in tarea.kwargs.items()}
+                        if isinstance(executor, ThreadPoolExecutor):
+                            # El contexto (tramo y gdb actuales) no se puede enviar a otro proceso
+                            contexto = metricas.contexto()
+                            if contexto is None:
+                                future = executor.submit(self._medir, tarea, args, kwargs, canal)
+                            else:
+                                future = executor.submit(contexto.run, self._medir, tarea, args, kwargs, canal)
+                        else:
+                            future = executor.submit(tarea.funcion, *args, **kwargs)
+                        en_curso[future] = nombre
+                        future.add_done_callback(lambda future, nombre=nombre: canal.eventos.put((nombre, future)))
+            if not en_curso:
+                break
+            nombre, evento = canal.eventos.get()
+            if isinstance(evento, _Lote):
+                canal.cupos.release()
+                if al_producir is not None and error is None:
+                    try:
+                        al_producir(nombre, evento.datos)
+                    except Exception as excepcion:
+                        error = excepcion
+                        canal.cancelado.set()
+                continue
+            en_curso.pop(evento)
+            if evento.exception() is not None:
+                error = error or evento.exception()
+                canal.cancelado.set()
+                continue
+            resultados[nombre] = evento.result()
+            if al_terminar is not None and error is None and nombre not in canal.productoras:
+                try:
+                    al_terminar(nombre, resultados[nombre])
+                except Exception as excepcion:
+                    error = excepcion
+                    canal.cancelado.set()
+        if error is not None:
+            raise error
+        return {nombre: resultados[nombre] for nombre in self.tareas}
+
+    def _verificar(self) -> None:
+        """
+        Comprueba que las dependencias existan y que no haya ciclos.
+        """
+        for tarea in self.tareas.values():
+            for dependencia in tarea.dependencias:
+                if dependencia not in self.tareas:
+                    raise ValueError(f'La tarea {tarea.nombre} depende de una tarea inexistente -> {dependencia}')
+        grados = {nombre: len(tarea.dependencias) for nombre, tarea in self.tareas.items()}
+        listas = [nombre for nombre, grado in grados.items() if grado == 0]
+        procesadas = 0
+        while listas:
+            actual = listas.pop()
+            procesadas += 1
+            for nombre, tarea in self.tareas.items():
+                if actual in tarea.dependencias:
+                    grados[nombre] -= 1
+                    if grados[nombre] == 0:
+                        listas.append(nombre)
+        if procesadas != len(self.tareas):
+            ciclo = sorted(nombre for nombre, grado in grados.items() if grado > 0)
+            raise ValueError(f'Dependencia circular entre tareas -> {", ".join(ciclo)}')
+
+    def _medir(self, tarea: Tarea, args, kwargs, canal: _Canal) -> Any:
+        with metricas.tramo(f'{self.etapa}.{tarea.nombre}' if self.etapa else tarea.nombre) as tramo:
+            resultado = tarea.funcion(*args, **kwargs)
+            if inspect.isgenerator(resultado):
+                canal.productoras.add(tarea.nombre)
+                with closing(resultado):
+                    for lote in resultado:
+                        if hasattr(lote, '__len__'):
+                            tramo.contar(registros=len(lote))
+                        if not canal.producir(tarea.nombre, lote):
+                            break
+                return None
+            if hasattr(resultado, '__len__') and not isinstance(resultado, tuple):
+                tramo.contar(registros=len(resultado))
+            return resultado
+
+    @staticmethod
+    def _valor(valor: Any, resultados: Dict[str, Any]) -> Any:
+        if not isinstance(valor, Resultado):
+            return valor
+        resultado = resultados[valor.tarea]
+        return resultado if valor.indice is None else resultado[valor.indice]
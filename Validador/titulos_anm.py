@@ -0,0 +1,190 @@
+"""
+Geometría de los títulos mineros del servicio WFS de la ANM, con caché local por expediente.
+
+Cada respuesta (ESRI GeoJSON) se guarda en VALW_ANM_CACHE_DIR junto con su ETag/Last-Modified.
+Durante VALW_ANM_TTL segundos se usa sin consultar el servicio; después se revalida con una
+petición condicional y, si el servicio no responde, se usa la copia local aunque esté vencida.
+Las consultas se hacen con asyncio sobre una sesión HTTP compartida, lo que permite precargar
+en un solo lote los títulos de todas las gdbs pendientes de la cola.
+"""
+import asyncio
+import json
+import os
+import re
+import tempfile
+import time
+
+import requests
+
+from requests.adapters import HTTPAdapter
+from typing import Dict, Iterable, Optional
+
+from Validador.version_cache import cache_dir
+from utils.arcgis import arcpy
+
+wfs_url = os.getenv(
+    'VALW_ANM_WFS_URL',
+    'https://geo.anm.gov.co/webgis/services/ANM/ServiciosANM/MapServer/WFSServer')
+titulos_cache_dir = os.getenv('VALW_ANM_CACHE_DIR', os.path.join(cache_dir, 'titulos_anm'))
+titulos_ttl = float(os.getenv('VALW_ANM_TTL', '86400'))
+anm_timeout = float(os.getenv('VALW_ANM_TIMEOUT', '30'))
+anm_reintentos = int(os.getenv('VALW_ANM_REINTENTOS', '3'))
+anm_concurrencia = int(os.getenv('VALW_ANM_CONCURRENCIA', '4'))
+
+PROPIEDADES = 'CODIGO_EXPEDIENTE,FECHA_DE_INSCRIPCION,ESTADO,MODALIDAD,ETAPA,NOMBRE_DE_TITULAR,Shape'
+FILTRO = ('<ogc:Filter><ogc:PropertyIsEqualTo><ogc:PropertyName>CODIGO_EXPEDIENTE</ogc:PropertyName>'
+          '<ogc:Literal>{expediente}</ogc:Literal></ogc:PropertyIsEqualTo></ogc:Filter>')
+
+
+class ProveedorTitulos:
+    """
+    Cliente del WFS de títulos vigentes de la ANM con caché en disco.
+
+    Args:
+        url str: URL del WFSServer.
+        directorio str: carpeta de la caché.
+        ttl float: segundos durante los que una respuesta se usa sin revalidar.
+        timeout float: segundos de espera de cada petición.
+        reintentos int: intentos por título ante errores de red o respuestas 5xx.
+        concurrencia int: peticiones simultáneas al servicio.
+    """
+
+    def __init__(self, url: Optional[str] = None, directorio: Optional[str] = None,
+                 ttl: Optional[float] = None, timeout: Optional[float] = None,
+                 reintentos: Optional[int] = None, concurrencia: Optional[int] = None):
+        self.url = url or wfs_url
+        self.directorio = directorio or titulos_cache_dir
+        self.ttl = titulos_ttl if ttl is None else ttl
+        self.timeout = anm_timeout if timeout is None else timeout
+        self.reintentos = anm_reintentos if reintentos is None else reintentos
+        self.concurrencia = concurrencia or anm_concurrencia
+        self._session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.concurrencia)
+        self._session.mount('http://', adapter)
+        self._session.mount('https://', adapter)
+
+    def close(self) -> None:
+        self._session.close()
+
+    def titulo(self, expediente: str) -> dict:
+        """
+        ESRI GeoJSON del título `expediente`, de la caché si sigue vigente.
+        """
+        return asyncio.run(self.obtener(expediente))
+
+    def precargar(self, expedientes: Iterable[str]) -> Dict[str, Optional[Exception]]:
+        """
+        Trae a la caché en un solo lote los títulos que no estén vigentes en ella.
+
+        Returns:
+            Dict[str, Optional[Exception]]: el error de cada expediente que no se pudo traer, o None.
+        """
+        return asyncio.run(self.obtener_varios(expedientes))
+
+    async def obtener_varios(self, expedientes: Iterable[str]) -> Dict[str, Optional[Exception]]:
+        limite = asyncio.Semaphore(self.concurrencia)
+
+        async def obtener(expediente: str) -> Optional[Exception]:
+            async with limite:
+                try:
+                    await self.obtener(expediente)
+                except (requests.RequestException, ValueError) as error:
+                    return error
+            return None
+
+        expedientes = list(dict.fromkeys(expedientes))
+        errores = await asyncio.gather(*(obtener(expediente) for expediente in expedientes))
+        return dict(zip(expedientes, errores))
+
+    async def obtener(self, expediente: str) -> dict:
+        """
+        Versión asíncrona de titulo().
+        """
+        path = os.path.join(self.directorio, f'{_nombre_archivo(expediente)}.json')
+        entrada = _leer(path)
+        if entrada is not None and time.time() - os.path.getmtime(path) < self.ttl:
+            return entrada['geojson']
+
+        encabezados = {}
+        if entrada is not None and entrada.get('etag'):
+            encabezados['If-None-Match'] = entrada['etag']
+        if entrada is not None and entrada.get('last_modified'):
+            encabezados['If-Modified-Since'] = entrada['last_modified']
+        try:
+            respuesta = await self._consultar(expediente, encabezados)
+        except requests.RequestException as error:
+            if entrada is None:
+                raise
+            arcpy.AddWarning(f'Servicio de títulos ANM no disponible, se usa la copia local de {expediente}: {error}')
+            return entrada['geojson']
+
+        if respuesta.status_code == 304 and entrada is not None:
+            os.utime(path)
+            return entrada['geojson']
+        geojson = respuesta.json()
+        if 'features' not in geojson:
+            raise ValueError(f'Respuesta inesperada del servicio de títulos ANM para {expediente}: {str(geojson)[:200]}')
+        _escribir(path, self.directorio, {
+            'expediente': expediente,
+            'etag': respuesta.headers.get('ETag'),
+            'last_modified': respuesta.headers.get('Last-Modified'),
+            'geojson': geojson})
+        return geojson
+
+    async def _consultar(self, expediente: str, encabezados: Dict[str, str]) -> requests.Response:
+        parametros = {
+            'service': 'WFS',
+            'version': '2.0.0',
+            'request': 'GetFeature',
+            'typeName': 'Titulo_Vigente',
+            'PropertyName': PROPIEDADES,
+            'Filter': FILTRO.format(expediente=expediente),
+            'outputformat': 'ESRIGEOJSON',
+        }
+        loop = asyncio.get_running_loop()
+        for intento in range(1, self.reintentos + 1):
+            try:
+                respuesta = await loop.run_in_executor(None, lambda: self._session.get(
+                    self.url, params=parametros, headers=encabezados, timeout=self.timeout))
+            except (requests.ConnectionError, requests.Timeout):
+                if intento == self.reintentos:
+                    raise
+            else:
+                # Solo los errores del servidor (5xx) se reintentan
+                if respuesta.status_code < 500 or intento == self.reintentos:
+                    respuesta.raise_for_status()
+                    return respuesta
+            await asyncio.sleep(2 ** (intento - 1))
+
+
+_proveedor: Optional[ProveedorTitulos] = None
+
+
+def proveedor_titulos() -> ProveedorTitulos:
+    """
+    Proveedor compartido del proceso, creado en el primer uso.
+    """
+    global _proveedor
+    if _proveedor is None:
+        _proveedor = ProveedorTitulos()
+    return _proveedor
+
+
+def _nombre_archivo(expediente: str) -> str:
+    return re.sub(r'[^A-Za-z0-9_.-]', '_', expediente)
+
+
+def _leer(path: str) -> Optional[dict]:
+    try:
+        with open(path, 'r', encoding='utf-8') as archivo:
+            return json.load(archivo)
+    except (OSError, ValueError):
+        return None
+
+
+def _escribir(path: str, directorio: str, entrada: dict) -> None:
+    os.makedirs(directorio, exist_ok=True)
+    descriptor, temporal = tempfile.mkstemp(dir=directorio, suffix='.tmp')
+    with os.fdopen(descriptor, 'w', encoding='utf-8') as archivo:
+        json.dump(entrada, archivo)
+    os.replace(temporal, path)
@@ -1,19 +1,29 @@
-import arcpy
 import os
-import sys
-from importlib_metadata import version
+import numpy as np
 import pandas as pd
-import requests
 
 
-from importlib.resources import path
-from typing import List, Dict, Tuple
+from typing import List, Dict, Iterator, Optional, Tuple
 from zipfile import ZipFile
 
-from sqlalchemy import desc
-from utils.utils import (conversion_format, set_workspace, valw_gdb_mensaje, 
-    valw_dom_validadores, valw_srs, valw_version)
-from database.connection import pd_upper_columns, schema
+from utils.arcgis import arcpy
+from utils.utils import conversion_format, set_workspace, valw_dom_validadores, valw_srs, valw_version
+from database.connection import schema
+from Validador.gdb_catalog import (read_catalog, read_feature_schema, read_domains, item_types, table_ids,
+    FEATURE_DATASET, FEATURE_CLASS, TABLE)
+from Validador.dominios import iterar_dominios, COLUMNAS_RESULTADO as COLUMNAS_DOMINIO
+from Validador.cod_expediente import iterar_expediente, max_errores_expediente, COLUMNAS_RESULTADO as COLUMNAS_EXPEDIENTE
+from Validador.contencion import iterar_contencion, COLUMNAS_RESULTADO as COLUMNAS_CONTENCION
+from Validador.validez_geometria import (iterar_geometrias, COLUMNAS_RESULTADO as COLUMNAS_GEOMETRIA, NULA, VACIA, POCOS_VERTICES, ANILLO_ABIERTO,
+    VERTICES_DUPLICADOS, AUTOINTERSECCION, SIN_VERIFICAR)
+from Validador.titulos_anm import proveedor_titulos
+from Validador.filegdb import GdbTable, read_shape
+from Validador.geometria import (ComparacionGeometria, GCS_EQUIVALENTES, TOLERANCIA_GEOGRAFICA, anillos_esri,
+    comparar_poligonos)
+from Validador import plantillas
+from Validador.plantillas import lista
+from Validador.comparacion import (comparar_atributos, comparar_catalogos, en_lotes, mensajes_plantilla, mensajes_comparacion,
+    NOMBRE, ESTADO, CORRECTO, ATRIBUTO_FALTANTE, ATRIBUTO_SOBRANTE, ALIAS, TIPO, LONGITUD, DOMINIO)
 
 
 def extract_files(file_path: str, extract_path: str):
@@ -42,133 +52,188 @@ def extract_files(file_path: str, extract_path: str):
             arcpy.AddMessage(F"2.3 File date: {file_date}")
             set_workspace(F"{extract_path}\{file_name}.gdb")
 
-def spatial_matching(connection, id, exp) -> None:
+def spatial_matching(connection, id, exp, gdb, catalog: pd.DataFrame) -> pd.DataFrame:
     """
     Spatial matching
     """
     """
     Persiste la información de la correspondencia espacial entre el póligono del servicio web geográfico y el feature class cargado en la GDB.
+    La comparación (equivalente a ARE_IDENTICAL_TO) se hace en el proceso con comparar_poligonos; solo
+    si la geometría no se puede comparar de forma nativa se usa SelectLayerByLocation de arcpy, y
+    sin ArcGIS el mensaje es DELIMITACION_SIN_VERIFICAR, que no cuenta como error.
     Args:
         connection: Conexión a la base de datos.
         id int: identificador de la gdba en la tabla VALW_GDBS_VALIDAR.
         exp: código del expediente.
+        gdb: workspace abierto con open_workspace.
+        catalog pd.DataFrame: catálogo de la gdb (read_catalog).
     Returns:
-        None
+        pd.DataFrame: registros de VALW_GDB_MENSAJE.
     """
     arcpy.AddMessage("4. Spatial matching...")
     arcpy.AddMessage("Verificación coincidencia espacial")
 
     id_validador = _id_validador(connection, validador='ESPACIAL')
     id_validador = int(id_validador)
-    sql = """INSERT INTO MJEREZ.VALW_GDB_MENSAJE(GDB_ID, MENSAJE_VAL, VALIDADOR_ID, ESTA_BIEN) VALUES (:id_db, :mensaje, :id_validador, :bool_column)"""
-    
-    url_service_anm = f"https://geo.anm.gov.co/webgis/services/ANM/ServiciosANM/MapServer/WFSServer?service=WFS&version=2.0.0&request=GetFeature&typeName=Titulo_Vigente&PropertyName=CODIGO_EXPEDIENTE,FECHA_DE_INSCRIPCION,ESTADO,MODALIDAD,ETAPA,NOMBRE_DE_TITULAR,Shape&Filter=<ogc:Filter><ogc:PropertyIsEqualTo><ogc:PropertyName>CODIGO_EXPEDIENTE</ogc:PropertyName><ogc:Literal>{exp}</ogc:Literal></ogc:PropertyIsEqualTo></ogc:Filter>&outputformat=ESRIGEOJSON"
-    geojson_service_anm = requests.get(url_service_anm).json()
-    
-    mining_title = arcpy.AsShape(geojson_service_anm, True)
-    delimit_proyect_pg = arcpy.MakeFeatureLayer_management(os.path.join(arcpy.env.workspace, "TOPOGRAFIA_LOCAL", "DELIMIT_PROYEC_PG"))
-    select_location = arcpy.SelectLayerByLocation_management(delimit_proyect_pg, "ARE_IDENTICAL_TO", mining_title, None, "NEW_SELECTION", "NOT_INVERT")
-
-    if int(arcpy.GetCount_management(select_location)[0]) > 0:
-        bool_column = 1
-        mensaje = f'La delimitación del título minero coincide con el polígono estructurado en AnnA Minería -> DELIMIT_PROYEC_PG'
-        _insert_mensaje(connection=connection, sql=sql, id_gdb= id, mensaje=mensaje, id_validador=id_validador, bool_column=bool_column)
+    geojson_service_anm = proveedor_titulos().titulo(exp)
 
+    comparacion = _comparar_delimitacion(gdb, catalog, geojson_service_anm)
+    if comparacion is None and not arcpy.disponible():
+        return mensajes_plantilla(id, id_validador, plantillas.DELIMITACION_SIN_VERIFICAR, [], 1)
+    if comparacion is None:
+        identicos, detalle = _spatial_matching_arcpy(gdb, geojson_service_anm), ''
     else:
-        bool_column = 0
-        mensaje = f'La delimitación del título minero no coincide con el polígono estructurado en AnnA Minería -> DELIMIT_PROYEC_PG'
-        _insert_mensaje(connection=connection, sql=sql, id_gdb= id, mensaje=mensaje, id_validador=id_validador, bool_column=bool_column)
+        identicos, detalle = comparacion.identicos, _detalle_comparacion(comparacion)
+
+    if identicos:
+        return mensajes_plantilla(id, id_validador, plantillas.DELIMITACION_COINCIDE, [], 1)
+    return mensajes_plantilla(id, id_validador, plantillas.DELIMITACION_NO_COINCIDE, [pd.Series([detalle])], 0)
 
-def get_feature_datasets():
+def feature_containment(connection, id, gdb, catalog: pd.DataFrame) -> Iterator[pd.DataFrame]:
     """
-    Get all feature datasets in a geodatabase
+    Valida que los registros de todas las feature classes estén dentro de DELIMIT_PROYEC_PG.
+
+    Las envolventes de cada feature class se indexan en un R-tree y solo los registros que tocan
+    el borde de la delimitación se comprueban con su geometría (ver validar_contencion). Sin
+    delimitación no hay mensajes: la falta la informa spatial_matching. Los mensajes son del
+    validador ESPACIAL y se producen por lotes de feature classes (ver en_lotes).
+
+    Args:
+        connection: capa de acceso a datos (BaseDatos).
+        id int: identificador de la gdb en la tabla VALW_GDBS_VALIDAR.
+        gdb: workspace abierto con open_workspace.
+        catalog pd.DataFrame: catálogo de la gdb (read_catalog).
+    Yields:
+        pd.DataFrame: registros de VALW_GDB_MENSAJE.
     """
-    walk_gds = arcpy.da.Walk(topdown=True, datatype="FeatureDataset")
-    datasets = []
-    dataset_codes = []
-    for dirpath, dirnames, _ in walk_gds:
-        for gds in dirnames:
-            gds_crs = arcpy.Describe(os.path.join(dirpath, gds)).spatialReference.GCSCode
-            datasets.append(gds)
-            dataset_codes.append(str(gds_crs))
-    return pd.DataFrame({'DATASETS': datasets, 'SRSCODES': dataset_codes})
+    id_validador = _id_validador(connection, validador='ESPACIAL')
+    registros = iterar_contencion(gdb, catalog, item_types(catalog, FEATURE_CLASS)['NOMBRE'].tolist())
+    for resultado in en_lotes(registros, COLUMNAS_CONTENCION):
+        yield _containment_messages(id, id_validador, resultado)
 
-def get_feature_classes():
+def _containment_messages(id, id_validador: int, resultado: pd.DataFrame) -> pd.DataFrame:
     """
-    Get all feature classes
+    Mensajes de un lote de registros de validar_contencion, uno por feature class.
     """
-    walk_fcs = arcpy.da.Walk(topdown=True, datatype="FeatureClass")
-    feature_classes = []
-    for _, dirnames, fnames in walk_fcs:
-        for fc in fnames:
-            feature_classes.append(fc)
-    
-    return pd.DataFrame({'FEATURES': feature_classes})
-
-def get_tables():
+    verificada = resultado['MOTIVO'].isna()
+    fuera = verificada & (resultado['FUERA'] > 0)
+    curvas = verificada & (resultado['SIN_VERIFICAR'] > 0)
+    plantilla = pd.Series(np.select(
+        [~verificada, fuera & curvas, fuera, curvas],
+        [plantillas.CONTENCION_SIN_VERIFICAR, plantillas.CONTENCION_FUERA_CURVAS, plantillas.CONTENCION_FUERA,
+         plantillas.CONTENCION_CURVAS], plantillas.CONTENCION_DENTRO), index=resultado.index)
+    return mensajes_plantilla(id, id_validador, plantilla, [
+        resultado['NOMBRE'],
+        resultado['FUERA'].where(fuera),
+        resultado['REGISTROS'].where(fuera),
+        resultado['MUESTRA'].map(lista).where(fuera),
+        resultado['SIN_VERIFICAR'].where(curvas),
+        resultado['MOTIVO'],
+    ], (plantilla == plantillas.CONTENCION_DENTRO).astype(int))
+
+def _comparar_delimitacion(gdb, catalog: pd.DataFrame, geojson: dict) -> Optional[ComparacionGeometria]:
     """
-    Get all tables
+    Compara DELIMIT_PROYEC_PG con el título minero. Devuelve None si no se puede hacer sin arcpy:
+    coordenadas proyectadas, sistemas de referencia distintos o geometrías con curvas.
     """
-    walk_tables = arcpy.da.Walk(topdown=True, datatype="Table")
-    tables = []
-    for dirpath, dirnames, fnames in walk_tables:
-        for fc in fnames:
-            if not fc.endswith('__ATTACH'):
-                tables.append(fc)
-    
-    return pd.DataFrame({'TABLAS': tables})
+    titulo, wkid = anillos_esri(geojson)
+    if not titulo:
+        return ComparacionGeometria(False, 'título minero no encontrado en el servicio de la ANM', float('nan'), 0.0, 0.0)
+    table_id = table_ids(catalog).get('DELIMIT_PROYEC_PG')
+    if table_id is None:
+        return ComparacionGeometria(False, 'DELIMIT_PROYEC_PG no existe en la gdb', float('nan'), 0.0, 0.0)
+
+    with GdbTable.open(gdb, table_id, 'DELIMIT_PROYEC_PG') as table:
+        field = table.geometry_field
+        if not field.geometry.wkt.startswith('GEOGCS'):
+            return None
+        srscode = catalog.loc[catalog['NOMBRE'] == 'DELIMIT_PROYEC_PG', 'SRSCODE'].iloc[0]
+        srscode = int(srscode) if pd.notna(srscode) else None
+        if wkid and srscode and wkid != srscode and not {wkid, srscode} <= GCS_EQUIVALENTES:
+            return None
+        tolerancia = field.geometry.xytolerance or TOLERANCIA_GEOGRAFICA
+        resultados = []
+        for row in table.rows([field.name]):
+            anillos = read_shape(row[field.name], field.geometry)
+            if anillos is None:
+                return None
+            resultados.append(comparar_poligonos(anillos, titulo, tolerancia, geografico=True))
+    if not resultados:
+        return ComparacionGeometria(False, 'DELIMIT_PROYEC_PG no tiene registros', float('nan'), 0.0, 0.0)
+    # Basta un registro idéntico, como con SelectLayerByLocation; si no, se informa el más parecido
+    return min(resultados, key=lambda resultado: (not resultado.identicos, np.nan_to_num(resultado.hausdorff, nan=np.inf)))
+
+def _detalle_comparacion(comparacion: ComparacionGeometria) -> str:
+    if np.isnan(comparacion.hausdorff):
+        return f' ({comparacion.motivo})'
+    return (f' ({comparacion.motivo}; distancia de Hausdorff {comparacion.hausdorff:.2f} m, '
+            f'diferencia de área {comparacion.delta_area:+.4f} ha)')
+
+def _spatial_matching_arcpy(gdb, geojson: dict) -> bool:
+    # ARE_IDENTICAL_TO con arcpy, para los casos que _comparar_delimitacion no resuelve
+    mining_title = arcpy.AsShape(geojson, True)
+    delimit_proyect_pg = arcpy.MakeFeatureLayer_management(os.path.join(gdb.folder(), "TOPOGRAFIA_LOCAL", "DELIMIT_PROYEC_PG"))
+    select_location = arcpy.SelectLayerByLocation_management(delimit_proyect_pg, "ARE_IDENTICAL_TO", mining_title, None, "NEW_SELECTION", "NOT_INVERT")
+    return int(arcpy.GetCount_management(select_location)[0]) > 0
 
-def get_feature_attributes(vfc_df: pd.DataFrame, fc_df: pd.DataFrame) -> pd.DataFrame:
+def get_catalog(path) -> Tuple[pd.DataFrame, pd.DataFrame, pd.DataFrame]:
+    """
+    Get feature datasets, feature classes and tables reading the gdb system catalog once,
+    without arcpy (the attachment tables, __ATTACH, are left out).
+
+    Args:
+        path: ruta de la gdb (carpeta o .gdb.zip), workspace abierto con open_workspace o el
+            catálogo ya leído con read_catalog.
+    Returns:
+        ds, fc, tbl Tuple[pd.DataFrame, pd.DataFrame, pd.DataFrame]: datasets con su código GCS,
+            feature classes y tablas de la gdb.
+    """
+    catalog = path if isinstance(path, pd.DataFrame) else read_catalog(path)
+    datasets = item_types(catalog, FEATURE_DATASET)
+    features = item_types(catalog, FEATURE_CLASS)
+    tables = item_types(catalog, TABLE)
+    tables = tables[~tables['NOMBRE'].str.endswith('__ATTACH')]
+
+    ds = pd.DataFrame({
+        'DATASETS': datasets['NOMBRE'].tolist(),
+        'SRSCODES': datasets['SRSCODE'].fillna(0).astype(int).astype(str).tolist()})
+    fc = pd.DataFrame({'FEATURES': features['NOMBRE'].tolist()})
+    tbl = pd.DataFrame({'TABLAS': tables['NOMBRE'].tolist()})
+    return ds, fc, tbl
+
+def get_feature_attributes(gdb, catalog: pd.DataFrame, vfc_df: pd.DataFrame, fc_df: pd.DataFrame) -> pd.DataFrame:
     """
     Get all features attributes
+    Esquema de las feature classes de la versión presentes en la gdb, leído del catálogo y de las
+    cabeceras de las tablas (ver read_feature_schema) en lugar de arcpy.Describe / arcpy.ListFields.
+
+    Args:
+        gdb: workspace abierto con open_workspace.
+        catalog pd.DataFrame: catálogo de la gdb (read_catalog).
+        vfc_df pd.DataFrame: feature classes de la versión.
+        fc_df pd.DataFrame: feature classes de la gdb.
+    Returns:
+        pd.DataFrame
     """
     vfc_list = set(vfc_df['NOMBRE_OBJETO'].tolist())
     fc_list = set(fc_df['FEATURES'].tolist())
     fc_to_check = vfc_list.intersection(fc_list)
-    fc_names = ['NOMBRE', 'ALIAS', 'TIPO_GEOMETRIA', 'TIPO_FEATURE','NOMBRE_ATRIBUTO', 'ALIAS_ATRIBUTO', 'TIPO_ATRIBUTO', 'TAMANO_ATRIBUTO', 'DOMINIO', 'OBLIGACION']
-    df = pd.DataFrame(columns=[fc_names[0], fc_names[1], fc_names[2], fc_names[3], fc_names[4], fc_names[5], fc_names[6], fc_names[7], fc_names[8], fc_names[9]])
-    
-    for fc in fc_to_check:
-        descripcion_fc = arcpy.Describe(fc)
-        fields = arcpy.ListFields(fc)
-        fields_no_list = ['OBJECTID', 'SHAPE', 'SHAPE_Length', 'SHAPE_Area']
-        for field in fields:
-            if field.name not in fields_no_list:
-                if field.domain is '':
-                    domain = 'N/A'
-                else:
-                    domain = field.domain
-                union_df = pd.DataFrame([[descripcion_fc.name, descripcion_fc.aliasName,
-                descripcion_fc.shapeType, descripcion_fc.featureType, 
-                field.name, field.aliasName, field.type, field.length, domain, field.required]], columns=df.columns)
-                df = pd.concat([df, union_df], axis=0, ignore_index=True)
-
-    return df
+    return read_feature_schema(gdb, catalog, fc_to_check)
 
     #a GEOMETRIA -> OBJETOS_ATRIBUTOS OK 
-    #b CHECK GEOMETRY -> GEOPROCESO OK
+    #b CHECK GEOMETRY -> GEOPROCESO OK (geometry_validity)
     #c COD_ID_ATRIBUTO -> ATRIBUTO
-    #d COD_EXPEDIENTE -> ATRIBUTO
+    #d COD_EXPEDIENTE -> ATRIBUTO OK (expedient_code)
     #e ATRIBUTOS OBLIGATORIOS -> OBJETOS_ATRIBUTOS OK
     #f FIELD NAME -> OBJETOS_ATRIBUTOS OK
     #g FIELD NAME ALIAS -> OBJETOS_ATRIBUTOS OK
     #h FIELD TYPE -> OBJETOS_ATRIBUTOS OK 
     #i FIELD LENGTH -> OBJETOS_ATRIBUTOS OK
     #j DOMAIN -> OBJETOS_ATRIBUTOS OK
-    #k VALIDATE DOMAIN -> OBJETOS_ATRIBUTOS
-
-def left_join_ds_version_ds_validacion(
-    ds_version: pd.DataFrame,
-    ds_validacion: pd.DataFrame
-)-> pd.DataFrame:
-    df_comp = ds_version[['DS_NOMBRE', 'SRSCODE']]
-    return df_comp.merge(ds_validacion, 
-        how='left', 
-        left_on='DS_NOMBRE', 
-        right_on='DATASETS')
-    
+    #k VALIDATE DOMAIN -> OBJETOS_ATRIBUTOS OK (domain_values)
+
 def reference_system( 
-    version:str ,engine, id, ds_version: Dict[str, List[str]], ds_validacion: List[str]) -> pd.DataFrame:
+    version:str ,connection, id, ds_version: Dict[str, List[str]], ds_validacion: List[str]) -> pd.DataFrame:
     """
     Reference System
     Args:
@@ -178,44 +243,18 @@ def reference_system(
     arcpy.AddMessage("5. Reference system...")
     arcpy.AddMessage("Verificación sistema de referencia")
 
-    id_validador = _id_validador(engine=engine, validador=valw_dom_validadores.srs)
-    codigo, nombre = _get_srs(connection=engine, version=version)
+    id_validador = _id_validador(connection, validador=valw_dom_validadores.srs)
+    codigo, nombre = _get_srs(connection=connection, version=version)
     # TODO cuidado con esto
     codigo = int(codigo)
-    version_vs_gdb = left_join_ds_version_ds_validacion(
-        ds_version=ds_version,
-        ds_validacion=ds_validacion) 
-
-    # verificar sistema de referencia incorrecto
-    srs_incorrecto = version_vs_gdb[
-        (version_vs_gdb['SRSCODE'] != version_vs_gdb['SRSCODES']) 
-        & 
-        (version_vs_gdb['DS_NOMBRE'] == version_vs_gdb['DATASETS'])
-        ].copy()
-    if len(srs_incorrecto)>0:
-        srs_incorrecto[valw_gdb_mensaje.mensaje_column] = srs_incorrecto.apply(lambda x: 
-            f'Sistema de referencia, incorrecto el sistema debe ser GCS MAGNA (EPSG: {x["SRSCODE"]}) -> {x["DS_NOMBRE"]}', axis=1)
-        srs_incorrecto[valw_gdb_mensaje.bool_column] = 0
-
-    # verificar sistemas de referencia correcto
-    srs_correcto = version_vs_gdb[
-        (version_vs_gdb['SRSCODE'] == version_vs_gdb['SRSCODES']) 
-        & 
-        (version_vs_gdb['DS_NOMBRE'] == version_vs_gdb['DATASETS'])
-        ].copy()
-    if len(srs_correcto)>0:
-        srs_correcto[valw_gdb_mensaje.mensaje_column] = srs_correcto.apply(lambda x: 
-            f'Sistema de referencia correcto GCS MAGNA (EPSG: {x["SRSCODE"]}) -> {x["DS_NOMBRE"]}', axis=1)
-        srs_correcto[valw_gdb_mensaje.bool_column] = 1
-
-    final = pd.concat([srs_incorrecto, srs_correcto])
-    final[valw_gdb_mensaje.gdb_id_column] = id
-    final[valw_gdb_mensaje.validador_id] = id_validador
-    return  final[[
-        valw_gdb_mensaje.gdb_id_column, 
-        valw_gdb_mensaje.validador_id, 
-        valw_gdb_mensaje.mensaje_column,
-        valw_gdb_mensaje.bool_column]].copy()  
+    # SRSCODES de la gdb es texto; el código del MDG se compara también como texto
+    comparacion = comparar_catalogos(
+        ds_version[['DS_NOMBRE', 'SRSCODE']].astype({'SRSCODE': str}), ds_validacion, 'DS_NOMBRE', 'DATASETS')
+    presentes = comparacion[comparacion[ESTADO] == CORRECTO]
+    srscode = presentes['SRSCODE']
+    srs_correcto = srscode == presentes['SRSCODES'].astype(str)
+    plantilla = srs_correcto.map({True: plantillas.SRS_CORRECTO, False: plantillas.SRS_INCORRECTO})
+    return mensajes_plantilla(id, id_validador, plantilla, [srscode, presentes[NOMBRE]], srs_correcto.astype(int))
 
 def _get_srs(connection, version: str)-> Tuple[str, str]:
     """
@@ -228,20 +267,15 @@ def _get_srs(connection, version: str)-> Tuple[str, str]:
     """
     sql = f"""SELECT {valw_srs.srscode}, {valw_srs.nombre} FROM {schema}.{valw_srs.table_name} SRS
             INNER JOIN {schema}.{valw_version.table_name} VER ON  VER.{valw_version.id} 
-            = SRS.{valw_srs.version_id} WHERE VER.{valw_version.version} = {version}"""
-    df = pd_upper_columns(sql, connection)
+            = SRS.{valw_srs.version_id} WHERE VER.{valw_version.version} = :version"""
+    df = connection.consultar(sql, version=version)
     df.reset_index(inplace=True)
     srs_code = df[valw_srs.srscode][0]
     nombre = df[valw_srs.nombre][0]
 
     return srs_code, nombre
 
-def _insert_mensaje(connection, sql: str, id_gdb: int, mensaje: str, id_validador:int, bool_column:int)->None:
-    # TODO esto debería arrojar excepciones.
-    with connection.cursor() as cur:
-        cur.execute(sql, [id_gdb, mensaje, id_validador, bool_column])
-
-def _id_validador(engine ,validador:str)->int:
+def _id_validador(connection ,validador:str)->int:
     """
     Retorna el ID de la tabla VALW_DOM_VALIDADORES.
     Args:
@@ -250,12 +284,18 @@ def _id_validador(engine ,validador:str)->int:
     RETURNS:
         int: el ID de la DESCRIPCIÓN.
     """
+    return ids_validadores(connection)[validador]
+
+def ids_validadores(connection) -> Dict[str, int]:
+    """
+    ID de cada validador de la tabla VALW_DOM_VALIDADORES, por DESCRIPCION.
+    """
     sql = f"""SELECT {valw_dom_validadores.id}, {valw_dom_validadores.descripcion} 
             FROM {schema}.{valw_dom_validadores.table_name}"""
-    df = pd_upper_columns(sql, engine)
-    return df[(df[valw_dom_validadores.descripcion] == validador)].reset_index()['ID'][0]
+    df = connection.consultar(sql)
+    return dict(zip(df[valw_dom_validadores.descripcion], df[valw_dom_validadores.id].astype(int)))
 
-def quantity_dataset(engine, id, ds_version:pd.DataFrame, ds_validacion:pd.DataFrame) -> pd.DataFrame:
+def quantity_dataset(connection, id, ds_version:pd.DataFrame, ds_validacion:pd.DataFrame) -> pd.DataFrame:
     """
     Persiste la información de las diferencias o exactitudes de la validación referente a datasets.
     Args:
@@ -270,67 +310,16 @@ def quantity_dataset(engine, id, ds_version:pd.DataFrame, ds_validacion:pd.DataF
     arcpy.AddMessage("6. Quantity of datasets...")
     arcpy.AddMessage("Verificación datasets")
     
-    id_validador = _id_validador(engine, validador=valw_dom_validadores.datasets)
-    
-    version_vs_gdb = left_join_ds_version_ds_validacion(
-        ds_version=ds_version,
-        ds_validacion=ds_validacion)
-    version_vs_gdb = version_vs_gdb[['DS_NOMBRE', 'DATASETS']].copy()
-
-    ausentes = pd.DataFrame()
-    # verificar si existen datasets ausentes.
-    if version_vs_gdb.isna().sum().sum() > 0 :
-        ausentes = version_vs_gdb[
-            (version_vs_gdb['DS_NOMBRE'] != version_vs_gdb['DATASETS'])
-            ].copy()
-        if len(ausentes) > 0:
-            ausentes[valw_gdb_mensaje.mensaje_column] = ausentes['DS_NOMBRE'].\
-                apply(lambda x : f'Dataset del MDG faltante -> {x}')
-            ausentes[valw_gdb_mensaje.bool_column] = 0
-    
-    # verificar datasets correctos
-    presentes = version_vs_gdb[
-        (version_vs_gdb['DS_NOMBRE'] == version_vs_gdb['DATASETS'])
-        ].copy()
-    if len(presentes) > 0:
-        presentes[valw_gdb_mensaje.mensaje_column] = presentes['DS_NOMBRE'].\
-            apply(lambda x : f'Dataset correcto -> {x}')
-        presentes[valw_gdb_mensaje.bool_column] = 1
-
-    # verificar datasets sobrantes
-    
-    gdb_vs_version_ds = ds_validacion.merge(
-        ds_version, 
-        how='left', 
-        left_on='DATASETS', 
-        right_on='DS_NOMBRE')[['DS_NOMBRE', 'DATASETS']].copy()
-    if len(gdb_vs_version_ds) > 0:
-        ds_adicionales = gdb_vs_version_ds[
-            (gdb_vs_version_ds['DS_NOMBRE'] != gdb_vs_version_ds['DATASETS'])
-            ].copy()
-        ds_adicionales[valw_gdb_mensaje.mensaje_column] = ds_adicionales['DATASETS'].\
-            apply(lambda x: f'Dataset no incluido en el MDG -> {x}')
-        ds_adicionales[valw_gdb_mensaje.gdb_id_column] = id
-        ds_adicionales[valw_gdb_mensaje.validador_id] = id_validador
-        ds_adicionales[valw_gdb_mensaje.bool_column] = 0
-        ds_adicionales = ds_adicionales[[
-            valw_gdb_mensaje.gdb_id_column,
-            valw_gdb_mensaje.validador_id,
-            valw_gdb_mensaje.mensaje_column,
-            valw_gdb_mensaje.bool_column]].copy()
-    
-    final = pd.concat([ausentes, presentes])
-    final[valw_gdb_mensaje.gdb_id_column] = id
-    final[valw_gdb_mensaje.validador_id] = id_validador
-    final = final[[
-        valw_gdb_mensaje.gdb_id_column,
-        valw_gdb_mensaje.validador_id,
-        valw_gdb_mensaje.mensaje_column,
-        valw_gdb_mensaje.bool_column]].copy()
-    return pd.concat([final, ds_adicionales])
-    
+    id_validador = _id_validador(connection, validador=valw_dom_validadores.datasets)
+
+    comparacion = comparar_catalogos(ds_version, ds_validacion, 'DS_NOMBRE', 'DATASETS')
+    return mensajes_comparacion(
+        comparacion, id, id_validador,
+        faltante=plantillas.DATASET_FALTANTE,
+        sobrante=plantillas.DATASET_SOBRANTE,
+        correcto=plantillas.DATASET_CORRECTO)
 
-def quantity_feature_class(engine, id, fc_version, fc_gdb) -> pd.DataFrame:
+def quantity_feature_class(connection, id, fc_version, fc_gdb) -> pd.DataFrame:
     """
     Persiste la información de las diferencias o exactitudes de la validación referente a feature classes.
     Args:
@@ -345,41 +334,16 @@ def quantity_feature_class(engine, id, fc_version, fc_gdb) -> pd.DataFrame:
     arcpy.AddMessage("7. Quantity of feature classes...")
     arcpy.AddMessage("Verificación feature classes")
 
-    id_validador = _id_validador(engine=engine, validador=valw_dom_validadores.features)
+    id_validador = _id_validador(connection, validador=valw_dom_validadores.features)
 
-    ausentes_version_gdb = fc_version.set_index('NOMBRE_OBJETO').index.difference(fc_gdb.set_index('FEATURES').index)
-    adicionales_gdb_version = fc_gdb.set_index('FEATURES').index.difference(fc_version.set_index('NOMBRE_OBJETO').index)
-    correctos = fc_version.set_index('NOMBRE_OBJETO').index.intersection(fc_gdb.set_index('FEATURES').index)
+    comparacion = comparar_catalogos(fc_version, fc_gdb, 'NOMBRE_OBJETO', 'FEATURES')
+    return mensajes_comparacion(
+        comparacion, id, id_validador,
+        faltante=plantillas.FEATURE_CLASS_FALTANTE,
+        sobrante=plantillas.FEATURE_CLASS_SOBRANTE,
+        correcto=plantillas.FEATURE_CLASS_CORRECTO)
 
-    ausentes_version_gdb = ausentes_version_gdb.to_frame(index=False, name='FEATURE')
-    adicionales_gdb_version = adicionales_gdb_version.to_frame(index=False, name='FEATURE')
-    correctos = correctos.to_frame(index=False, name='FEATURE')
-
-    if len(ausentes_version_gdb) > 0:
-        ausentes_version_gdb[valw_gdb_mensaje.mensaje_column] = ausentes_version_gdb['FEATURE'].\
-            apply(lambda x: f'Feature class del MDG faltante -> {x}')
-        ausentes_version_gdb[valw_gdb_mensaje.bool_column] = 0
-    
-    if len(adicionales_gdb_version) > 0:
-        adicionales_gdb_version[valw_gdb_mensaje.mensaje_column] = adicionales_gdb_version['FEATURE'].\
-            apply(lambda x: f'Feature class no incluido en el MDG -> {x}')
-        adicionales_gdb_version[valw_gdb_mensaje.bool_column] = 0
-        
-    if len(correctos) > 0:
-        correctos[valw_gdb_mensaje.mensaje_column] = correctos['FEATURE'].\
-            apply(lambda x: f'Feature class correcto -> {x}')
-        correctos[valw_gdb_mensaje.bool_column] = 1
-
-    final = pd.concat([ausentes_version_gdb, adicionales_gdb_version, correctos])
-    final[valw_gdb_mensaje.gdb_id_column] = id
-    final[valw_gdb_mensaje.validador_id] = id_validador
-    return final[[
-        valw_gdb_mensaje.gdb_id_column,
-        valw_gdb_mensaje.validador_id,
-        valw_gdb_mensaje.mensaje_column, 
-        valw_gdb_mensaje.bool_column]].copy()
-
-def quantity_tables(engine, id, tbl_version, tbl_gdb) -> pd.DataFrame:
+def quantity_tables(connection, id, tbl_version, tbl_gdb) -> pd.DataFrame:
     """
     Persiste la información de las diferencias o exactitudes de la validación referente a tablas.
     Args:
@@ -394,42 +358,16 @@ def quantity_tables(engine, id, tbl_version, tbl_gdb) -> pd.DataFrame:
     arcpy.AddMessage("8. Quantity of tables...")
     arcpy.AddMessage("Verificación tablas")
 
-    id_validador = _id_validador(engine=engine, validador=valw_dom_validadores.tables)
+    id_validador = _id_validador(connection, validador=valw_dom_validadores.tables)
 
-    ausentes_version_gdb = tbl_version.set_index('FICHAX').index.difference(tbl_gdb.set_index('TABLAS').index)
-    adicionales_gdb_version = tbl_gdb.set_index('TABLAS').index.difference(tbl_version.set_index('FICHAX').index)
-    correctos = tbl_version.set_index('FICHAX').index.intersection(tbl_gdb.set_index('TABLAS').index)
+    comparacion = comparar_catalogos(tbl_version, tbl_gdb, 'FICHAX', 'TABLAS')
+    return mensajes_comparacion(
+        comparacion, id, id_validador,
+        faltante=plantillas.TABLA_FALTANTE,
+        sobrante=plantillas.TABLA_SOBRANTE,
+        correcto=plantillas.TABLA_CORRECTA)
 
-    ausentes_version_gdb = ausentes_version_gdb.to_frame(index=False, name='TABLA')
-    adicionales_gdb_version = adicionales_gdb_version.to_frame(index=False, name='TABLA')
-    correctos = correctos.to_frame(index=False, name='TABLA')
-
-    if len(ausentes_version_gdb) > 0:
-        ausentes_version_gdb[valw_gdb_mensaje.mensaje_column] = ausentes_version_gdb['TABLA'].\
-            apply(lambda x: f'Tabla o ficha del MDG faltante -> {x}')
-        ausentes_version_gdb[valw_gdb_mensaje.bool_column] = 0
-    
-    if len(adicionales_gdb_version) > 0:
-        adicionales_gdb_version[valw_gdb_mensaje.mensaje_column] = adicionales_gdb_version['TABLA'].\
-            apply(lambda x: f'Tabla o ficha no incluido en el MDG -> {x}')
-        adicionales_gdb_version[valw_gdb_mensaje.bool_column] = 0
-
-    if len(correctos) > 0:
-        correctos[valw_gdb_mensaje.mensaje_column] = correctos['TABLA'].\
-            apply(lambda x: f'Tabla o ficha correcta -> {x}')
-        correctos[valw_gdb_mensaje.bool_column] = 1
-
-    final = pd.concat([ausentes_version_gdb, adicionales_gdb_version, correctos])
-    final[valw_gdb_mensaje.gdb_id_column] = id
-    final[valw_gdb_mensaje.validador_id] = id_validador
-    return final[[
-        valw_gdb_mensaje.gdb_id_column,
-        valw_gdb_mensaje.validador_id,
-        valw_gdb_mensaje.mensaje_column,
-        valw_gdb_mensaje.bool_column]].copy()
-    
-
-def quantity_required(connection, id, gvreq, greq) -> None:
+def quantity_required(connection, id, gvreq, greq) -> pd.DataFrame:
     """
     Persiste la información de las diferencias o exactitudes de la validación referente a requerimientos.
 
@@ -440,7 +378,7 @@ def quantity_required(connection, id, gvreq, greq) -> None:
         gvreq Dict[str, List[str]]: Feature Classes obligatorios de la versión
         greq Dict[str, List[str]]: Feature Classes obligatorios de la gdb a ser comprobada.
     Returns:
-        None
+        pd.DataFrame: registros de VALW_GDB_MENSAJE.
     """
 
     arcpy.AddMessage("9. Quantity of required objects...")
@@ -448,37 +386,150 @@ def quantity_required(connection, id, gvreq, greq) -> None:
 
     id_validador = _id_validador(connection, validador='OBLIGATORIEDAD')
     id_validador = int(id_validador)
-    sql = """INSERT INTO MJEREZ.VALW_GDB_MENSAJE(GDB_ID, MENSAJE_VAL, VALIDADOR_ID, ESTA_BIEN) VALUES (:id_db, :mensaje, :id_validador, :bool_column)"""
+    requeridos = pd.Series(list(gvreq), dtype=object)
+    cumple = requeridos.isin(greq['FEATURES'])
+    plantilla = cumple.map({True: plantillas.OBLIGATORIO_CUMPLE, False: plantillas.OBLIGATORIO_FALTANTE})
+    return mensajes_plantilla(id, id_validador, plantilla, [requeridos], cumple.astype(int))
 
-    for vreq in gvreq:
-        if vreq in greq['FEATURES'].to_list():
-            bool_column = 1
-            mensaje = f'Feature class cumple con la Tabla de Obligatoriedad -> {vreq}'
-            _insert_mensaje(connection=connection, sql=sql, id_gdb= id, mensaje=mensaje, id_validador=id_validador, bool_column=bool_column)
-        else:
-            bool_column = 0
-            mensaje = f'Feature class obligatorio faltante según la Tabla de Obligatoriedad -> {vreq}'
-            with connection.cursor() as cur:
-                _insert_mensaje(connection=connection, sql=sql, id_gdb= id, mensaje=mensaje, id_validador=id_validador, bool_column=bool_column)
+def domain_values(connection, id, gdb, catalog: pd.DataFrame, attribute_gdb: pd.DataFrame) -> Iterator[pd.DataFrame]:
+    """
+    Valida los valores de los campos con dominio de las feature classes (ítem k de feature_attributes).
+
+    Cada dominio se lee una vez del catálogo y cada campo se compara por columnas completas
+    (ver validar_dominios): un mensaje por campo con la cantidad de valores fuera del dominio y
+    algunos OBJECTID de ejemplo, producidos por lotes de campos (ver en_lotes).
+
+    Args:
+        connection: capa de acceso a datos (BaseDatos).
+        id int: identificador de la gdb en la tabla VALW_GDBS_VALIDAR.
+        gdb: workspace abierto con open_workspace.
+        catalog pd.DataFrame: catálogo de la gdb (read_catalog).
+        attribute_gdb pd.DataFrame: esquema de las feature classes (get_feature_attributes).
+    Yields:
+        pd.DataFrame: registros de VALW_GDB_MENSAJE.
+    """
+    id_validador = _id_validador(connection, validador=valw_dom_validadores.attibutes)
+    dominios = read_domains(catalog)
+    campos = attribute_gdb[attribute_gdb['DOMINIO'] != 'N/A']
+    inexistentes = campos[~campos['DOMINIO'].isin(list(dominios))]
+    registros = iterar_dominios(gdb, catalog, campos[campos['DOMINIO'].isin(list(dominios))], dominios)
+    for resultado in en_lotes(registros, COLUMNAS_DOMINIO):
+        cumple = resultado['VIOLACIONES'] == 0
+        plantilla = cumple.map({True: plantillas.DOMINIO_CORRECTO, False: plantillas.DOMINIO_FUERA})
+        yield mensajes_plantilla(id, id_validador, plantilla, [
+            resultado['NOMBRE'], resultado['NOMBRE_ATRIBUTO'], resultado['DOMINIO'],
+            resultado['VIOLACIONES'].where(~cumple), resultado['REGISTROS'].where(~cumple),
+            resultado['MUESTRA'].map(lista).where(~cumple)], cumple.astype(int))
+    if len(inexistentes):
+        yield mensajes_plantilla(id, id_validador, plantillas.DOMINIO_INEXISTENTE, [
+            inexistentes['NOMBRE'], inexistentes['NOMBRE_ATRIBUTO'], inexistentes['DOMINIO']], 0)
+
+# Plantilla de los mensajes de cada error de geometría (ver validar_geometrias)
+GEOMETRY_ERRORS = {
+    NULA: plantillas.GEOMETRIA_NULA,
+    VACIA: plantillas.GEOMETRIA_VACIA,
+    POCOS_VERTICES: plantillas.GEOMETRIA_POCOS_VERTICES,
+    ANILLO_ABIERTO: plantillas.GEOMETRIA_ANILLO_ABIERTO,
+    VERTICES_DUPLICADOS: plantillas.GEOMETRIA_VERTICES_DUPLICADOS,
+    AUTOINTERSECCION: plantillas.GEOMETRIA_AUTOINTERSECCION,
+    SIN_VERIFICAR: plantillas.GEOMETRIA_SIN_VERIFICAR,
+}
+
+def geometry_validity(connection, id, gdb, catalog: pd.DataFrame, attribute_gdb: pd.DataFrame) -> Iterator[pd.DataFrame]:
+    """
+    Valida la geometría de cada registro de las feature classes (ítem b de feature_attributes).
+
+    Las feature classes se leen por rangos de OBJECTID repartidos en un pool de procesos (ver
+    validar_geometrias): un mensaje por feature class sin errores y uno por feature class y tipo
+    de error, con la cantidad de registros y algunos OBJECTID de ejemplo. Cada feature class se
+    entrega apenas se validan todos sus bloques, en lotes (ver en_lotes).
+
+    Args:
+        connection: capa de acceso a datos (BaseDatos).
+        id int: identificador de la gdb en la tabla VALW_GDBS_VALIDAR.
+        gdb: workspace abierto con open_workspace.
+        catalog pd.DataFrame: catálogo de la gdb (read_catalog).
+        attribute_gdb pd.DataFrame: esquema de las feature classes (get_feature_attributes).
+    Yields:
+        pd.DataFrame: registros de VALW_GDB_MENSAJE.
+    """
+    id_validador = _id_validador(connection, validador=valw_dom_validadores.attibutes)
+    registros = iterar_geometrias(gdb, catalog, attribute_gdb['NOMBRE'].unique().tolist())
+    for resultado in en_lotes(registros, COLUMNAS_GEOMETRIA):
+        cumple = resultado['ERROR'].isna()
+        plantilla = resultado['ERROR'].map(GEOMETRY_ERRORS).where(~cumple, plantillas.GEOMETRIA_VALIDA)
+        yield mensajes_plantilla(id, id_validador, plantilla, [
+            resultado['NOMBRE'], resultado['CANTIDAD'].where(~cumple), resultado['REGISTROS'].where(~cumple),
+            resultado['MUESTRA'].map(lista).where(~cumple)], cumple.astype(int))
+
+def expedient_code(connection, id, exp, gdb, catalog: pd.DataFrame) -> Iterator[pd.DataFrame]:
+    """
+    Valida que COD_EXPEDIENTE de todas las feature classes y tablas sea el expediente (ítem d de
+    feature_attributes).
+
+    Solo se lee esa columna de cada tabla (ver validar_expediente); la lectura se detiene al
+    superar VALW_EXPEDIENTE_MAX_ERRORES registros con error. Los mensajes se producen por lotes
+    de tablas (ver en_lotes).
+
+    Args:
+        connection: capa de acceso a datos (BaseDatos).
+        id int: identificador de la gdb en la tabla VALW_GDBS_VALIDAR.
+        exp str: código del expediente.
+        gdb: workspace abierto con open_workspace.
+        catalog pd.DataFrame: catálogo de la gdb (read_catalog).
+    Yields:
+        pd.DataFrame: registros de VALW_GDB_MENSAJE.
+    """
+    id_validador = _id_validador(connection, validador=valw_dom_validadores.attibutes)
+    for resultado in en_lotes(iterar_expediente(gdb, catalog, exp), COLUMNAS_EXPEDIENTE):
+        yield _expedient_messages(id, id_validador, exp, resultado)
 
-def feature_attributes(engine, id, attribute_version, attribute_gdb) -> pd.DataFrame:
+def _expedient_messages(id, id_validador: int, exp, resultado: pd.DataFrame) -> pd.DataFrame:
+    """
+    Mensajes de un lote de registros de validar_expediente, uno por tabla.
+    """
+    def valores(valores, distintos) -> str:
+        ejemplos = ', '.join('NULL' if valor is None else str(valor) for valor in valores)
+        return ejemplos + (f' y {distintos - len(valores)} más' if distintos > len(valores) else '')
+
+    completa = resultado['COMPLETA'].astype(bool)
+    sin_verificar = (resultado['REGISTROS'] == 0) & ~completa
+    errores = (resultado['ERRORES'] > 0) & ~sin_verificar
+    plantilla = pd.Series(np.select(
+        [sin_verificar, errores & completa, errores],
+        [plantillas.EXPEDIENTE_SIN_VERIFICAR, plantillas.EXPEDIENTE_ERRADO, plantillas.EXPEDIENTE_ERRADO_PARCIAL],
+        plantillas.EXPEDIENTE_CORRECTO), index=resultado.index)
+    ejemplos = pd.Series([valores(*registro) for registro in resultado[['VALORES', 'DISTINTOS']].itertuples(index=False)],
+                         index=resultado.index, dtype=object)
+    return mensajes_plantilla(id, id_validador, plantilla, [
+        resultado['NOMBRE'],
+        pd.Series(exp, index=resultado.index).where(~sin_verificar),
+        resultado['ERRORES'].where(errores), resultado['REGISTROS'].where(errores), ejemplos.where(errores),
+        pd.Series(max_errores_expediente, index=resultado.index).where(sin_verificar),
+    ], ((resultado['ERRORES'] == 0) & completa).astype(int))
+
+def feature_attributes(connection, id, attribute_version, attribute_gdb) -> pd.DataFrame:
     """
     Persiste la información de las diferencias o exactitudes de la validación referente a requerimientos.
 
+    Los atributos (ítems f a j: nombre, alias, tipo, longitud y dominio) se comparan en un solo
+    merge por (NOMBRE, NOMBRE_ATRIBUTO), ver comparar_atributos. Los ítems que leen los registros
+    de la gdb (b, d y k) son validadores aparte que producen sus mensajes por lotes:
+    geometry_validity, expedient_code y domain_values.
+
     Args:
         connection: Conexión a la base de datos.
         id int: identificador de la gdba en la tabla VALW_GDBS_VALIDAR.
-        gvsd str: datasets de la versión.
-        gvreq Dict[str, List[str]]: Feature Classes obligatorios de la versión
-        greq Dict[str, List[str]]: Feature Classes obligatorios de la gdb a ser comprobada.
+        attribute_version pd.DataFrame: atributos de la versión (VALW_OBJETOS_ATRIBUTOS).
+        attribute_gdb pd.DataFrame: esquema de las feature classes de la gdb (get_feature_attributes).
     Returns:
-        None
+        pd.DataFrame: registros de VALW_GDB_MENSAJE.
     """
 
     arcpy.AddMessage("10. Feature attributes of the objects...")
     arcpy.AddMessage("Verificación características atributivas de los objetos")
 
-    id_validador = _id_validador(engine, validador=valw_dom_validadores.attibutes)
+    id_validador = _id_validador(connection, validador=valw_dom_validadores.attibutes)
 
     df_version_geometry = attribute_version[['NOMBRE','GEOMETRIA']].copy()
     df_version_geometry = (df_version_geometry.sort_values(by='NOMBRE')).drop_duplicates()
@@ -488,12 +539,8 @@ def feature_attributes(engine, id, attribute_version, attribute_gdb) -> pd.DataF
 
     # Validator Geometry 7.A
     df_validate_geometry = df_geometry[df_geometry['GEOMETRIA'] != df_geometry['TIPO_GEOMETRIA']]['NOMBRE'].unique()
-    df_validate_geometry = pd.DataFrame(df_validate_geometry, columns=['FEATURE'])
-
-    if len(df_validate_geometry) > 0:
-        df_validate_geometry[valw_gdb_mensaje.mensaje_column] = df_validate_geometry['FEATURE'].\
-            apply(lambda x: f'Error tipo de geometría -> {x}')
-        df_validate_geometry[valw_gdb_mensaje.bool_column] = 0
+    df_validate_geometry = mensajes_plantilla(id, id_validador, plantillas.GEOMETRIA_TIPO,
+                                              [pd.Series(df_validate_geometry, dtype=object)], 0)
     
     # print(df_validate_geometry)
 
@@ -505,41 +552,45 @@ def feature_attributes(engine, id, attribute_version, attribute_gdb) -> pd.DataF
 
     # Validator Geometry 7.B
     df_validate_topology = df_topology[df_topology['TIPO_FEATURE'] != 'Simple']['NOMBRE'].unique()
-    df_validate_topology = pd.DataFrame(df_validate_topology, columns=['FEATURE'])
-
-    if len(df_validate_topology) > 0:
-        df_validate_topology[valw_gdb_mensaje.mensaje_column] = df_validate_topology['FEATURE'].\
-            apply(lambda x: f'Error topólogico -> {x}')
-        df_validate_topology[valw_gdb_mensaje.bool_column] = 0
+    df_validate_topology = mensajes_plantilla(id, id_validador, plantillas.TOPOLOGIA,
+                                              [pd.Series(df_validate_topology, dtype=object)], 0)
 
     # print(df_validate_topology)
 
-    df_version_attributes = attribute_version[['NOMBRE','NOMBRE_ATRIBUTO']].sort_values(by='NOMBRE')
-    df_gdb_attributes = attribute_version[['NOMBRE','NOMBRE_ATRIBUTO']].sort_values(by='NOMBRE')
-    df_attributes = df_version_attributes.merge(df_gdb_attributes, how='left', left_on='NOMBRE', right_on='NOMBRE')
-
-    # print(df_version_attributes.head(15))
-    # print(df_gdb_attributes.head(15))
-
-    final = pd.concat([df_validate_geometry, df_validate_topology])
-    final[valw_gdb_mensaje.gdb_id_column] = id
-    final[valw_gdb_mensaje.validador_id] = id_validador
-    return final[[
-        valw_gdb_mensaje.gdb_id_column,
-        valw_gdb_mensaje.validador_id,
-        valw_gdb_mensaje.mensaje_column,
-        valw_gdb_mensaje.bool_column]].copy()
+    # Validator Attributes 7.F - 7.J
+    df_validate_attributes = _attribute_messages(id, id_validador, comparar_atributos(attribute_version, attribute_gdb))
+
+    final = pd.concat([df_validate_geometry, df_validate_topology, df_validate_attributes], ignore_index=True)
+    return final
     
 
     #a GEOMETRIA -> OBJETOS_ATRIBUTOS OK
-    #b CHECK GEOMETRY -> GEOPROCESO OK
+    #b CHECK GEOMETRY -> GEOPROCESO OK (geometry_validity)
     #c COD_ID_ATRIBUTO -> ATRIBUTO
-    #d COD_EXPEDIENTE -> ATRIBUTO
+    #d COD_EXPEDIENTE -> ATRIBUTO OK (expedient_code)
     #e ATRIBUTOS OBLIGATORIOS -> OBJETOS_ATRIBUTOS
-    #f FIELD NAME -> OBJETOS_ATRIBUTOS
-    #g FIELD NAME ALIAS -> OBJETOS_ATRIBUTOS
-    #h FIELD TYPE -> OBJETOS_ATRIBUTOS
-    #i FIELD LENGTH -> OBJETOS_ATRIBUTOS
-    #j DOMAIN -> OBJETOS_ATRIBUTOS
-    #k VALIDATE DOMAIN -> OBJETOS_ATRIBUTOS
-
+    #f FIELD NAME -> OBJETOS_ATRIBUTOS OK
+    #g FIELD NAME ALIAS -> OBJETOS_ATRIBUTOS OK
+    #h FIELD TYPE -> OBJETOS_ATRIBUTOS OK
+    #i FIELD LENGTH -> OBJETOS_ATRIBUTOS OK
+    #j DOMAIN -> OBJETOS_ATRIBUTOS OK
+    #k VALIDATE DOMAIN -> OBJETOS_ATRIBUTOS OK (domain_values)
+
+# Plantilla de los mensajes de cada diferencia de esquema (ver comparar_atributos)
+ATTRIBUTE_ERRORS = {
+    ATRIBUTO_FALTANTE: plantillas.ATRIBUTO_FALTANTE,
+    ATRIBUTO_SOBRANTE: plantillas.ATRIBUTO_SOBRANTE,
+    ALIAS: plantillas.ATRIBUTO_ALIAS,
+    TIPO: plantillas.ATRIBUTO_TIPO,
+    LONGITUD: plantillas.ATRIBUTO_LONGITUD,
+    DOMINIO: plantillas.ATRIBUTO_DOMINIO,
+}
+
+def _attribute_messages(id, id_validador: int, diferencias: pd.DataFrame) -> pd.DataFrame:
+    """
+    Mensaje '<error> (esperado X, encontrado Y) -> FEATURE.ATRIBUTO' de cada diferencia de esquema.
+    """
+    detalle = ~diferencias['DIFERENCIA'].isin([ATRIBUTO_FALTANTE, ATRIBUTO_SOBRANTE])
+    return mensajes_plantilla(id, id_validador, diferencias['DIFERENCIA'].map(ATTRIBUTE_ERRORS), [
+        diferencias['NOMBRE'], diferencias['NOMBRE_ATRIBUTO'],
+        diferencias['ESPERADO'].where(detalle), diferencias['ENCONTRADO'].where(detalle)], 0)
@@ -0,0 +1,350 @@
+"""
+Validación de la geometría de cada registro de las feature classes (ítem b de feature_attributes).
+
+Cada feature class se recorre por rangos de OBJECTID (ver GdbTable.read_columns) de
+VALW_GEOMETRIA_BLOQUE registros, de modo que la memoria no depende del tamaño de la feature
+class, y los rangos se reparten entre VALW_GEOMETRIA_PROCESOS procesos. De cada registro se
+comprueba:
+
+    NULA                 sin geometría.
+    VACIA                geometría sin vértices.
+    POCOS_VERTICES       anillo con menos de 4 vértices o línea con menos de 2.
+    ANILLO_ABIERTO       anillo cuyo último vértice no es el primero.
+    VERTICES_DUPLICADOS  vértices consecutivos a menos de la tolerancia XY.
+    AUTOINTERSECCION     segmentos de un polígono que se cruzan o se superponen.
+    SIN_VERIFICAR        curvas u otro tipo de geometría que no se decodifica.
+
+Las comparaciones se hacen sobre las coordenadas enteras de la grilla de almacenamiento, sin
+errores de redondeo, y sobre todos los vértices de un bloque a la vez (ver errores_formas).
+"""
+import multiprocessing as mp
+import os
+import numpy as np
+import pandas as pd
+
+from collections import Counter
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from functools import lru_cache
+from itertools import groupby
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from Validador.filegdb import GdbTable, open_workspace, read_shape, read_varuint
+from Validador.gdb_catalog import table_ids
+
+# Registros (rango de OBJECTID) por bloque
+tamano_bloque = int(os.getenv('VALW_GEOMETRIA_BLOQUE', '20000'))
+# Procesos para los bloques; con 1, o si la gdb tiene menos de un bloque, se valida en el proceso.
+# En los procesos del pool de worker.py es 1 si no se indica
+procesos_geometria = int(os.getenv('VALW_GEOMETRIA_PROCESOS', str(min(4, os.cpu_count() or 1))))
+# OBJECTID de ejemplo por feature class y tipo de error en el mensaje
+muestras_geometria = int(os.getenv('VALW_GEOMETRIA_MUESTRAS', '5'))
+
+NULA = 'NULA'
+VACIA = 'VACIA'
+POCOS_VERTICES = 'POCOS_VERTICES'
+ANILLO_ABIERTO = 'ANILLO_ABIERTO'
+VERTICES_DUPLICADOS = 'VERTICES_DUPLICADOS'
+AUTOINTERSECCION = 'AUTOINTERSECCION'
+SIN_VERIFICAR = 'SIN_VERIFICAR'
+
+COLUMNAS_RESULTADO = ['NOMBRE', 'ERROR', 'REGISTROS', 'CANTIDAD', 'MUESTRA']
+
+# Tipos de shape de polígonos (simples, Z, M, ZM y generales), ver read_shape
+_TIPOS_POLIGONO = {5, 15, 19, 25, 51}
+# Pares de segmentos comparados a la vez en _hay_cruces
+_PARES_POR_LOTE = 1 << 20
+# Hasta esta cantidad de segmentos se comparan todos los pares, sin ordenarlos por x
+_SEGMENTOS_TODOS_LOS_PARES = 64
+
+# Feature class abierta en cada proceso del pool, para los bloques siguientes de la misma tabla
+_abierta: Optional[Tuple[Tuple[str, int], object, GdbTable]] = None
+
+
+def errores_formas(formas: List[List[np.ndarray]], poligonos: np.ndarray, tolerancia: int) -> List[List[str]]:
+    """
+    Errores de un lote de geometrías, comprobados sobre todos los vértices del lote a la vez.
+
+    Args:
+        formas List[List[np.ndarray]]: anillos o partes de cada geometría en coordenadas de la
+            grilla (read_shape con grid=True).
+        poligonos np.ndarray: booleano por geometría, True para polígonos (anillos cerrados y sin cruces).
+        tolerancia int: tolerancia XY en unidades de la grilla.
+    Returns:
+        List[List[str]]: tipos de error de cada geometría, vacía si es válida.
+    """
+    errores: List[List[str]] = [[] if forma else [VACIA] for forma in formas]
+    partes = [parte for forma in formas for parte in forma]
+    if not partes:
+        return errores
+    poligonos = np.asarray(poligonos, dtype=bool)
+    forma_parte = np.repeat(np.arange(len(formas)), [len(forma) for forma in formas])
+    largos = np.array([len(parte) for parte in partes], dtype=np.int64)
+    poligono_parte = poligonos[forma_parte]
+    puntos = np.concatenate(partes).astype(np.int64, copy=False)
+    fin = np.cumsum(largos)
+    inicio = fin - largos
+
+    def marcar(tipo: str, formas_con_error: np.ndarray) -> None:
+        for forma in np.unique(formas_con_error).tolist():
+            errores[forma].append(tipo)
+
+    marcar(POCOS_VERTICES, forma_parte[largos < np.where(poligono_parte, 4, 2)])
+    con_puntos = np.flatnonzero(poligono_parte & (largos > 0))
+    abiertos = (puntos[inicio[con_puntos]] != puntos[fin[con_puntos] - 1]).any(axis=1)
+    marcar(ANILLO_ABIERTO, forma_parte[con_puntos[abiertos]])
+
+    # Segmentos entre vértices consecutivos de una misma parte
+    parte_punto = np.repeat(np.arange(len(partes)), largos)
+    mismo = parte_punto[1:] == parte_punto[:-1]
+    pasos = (puntos[1:] - puntos[:-1]).astype(np.float64)
+    distancias = np.hypot(pasos[:, 0], pasos[:, 1])
+    duplicados = mismo & ((distancias == 0) | (distancias < tolerancia))
+    marcar(VERTICES_DUPLICADOS, forma_parte[parte_punto[1:][duplicados]])
+
+    segmento = mismo & (distancias > 0) & poligono_parte[parte_punto[1:]]
+    forma_segmento = forma_parte[parte_punto[1:][segmento]]
+    a, b = puntos[:-1][segmento], puntos[1:][segmento]
+    cantidades = np.bincount(forma_segmento, minlength=len(formas))
+    extension = np.zeros(len(formas), dtype=np.int64)
+    if len(forma_segmento):
+        primeros = np.searchsorted(forma_segmento, np.unique(forma_segmento))
+        minimos = np.minimum.reduceat(np.minimum(a, b), primeros)
+        maximos = np.maximum.reduceat(np.maximum(a, b), primeros)
+        extension[forma_segmento[primeros]] = (maximos - minimos).max(axis=1)
+
+    # Geometrías chicas: todos los pares de segmentos de todas a la vez; las demás, una por una
+    chicas = (cantidades >= 2) & (cantidades <= _SEGMENTOS_TODOS_LOS_PARES) & (extension < 1 << 30)
+    desplazamientos = np.cumsum(cantidades) - cantidades
+    pares = [(_todos_los_pares(cantidades[forma]), desplazamientos[forma]) for forma in np.flatnonzero(chicas)]
+    if pares:
+        i = np.concatenate([par[0] + desde for par, desde in pares])
+        j = np.concatenate([par[1] + desde for par, desde in pares])
+        marcar(AUTOINTERSECCION, forma_segmento[i[_cruces(a, b, i, j)]])
+    for forma in np.flatnonzero(~chicas & (cantidades >= 2)).tolist():
+        if _hay_cruces(formas[forma]):
+            errores[forma].append(AUTOINTERSECCION)
+    return errores
+
+
+def _hay_cruces(anillos: List[np.ndarray]) -> bool:
+    """
+    True si dos segmentos de los anillos se cruzan en un punto interior de ambos o se superponen
+    en un tramo; los que solo se tocan en un vértice no cuentan.
+
+    En anillos de pocos segmentos se comparan todos los pares; en los demás los pares candidatos
+    salen de ordenar los segmentos por su x mínima: solo se comparan los que se solapan en x, por
+    lotes de a lo sumo _PARES_POR_LOTE pares.
+    """
+    anillos = [anillo for anillo in anillos if len(anillo) >= 2]
+    if not anillos:
+        return False
+    puntos = np.concatenate(anillos)
+    # Coordenadas relativas al mínimo: enteras y exactas en int64 si la extensión es menor a 2^30
+    puntos = puntos - puntos.min(axis=0)
+    if puntos.max() >= 1 << 30:
+        puntos = puntos.astype(np.float64)
+    fin_anillo = np.cumsum([len(anillo) for anillo in anillos])
+    ultimo = np.zeros(len(puntos), dtype=bool)
+    ultimo[fin_anillo - 1] = True
+    a = puntos[:-1][~ultimo[:-1]]
+    b = puntos[1:][~ultimo[:-1]]
+    no_nulos = (a != b).any(axis=1)
+    a, b = a[no_nulos], b[no_nulos]
+    n = len(a)
+    if n < 2:
+        return False
+
+    if n <= _SEGMENTOS_TODOS_LOS_PARES:
+        i, j = _todos_los_pares(n)
+        return bool(_cruces(a, b, i, j).any())
+
+    xmin, xmax = np.minimum(a[:, 0], b[:, 0]), np.maximum(a[:, 0], b[:, 0])
+    ymin, ymax = np.minimum(a[:, 1], b[:, 1]), np.maximum(a[:, 1], b[:, 1])
+    orden = np.argsort(xmin, kind='stable')
+    a, b, xmin, xmax, ymin, ymax = a[orden], b[orden], xmin[orden], xmax[orden], ymin[orden], ymax[orden]
+    # Segmentos j > i cuya x mínima no supera la x máxima de i
+    hasta = np.searchsorted(xmin, xmax, side='right')
+    cantidades = np.maximum(hasta - np.arange(n) - 1, 0)
+    acumulado = np.cumsum(cantidades)
+    inicio = 0
+    while inicio < n:
+        base = acumulado[inicio - 1] if inicio else 0
+        fin = max(int(np.searchsorted(acumulado, base + _PARES_POR_LOTE, side='right')), inicio + 1)
+        i = np.repeat(np.arange(inicio, fin), cantidades[inicio:fin])
+        j = i + 1 + (np.arange(len(i)) - np.repeat(acumulado[inicio:fin] - cantidades[inicio:fin] - base,
+                                                    cantidades[inicio:fin]))
+        inicio = fin
+        solapan = (ymin[i] <= ymax[j]) & (ymin[j] <= ymax[i])
+        if _cruces(a, b, i[solapan], j[solapan]).any():
+            return True
+    return False
+
+
+@lru_cache(maxsize=None)
+def _todos_los_pares(n: int) -> Tuple[np.ndarray, np.ndarray]:
+    return np.triu_indices(n, 1)
+
+
+def _cruces(a: np.ndarray, b: np.ndarray, i: np.ndarray, j: np.ndarray) -> np.ndarray:
+    """
+    Máscara de los pares de segmentos (a[i], b[i]) y (a[j], b[j]) que se cruzan o se superponen.
+    """
+    ai, bi, aj, bj = a[i], b[i], a[j], b[j]
+    d1 = _orientacion(ai, bi, aj)
+    d2 = _orientacion(ai, bi, bj)
+    d3 = _orientacion(aj, bj, ai)
+    d4 = _orientacion(aj, bj, bi)
+    cruces = (np.sign(d1) * np.sign(d2) < 0) & (np.sign(d3) * np.sign(d4) < 0)
+    colineales = np.flatnonzero((d1 == 0) & (d2 == 0))
+    if len(colineales):
+        ai, bi, aj, bj = ai[colineales], bi[colineales], aj[colineales], bj[colineales]
+        # Superposición positiva sobre el eje en que el segmento i tiene más extensión
+        eje = np.abs(bi - ai).argmax(axis=1)
+        filas = np.arange(len(colineales))
+        desde = np.maximum(np.minimum(ai, bi)[filas, eje], np.minimum(aj, bj)[filas, eje])
+        hasta = np.minimum(np.maximum(ai, bi)[filas, eje], np.maximum(aj, bj)[filas, eje])
+        cruces[colineales[hasta > desde]] = True
+    return cruces
+
+
+def _orientacion(p: np.ndarray, q: np.ndarray, r: np.ndarray) -> np.ndarray:
+    return (q[:, 0] - p[:, 0]) * (r[:, 1] - p[:, 1]) - (q[:, 1] - p[:, 1]) * (r[:, 0] - p[:, 0])
+
+
+def validar_bloque(table: GdbTable, inicio: int, fin: int) -> Tuple[int, Dict[str, Tuple[int, List[int]]]]:
+    """
+    Valida las geometrías de los registros con OBJECTID en [inicio, fin).
+
+    Returns:
+        registros, errores: registros leídos y, por tipo de error, cantidad y primeros OBJECTID.
+    """
+    campo = table.geometry_field
+    tolerancia = int(round(campo.geometry.xytolerance * campo.geometry.xyscale))
+    registros = 0
+    errores: Dict[str, Tuple[int, List[int]]] = {}
+    for bloque in table.read_columns([campo.name], chunk_size=max(fin - inicio, 1), start=inicio, stop=fin):
+        registros += len(bloque)
+        oids = bloque.iloc[:, 0].tolist()
+        tipos: List[List[str]] = [[] for _ in oids]
+        formas, poligonos, decodificadas = [], [], []
+        for fila, blob in enumerate(bloque[campo.name].tolist()):
+            if blob is None:
+                tipos[fila] = [NULA]
+                continue
+            partes = read_shape(blob, campo.geometry, grid=True)
+            if partes is None:
+                tipos[fila] = [SIN_VERIFICAR]
+                continue
+            formas.append(partes)
+            poligonos.append(read_varuint(blob, 0)[0] & 0xFF in _TIPOS_POLIGONO)
+            decodificadas.append(fila)
+        for fila, errores_forma in zip(decodificadas, errores_formas(formas, np.array(poligonos, dtype=bool),
+                                                                     tolerancia)):
+            tipos[fila] = errores_forma
+        for oid, tipos_fila in zip(oids, tipos):
+            for tipo in tipos_fila:
+                cantidad, muestra = errores.get(tipo, (0, []))
+                if len(muestra) < muestras_geometria:
+                    muestra.append(oid)
+                errores[tipo] = (cantidad + 1, muestra)
+    return registros, errores
+
+
+def _validar_bloque_ruta(ruta: str, table_id: int, nombre: str, inicio: int,
+                         fin: int) -> Tuple[int, Dict[str, Tuple[int, List[int]]]]:
+    """
+    validar_bloque en un proceso del pool: la tabla queda abierta para el siguiente bloque.
+    """
+    global _abierta
+    if _abierta is None or _abierta[0] != (ruta, table_id):
+        if _abierta is not None:
+            _abierta[2].close()
+            _abierta[1].close()
+        workspace = open_workspace(ruta)
+        _abierta = ((ruta, table_id), workspace, GdbTable.open(workspace, table_id, nombre))
+    return validar_bloque(_abierta[2], inicio, fin)
+
+
+def validar_geometrias(gdb, catalog: pd.DataFrame, nombres: Iterable[str], procesos: Optional[int] = None,
+                       bloque: Optional[int] = None) -> pd.DataFrame:
+    """
+    Cuenta los errores de geometría de cada feature class.
+
+    Args:
+        gdb: workspace abierto con open_workspace.
+        catalog pd.DataFrame: catálogo de la gdb (read_catalog).
+        nombres Iterable[str]: feature classes a validar; las que no están en la gdb o no tienen
+            geometría se omiten.
+        procesos int: procesos del pool, por defecto VALW_GEOMETRIA_PROCESOS.
+        bloque int: registros por bloque, por defecto VALW_GEOMETRIA_BLOQUE.
+    Returns:
+        pd.DataFrame: columnas de COLUMNAS_RESULTADO, un registro por feature class y tipo de
+            error (ERROR None y CANTIDAD 0 si no tiene errores); MUESTRA son los primeros OBJECTID.
+    """
+    # Los registros de cada feature class llegan juntos; el orden estable los deja por nombre
+    filas = sorted(iterar_geometrias(gdb, catalog, nombres, procesos, bloque), key=lambda fila: fila[0])
+    return pd.DataFrame.from_records(filas, columns=COLUMNAS_RESULTADO)
+
+
+def iterar_geometrias(gdb, catalog: pd.DataFrame, nombres: Iterable[str], procesos: Optional[int] = None,
+                      bloque: Optional[int] = None) -> Iterator[tuple]:
+    """
+    Registros de validar_geometrias, entregados juntos por feature class apenas se validan todos
+    sus bloques; con varios procesos el orden de las feature classes es el de llegada.
+    """
+    procesos = procesos or procesos_geometria
+    bloque = bloque or tamano_bloque
+    ids = table_ids(catalog)
+    rangos = []
+    for nombre in sorted(set(nombres)):
+        if nombre not in ids:
+            continue
+        with GdbTable.open(gdb, ids[nombre], nombre) as table:
+            if table.geometry_field is None or table.geometry_field.geometry is None:
+                continue
+            total = table.total_rows
+        rangos += [(nombre, ids[nombre], inicio, min(inicio + bloque, total + 1))
+                   for inicio in range(1, total + 1, bloque)] or [(nombre, ids[nombre], 1, 1)]
+
+    pendientes = Counter(nombre for nombre, _, _, _ in rangos)
+    registros = dict.fromkeys(pendientes, 0)
+    errores: Dict[str, Dict[str, Tuple[int, List[int]]]] = {nombre: {} for nombre in pendientes}
+    for nombre, (leidos, por_tipo) in _ejecutar(gdb, rangos, procesos, bloque):
+        registros[nombre] += leidos
+        for tipo, (cantidad, muestra) in por_tipo.items():
+            total, anterior = errores[nombre].get(tipo, (0, []))
+            errores[nombre][tipo] = (total + cantidad, sorted(anterior + muestra)[:muestras_geometria])
+        pendientes[nombre] -= 1
+        if pendientes[nombre]:
+            continue
+        leidos, por_tipo = registros.pop(nombre), errores.pop(nombre)
+        if not por_tipo:
+            yield nombre, None, leidos, 0, []
+        for tipo in sorted(por_tipo):
+            yield (nombre, tipo, leidos, *por_tipo[tipo])
+
+
+def _ejecutar(gdb, rangos: List[Tuple[str, int, int, int]], procesos: int,
+              bloque: int) -> Iterator[Tuple[str, Tuple[int, Dict[str, Tuple[int, List[int]]]]]]:
+    """
+    Resultado de validar_bloque de cada rango, en el proceso o repartido en el pool.
+    """
+    if procesos <= 1 or sum(fin - inicio for _, _, inicio, fin in rangos) <= bloque:
+        for (nombre, table_id), de_tabla in groupby(rangos, key=lambda rango: rango[:2]):
+            with GdbTable.open(gdb, table_id, nombre) as table:
+                for _, _, inicio, fin in de_tabla:
+                    yield nombre, validar_bloque(table, inicio, fin)
+        return
+
+    # A lo sumo dos bloques por proceso en vuelo: los resultados se agregan a medida que llegan
+    with ProcessPoolExecutor(max_workers=procesos, mp_context=mp.get_context('spawn')) as pool:
+        en_curso = {}
+        for nombre, table_id, inicio, fin in rangos:
+            en_curso[pool.submit(_validar_bloque_ruta, gdb.path, table_id, nombre, inicio, fin)] = nombre
+            if len(en_curso) < 2 * procesos:
+                continue
+            terminados, _ = wait(en_curso, return_when=FIRST_COMPLETED)
+            for futuro in terminados:
+                yield en_curso.pop(futuro), futuro.result()
+        for futuro in wait(en_curso).done:
+            yield en_curso.pop(futuro), futuro.result()
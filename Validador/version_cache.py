@@ -0,0 +1,157 @@
+"""
+Caché en disco del catálogo de la versión del MDG, compartida por los procesos del worker.
+
+Cada entrada es un pickle con la firma de la base de datos con que se generó. Mientras el archivo
+sea más reciente que VALW_CACHE_TTL segundos se usa sin consultar la base de datos; después se
+compara la firma (una sola consulta) y solo si cambió se vuelve a leer el catálogo completo.
+
+La firma resume el contenido de las tablas de referencia (cantidad de filas y suma de ORA_HASH
+de las columnas que se leen), de modo que cambiar un alias, un tipo o un SRSCODE la cambia
+aunque las cantidades sigan iguales. En SQLite ORA_HASH lo registra crear_engine.
+
+Cargar un pickle ejecuta código, así que VALW_CACHE_DIR debe ser una carpeta que solo pueda
+escribir el usuario del proceso: se crea con permisos 0700 y, si ya existe, debe ser de ese
+usuario y no admitir escritura de otros (en Windows la carpeta temporal ya es del usuario).
+"""
+import hashlib
+import os
+import pickle
+import stat
+import tempfile
+import time
+
+from typing import Any, Callable, Dict, List, Optional
+
+cache_dir = os.getenv('VALW_CACHE_DIR', os.path.join(tempfile.gettempdir(), 'validador_web_cache'))
+cache_ttl = float(os.getenv('VALW_CACHE_TTL', '300'))
+
+# Tablas de referencia del catálogo y columnas que leen version_info y _get_srs
+TABLAS_FIRMA: Dict[str, List[str]] = {
+    'MJEREZ.VALW_DATASETS': ['NOMBRE', 'VERSION_ID', 'SRS_ID', 'OBLIGATORIO'],
+    'MJEREZ.VALW_SRS': ['ID', 'SRSCODE', 'NOMBRE', 'VERSION_ID'],
+    'VALW_OBJETOS_TOTALES': ['GRUPO_DATASET', 'NOMBRE_OBJETO'],
+    'VALW_VALIDAR_TABLAS': ['FICHAX'],
+    'VALW_OBJ_OBLIGATORIOS': ['NOMBRE_CAPA', 'DOCUMENTO_TECNICO', 'ETAPA'],
+    'MJEREZ.VALW_OBJETOS_ATRIBUTOS': ['NOMBRE', 'ALIAS', 'GEOMETRIA', 'CODIGO_OBJETO', 'NOMBRE_ATRIBUTO',
+                                      'ALIAS_ATRIBUTO', 'CODIGO_ATRIBUTO', 'TIPO_ATRIBUTO', 'TAMANO_ATRIBUTO',
+                                      'DOMINIO', 'OBLIGACION'],
+}
+
+
+def _sql_contenido(tabla: str, columnas: List[str]) -> str:
+    """
+    Subconsulta 'filas:suma de hashes' de una tabla; no depende del orden de las filas.
+    """
+    # col || '' convierte a texto en ambos dialectos; los nulos quedan como ''
+    fila = " || '|' || ".join(f"COALESCE({columna} || '', '')" for columna in columnas)
+    return f"(SELECT COUNT(*) || ':' || COALESCE(SUM(ORA_HASH({fila})), 0) FROM {tabla})"
+
+
+_CONTENIDOS = ',\n        '.join(f'{_sql_contenido(tabla, columnas)} AS CONTENIDO_{numero}'
+                                 for numero, (tabla, columnas) in enumerate(TABLAS_FIRMA.items(), start=1))
+
+SQL_FIRMA = f"""SELECT MAX(VER.ID) AS ID_VERSION,
+        {_CONTENIDOS}
+    FROM MJEREZ.VALW_VERSION VER
+    WHERE VER.VERSION = :version"""
+
+
+def firma_version(connection, version: str) -> str:
+    """
+    Firma del catálogo de referencia: ID de la versión y, de cada tabla, cantidad de registros y
+    suma de los hashes de su contenido.
+
+    Args:
+        connection: capa de acceso a datos (BaseDatos).
+        version str: versión del MDG.
+    Returns:
+        str
+    """
+    df = connection.consultar(SQL_FIRMA, version=version)
+    return '|'.join(str(value) for value in df.iloc[0].tolist())
+
+
+def clave(*partes: str) -> str:
+    """
+    Nombre de archivo seguro para una entrada de la caché.
+    """
+    texto = '|'.join(str(parte) for parte in partes)
+    return f'{partes[0]}_{hashlib.sha1(texto.encode("utf-8")).hexdigest()[:16]}'
+
+
+def en_cache(nombre: str, firma: Callable[[], str], consultar: Callable[[], Any],
+             ttl: Optional[float] = None) -> Any:
+    """
+    Devuelve los datos de la entrada `nombre`, consultándolos solo si la caché no es válida.
+
+    Args:
+        nombre str: nombre de la entrada, ver clave.
+        firma Callable[[], str]: calcula la firma actual en la base de datos.
+        consultar Callable[[], Any]: lee los datos de la base de datos.
+        ttl float: segundos durante los que la entrada se usa sin comprobar la firma.
+    Returns:
+        Any: los datos en caché o recién consultados.
+    """
+    ttl = cache_ttl if ttl is None else ttl
+    path = os.path.join(cache_dir, f'{nombre}.pkl')
+    entrada = _leer(path)
+    if entrada is not None:
+        if time.time() - os.path.getmtime(path) < ttl:
+            return entrada['datos']
+        firma_actual = firma()
+        if entrada['firma'] == firma_actual:
+            os.utime(path)
+            return entrada['datos']
+    else:
+        firma_actual = firma()
+    datos = consultar()
+    _escribir(path, {'firma': firma_actual, 'datos': datos})
+    return datos
+
+
+def directorio_privado(directorio: str) -> str:
+    """
+    Crea `directorio` con permisos 0700 si no existe y comprueba que solo el usuario del proceso
+    pueda escribir en él, antes de leer o escribir pickles ahí.
+
+    Raises:
+        PermissionError: si es un enlace, es de otro usuario o otros pueden escribir en él.
+    """
+    os.makedirs(directorio, mode=0o700, exist_ok=True)
+    if not hasattr(os, 'getuid'):
+        return directorio
+    estado = os.lstat(directorio)
+    if (not stat.S_ISDIR(estado.st_mode) or estado.st_uid != os.getuid()
+            or estado.st_mode & (stat.S_IWGRP | stat.S_IWOTH)):
+        raise PermissionError(f'La caché {directorio} debe ser una carpeta del usuario del proceso sin permisos de '
+                              f'escritura para otros; use otra carpeta con VALW_CACHE_DIR.')
+    return directorio
+
+
+def invalidar_cache() -> None:
+    """
+    Borra todas las entradas de la caché, p. ej. al publicar una versión del MDG.
+    """
+    if not os.path.isdir(cache_dir):
+        return
+    for archivo in os.listdir(cache_dir):
+        if archivo.endswith('.pkl'):
+            os.remove(os.path.join(cache_dir, archivo))
+
+
+def _leer(path: str) -> Optional[dict]:
+    directorio_privado(os.path.dirname(path))
+    try:
+        with open(path, 'rb') as archivo:
+            return pickle.load(archivo)
+    except (OSError, EOFError, pickle.UnpicklingError):
+        return None
+
+
+def _escribir(path: str, entrada: dict) -> None:
+    # Se escribe en un temporal y se reemplaza para que otro proceso nunca lea un archivo a medias
+    directorio_privado(cache_dir)
+    descriptor, temporal = tempfile.mkstemp(dir=cache_dir, suffix='.tmp')
+    with os.fdopen(descriptor, 'wb') as archivo:
+        pickle.dump(entrada, archivo, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(temporal, path)
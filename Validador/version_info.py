@@ -1,14 +1,7 @@
-import arcpy
-import os
-import sys
-import pandas as pd
-
-
-from importlib.resources import path
 from typing import List, Dict
-from zipfile import ZipFile
 
-from database.connection import pd_upper_columns
+from utils.arcgis import arcpy
+
 
 def get_version_datasets(connection) -> Dict[str, List[str]]:
     """
@@ -22,7 +15,7 @@ def get_version_datasets(connection) -> Dict[str, List[str]]:
             ON DS.SRS_ID = SRS.ID
 
         """
-    df = pd_upper_columns(sql, connection=connection)   
+    df = connection.consultar(sql)   
     arcpy.AddMessage(F"1.1 Version_Datasets: {df.shape[0]}")
     return df
 
@@ -33,7 +26,7 @@ def get_version_feature_classes(connection) -> List[str]:
     """
     sql = """SELECT GRUPO_DATASET, NOMBRE_OBJETO 
         FROM VALW_OBJETOS_TOTALES vot"""
-    df = pd_upper_columns(sql, connection=connection)
+    df = connection.consultar(sql)
     arcpy.AddMessage(F"1.2 Version_Feature_Classes: {df.shape[0]}")
     
     return df
@@ -46,7 +39,7 @@ def get_version_tables(connection) -> List[str]:
     """
     sql = f"""SELECT DISTINCT FICHAX 
         FROM VALW_VALIDAR_TABLAS"""
-    df = pd_upper_columns(sql, connection=connection)
+    df = connection.consultar(sql)
     
     arcpy.AddMessage(F"1.3 Version_Tables: {df.shape[0]}")
     
@@ -58,10 +51,8 @@ def get_version_required(connection, document, stage) -> List[str]:
 
     This function is used to get the base required feature classes it would be better to read this from DB
     """
-    required_fc = []
-    with connection.cursor() as cur:
-        for row in cur.execute("""SELECT voo.NOMBRE_CAPA FROM VALW_OBJ_OBLIGATORIOS voo WHERE voo.DOCUMENTO_TECNICO = :document AND voo.ETAPA = :stage""", document=document, stage=stage):
-            required_fc.append(row[0])
+    sql = """SELECT voo.NOMBRE_CAPA FROM VALW_OBJ_OBLIGATORIOS voo WHERE voo.DOCUMENTO_TECNICO = :document AND voo.ETAPA = :stage"""
+    required_fc = connection.consultar(sql, document=document, stage=stage)['NOMBRE_CAPA'].tolist()
     
     arcpy.AddMessage(f"1.4 Version_Required_Feature_Class: {len(required_fc)}")
     
@@ -78,7 +69,7 @@ def get_version_attributes(connection) -> Dict[str, List[str]]:
         voa.ALIAS_ATRIBUTO, voa.CODIGO_ATRIBUTO, voa.TIPO_ATRIBUTO, voa.TAMANO_ATRIBUTO, 
         voa.DOMINIO, voa.OBLIGACION 
         FROM MJEREZ.VALW_OBJETOS_ATRIBUTOS voa"""
-    df = pd_upper_columns(sql, connection=connection)
+    df = connection.consultar(sql)
     arcpy.AddMessage(F"1.5 Version_Feature_Attributes: {df.shape[0]}")
     
     return df
\ No newline at end of file
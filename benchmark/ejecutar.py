@@ -0,0 +1,273 @@
+"""
+Benchmark del validador sin Oracle, ArcGIS Server ni el servicio WFS de la ANM.
+
+Genera una gdb sintética a la escala pedida, una base SQLite con el esquema MJEREZ y un WFS
+local, y mide cada cargador y validador de Validador/validator_web.py, la escritura de mensajes
+y validar_gdb completo. El resultado es un JSON con la latencia (mínima, mediana, media y
+máxima de las repeticiones), el rendimiento (unidades por segundo sobre la mediana) y el pico
+de memoria de cada etapa, para comparar entre versiones.
+
+Uso:
+    python -m benchmark.ejecutar --feature-classes 200 --campos 12 --filas 1000 --salida bench.json
+"""
+import argparse
+import gc
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from typing import Any, Callable, Dict, List, Optional
+
+from benchmark.entorno import ServidorTitulos, crear_base
+from benchmark.gdb_sintetica import comprimir_gdb, generar_gdb
+
+# Polígono de DELIMIT_PROYEC_PG y del título en el WFS local
+DELIMITACION = [[(-74.0, 4.0), (-74.0, 4.01), (-73.99, 4.01), (-73.99, 4.0), (-74.0, 4.0)]]
+EXPEDIENTE = 'BEN-00001'
+VERSION = '1'
+DOCUMENTO_TECNICO = 'FBM'
+ETAPA = 'Exploración'
+
+
+class Medidor:
+    """
+    Mide etapas: `repeticiones` ejecuciones cronometradas y una más con tracemalloc para el pico
+    de memoria, que no se cuenta en los tiempos.
+    """
+
+    def __init__(self, repeticiones: int):
+        self.repeticiones = repeticiones
+        self.etapas: Dict[str, Dict[str, Any]] = {}
+
+    def medir(self, nombre: str, funcion: Callable[[], Any], unidades: Optional[Callable[[Any], int]] = None,
+              unidad: str = 'registros') -> Any:
+        """
+        Args:
+            nombre str: nombre de la etapa en el JSON.
+            funcion Callable[[], Any]: etapa a medir.
+            unidades Callable[[Any], int]: cantidad procesada a partir del resultado, para el rendimiento.
+            unidad str: qué se cuenta en `unidades`.
+        Returns:
+            Any: resultado de la última ejecución.
+        """
+        tiempos = []
+        resultado = None
+        for _ in range(self.repeticiones):
+            gc.collect()
+            inicio = time.perf_counter()
+            resultado = funcion()
+            tiempos.append(time.perf_counter() - inicio)
+
+        gc.collect()
+        tracemalloc.start()
+        try:
+            funcion()
+            _, pico = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+
+        mediana = statistics.median(tiempos)
+        etapa = {
+            'segundos': {
+                'min': min(tiempos),
+                'mediana': mediana,
+                'media': statistics.fmean(tiempos),
+                'max': max(tiempos),
+            },
+            'memoria_pico_mb': pico / 2 ** 20,
+        }
+        if unidades is not None:
+            cantidad = int(unidades(resultado))
+            etapa['unidades'] = {'cantidad': cantidad, 'unidad': unidad}
+            etapa['rendimiento_por_segundo'] = cantidad / mediana if mediana else None
+        self.etapas[nombre] = etapa
+        print(f'{nombre}: {mediana * 1000:.1f} ms', file=sys.stderr)
+        return resultado
+
+
+def ejecutar(args: argparse.Namespace) -> Dict[str, Any]:
+    directorio = args.directorio or tempfile.mkdtemp(prefix='valw_bench_')
+    os.makedirs(directorio, exist_ok=True)
+    carpeta = os.path.join(directorio, f'{EXPEDIENTE}_20240101.gdb')
+    inicio = time.perf_counter()
+    objetos = generar_gdb(carpeta, args.datasets, args.feature_classes, args.campos, args.filas,
+                          tablas=args.tablas, delimitacion=DELIMITACION, semilla=args.semilla,
+                          expediente=EXPEDIENTE)
+    ruta_gdb = comprimir_gdb(carpeta, f'{carpeta}.zip') if args.zip else carpeta
+    generacion = time.perf_counter() - inicio
+
+    ruta_bd = os.path.join(directorio, 'valw.db')
+    if os.path.exists(ruta_bd):
+        os.remove(ruta_bd)
+    crear_base(ruta_bd, objetos, [ruta_gdb], version=VERSION, documento_tecnico=DOCUMENTO_TECNICO, etapa=ETAPA)
+
+    with ServidorTitulos(DELIMITACION, retardo=args.retardo_wfs) as wfs:
+        # La configuración del validador se lee de variables de entorno al importar sus módulos
+        os.environ['DB_URL'] = f'sqlite:///{ruta_bd}'
+        os.environ['VALW_ANM_WFS_URL'] = wfs.url
+        os.environ['VALW_CACHE_DIR'] = os.path.join(directorio, 'cache')
+        # Cada consulta del título se revalida contra el WFS local, como con la caché vencida
+        os.environ['VALW_ANM_TTL'] = '0'
+        etapas = _medir_validador(Medidor(args.repeticiones), ruta_gdb)
+        consultas_wfs = wfs.consultas
+
+    return {
+        'parametros': {
+            'datasets': args.datasets,
+            'feature_classes': args.feature_classes,
+            'campos': args.campos,
+            'filas': args.filas,
+            'tablas': args.tablas,
+            'zip': args.zip,
+            'repeticiones': args.repeticiones,
+            'retardo_wfs': args.retardo_wfs,
+            'semilla': args.semilla,
+        },
+        'entorno': _entorno(),
+        'gdb': {
+            'ruta': ruta_gdb,
+            'bytes': _tamano(ruta_gdb),
+            'generacion_segundos': generacion,
+        },
+        'consultas_wfs': consultas_wfs,
+        'etapas': etapas,
+        'rss_max_mb': _rss_max_mb(),
+    }
+
+
+def _medir_validador(medidor: Medidor, ruta_gdb: str) -> Dict[str, Dict[str, Any]]:
+    from database.connection import bd
+    from database.mensajes import EscritorMensajes, borrar_mensajes
+    from Validador.filegdb import open_workspace
+    from Validador.comparacion import recolectar
+    from Validador.gdb_catalog import read_catalog
+    from Validador.pipeline import cargar_catalogo_version, validar_gdb
+    from Validador.validator_web import (domain_values, expedient_code, feature_attributes,
+                                         feature_containment, geometry_validity, get_catalog,
+                                         get_feature_attributes, quantity_dataset, quantity_feature_class,
+                                         quantity_required, quantity_tables, reference_system, spatial_matching)
+
+    id_gdb = 1
+    catalogo = medidor.medir(
+        'cargar_catalogo_version',
+        lambda: cargar_catalogo_version(bd, DOCUMENTO_TECNICO, ETAPA, VERSION, usar_cache=False),
+        lambda catalogo: len(catalogo.feature_classes) + len(catalogo.atributos), 'registros de la versión')
+
+    with open_workspace(ruta_gdb) as workspace:
+        catalog = medidor.medir('read_catalog', lambda: read_catalog(workspace), len, 'ítems')
+        ds, fc, tbl = medidor.medir('get_catalog', lambda: get_catalog(catalog),
+                                    lambda listas: sum(map(len, listas)), 'objetos')
+        attributes = medidor.medir(
+            'get_feature_attributes',
+            lambda: get_feature_attributes(workspace, catalog, catalogo.feature_classes, fc), len, 'campos')
+        medidor.medir('lectura_columnas', lambda: _leer_columnas(workspace, catalog), lambda filas: filas, 'filas')
+
+        validadores = {
+            'spatial_matching': lambda: spatial_matching(bd, id_gdb, EXPEDIENTE, workspace, catalog),
+            'feature_containment': lambda: recolectar(feature_containment(bd, id_gdb, workspace, catalog)),
+            'reference_system': lambda: reference_system(VERSION, bd, id_gdb, catalogo.datasets, ds),
+            'quantity_dataset': lambda: quantity_dataset(bd, id_gdb, catalogo.datasets, ds),
+            'quantity_feature_class': lambda: quantity_feature_class(bd, id_gdb, catalogo.feature_classes, fc),
+            'quantity_tables': lambda: quantity_tables(bd, id_gdb, catalogo.tablas, tbl),
+            'quantity_required': lambda: quantity_required(bd, id_gdb, catalogo.obligatorios, fc),
+            'feature_attributes': lambda: feature_attributes(bd, id_gdb, catalogo.atributos, attributes),
+            'domain_values': lambda: recolectar(domain_values(bd, id_gdb, workspace, catalog, attributes)),
+            'geometry_validity': lambda: recolectar(geometry_validity(bd, id_gdb, workspace, catalog, attributes)),
+            'expedient_code': lambda: recolectar(expedient_code(bd, id_gdb, EXPEDIENTE, workspace, catalog)),
+        }
+        mensajes = [medidor.medir(nombre, validador, len, 'mensajes') for nombre, validador in validadores.items()]
+
+    def escribir(plantillas: bool):
+        with EscritorMensajes(bd, id_gdb, plantillas=plantillas) as escritor:
+            borrar_mensajes(escritor.conexion, id_gdb)
+            for df in mensajes:
+                escritor.agregar_df(df)
+        return escritor.total
+
+    medidor.medir('escritura_mensajes', lambda: escribir(False), lambda total: total, 'mensajes')
+    # Los mismos mensajes como plantilla y parámetros, leídos luego con VALW_GDB_MENSAJE_TEXTO
+    medidor.medir('escritura_plantillas', lambda: escribir(True), lambda total: total, 'mensajes')
+    medidor.medir('validar_gdb', lambda: validar_gdb(bd, id_gdb, ruta_gdb, EXPEDIENTE, VERSION, catalogo,
+                                                     incremental=False))
+    # Segunda carga sin cambios: solo se recalculan las huellas
+    medidor.medir('validar_gdb_incremental', lambda: validar_gdb(bd, id_gdb, ruta_gdb, EXPEDIENTE, VERSION,
+                                                                 catalogo, incremental=True))
+    return medidor.etapas
+
+
+def _leer_columnas(workspace, catalog) -> int:
+    """
+    Lee todas las columnas de atributos de todas las tablas, como lo haría un validador de contenido.
+    """
+    from Validador.filegdb import FGFT_GEOMETRY, FGFT_OBJECTID, GdbTable
+    from Validador.gdb_catalog import table_ids
+
+    filas = 0
+    for nombre, table_id in table_ids(catalog).items():
+        with GdbTable.open(workspace, table_id, nombre) as table:
+            campos = [field.name for field in table.fields if field.type not in (FGFT_OBJECTID, FGFT_GEOMETRY)]
+            for bloque in table.read_columns(campos):
+                filas += len(bloque)
+    return filas
+
+
+def _entorno() -> Dict[str, str]:
+    import numpy
+    import pandas
+    return {
+        'python': platform.python_version(),
+        'plataforma': platform.platform(),
+        'procesador': platform.processor() or platform.machine(),
+        'cpus': str(os.cpu_count()),
+        'numpy': numpy.__version__,
+        'pandas': pandas.__version__,
+    }
+
+
+def _tamano(ruta: str) -> int:
+    if os.path.isfile(ruta):
+        return os.path.getsize(ruta)
+    return sum(os.path.getsize(os.path.join(ruta, nombre)) for nombre in os.listdir(ruta))
+
+
+def _rss_max_mb() -> Optional[float]:
+    try:
+        import resource
+    except ImportError:
+        # Windows: sin getrusage
+        return None
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Kilobytes en Linux, bytes en macOS
+    return rss / 2 ** 20 if sys.platform == 'darwin' else rss / 2 ** 10
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description='Benchmark del validador con datos sintéticos')
+    parser.add_argument('--datasets', type=int, default=5, help='feature datasets de la gdb')
+    parser.add_argument('--feature-classes', type=int, default=50, help='feature classes de la gdb')
+    parser.add_argument('--campos', type=int, default=10, help='campos de atributos por feature class')
+    parser.add_argument('--filas', type=int, default=1000, help='registros por feature class y tabla')
+    parser.add_argument('--tablas', type=int, default=5, help='tablas sin geometría')
+    parser.add_argument('--zip', action='store_true', help='validar el .gdb.zip en lugar de la carpeta')
+    parser.add_argument('--repeticiones', type=int, default=3, help='ejecuciones cronometradas por etapa')
+    parser.add_argument('--retardo-wfs', type=float, default=0.0, help='segundos de latencia del WFS local')
+    parser.add_argument('--semilla', type=int, default=0)
+    parser.add_argument('--directorio', help='carpeta de trabajo, por defecto una temporal')
+    parser.add_argument('--salida', help='archivo JSON del resultado, por defecto la salida estándar')
+    args = parser.parse_args(argv)
+
+    resultado = json.dumps(ejecutar(args), indent=2, ensure_ascii=False)
+    if args.salida:
+        with open(args.salida, 'w', encoding='utf-8') as archivo:
+            archivo.write(resultado)
+    else:
+        print(resultado)
+
+
+if __name__ == '__main__':
+    main()
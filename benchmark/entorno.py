@@ -0,0 +1,154 @@
+"""
+Servicios locales para el benchmark: una base SQLite con las tablas del esquema MJEREZ que usa
+el validador y un servicio WFS de títulos de la ANM que responde desde memoria.
+"""
+import json
+import sqlite3
+import threading
+import time
+
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import List, Optional, Sequence, Tuple
+
+from benchmark.gdb_sintetica import DOMINIOS, Objeto, SRSCODE, TIPOS_CAMPO
+from Validador.plantillas import sql_vista_mensajes
+
+VALIDADORES = ['SISTEMA DE REFERENCIA', 'DATASETS', 'FEATURE CLASSES', 'TABLAS', 'ATRIBUTOS', 'ESPACIAL',
+               'OBLIGATORIEDAD']
+ESTADOS = ['Sin iniciar', 'En proceso', 'Finalizado', 'Error']
+
+DDL = """
+CREATE TABLE VALW_ESTADO_PROCESO (ID_ESTADO_PROCESO INTEGER PRIMARY KEY, ESTADO TEXT);
+CREATE TABLE VALW_GDBS_VALIDAR (ID INTEGER PRIMARY KEY, RUTA TEXT, ESTADO_ID INTEGER, ARRENDADO_POR TEXT,
+    ARRENDADO_HASTA TEXT, INTENTOS INTEGER DEFAULT 0);
+CREATE TABLE VALW_GDB_MENSAJE (GDB_ID INTEGER, MENSAJE_VAL TEXT, VALIDADOR_ID INTEGER, ESTA_BIEN INTEGER,
+    PLANTILLA_ID INTEGER, PARAM_1 TEXT, PARAM_2 TEXT, PARAM_3 TEXT, PARAM_4 TEXT, PARAM_5 TEXT, PARAM_6 TEXT);
+CREATE INDEX VALW_GDB_MENSAJE_GDB ON VALW_GDB_MENSAJE (GDB_ID, VALIDADOR_ID);
+CREATE INDEX VALW_GDB_MENSAJE_PLANTILLA ON VALW_GDB_MENSAJE (PLANTILLA_ID, ESTA_BIEN);
+CREATE TABLE VALW_MENSAJE_PLANTILLA (ID INTEGER PRIMARY KEY, TEXTO TEXT);
+CREATE TABLE VALW_GDB_HUELLA (GDB_ID INTEGER, TIPO TEXT, OBJETO TEXT, HUELLA TEXT,
+    PRIMARY KEY (GDB_ID, TIPO, OBJETO));
+CREATE TABLE VALW_GDB_TIEMPOS (GDB_ID INTEGER, EXPEDIENTE TEXT, ETAPA TEXT, SEGUNDOS REAL, BD_SEGUNDOS REAL,
+    BD_CONSULTAS INTEGER, BD_FILAS INTEGER, BYTES_GDB INTEGER, REGISTROS INTEGER,
+    FECHA TEXT DEFAULT CURRENT_TIMESTAMP);
+CREATE TABLE VALW_DOM_VALIDADORES (ID INTEGER PRIMARY KEY, DESCRIPCION TEXT);
+CREATE TABLE VALW_VERSION (ID INTEGER PRIMARY KEY, VERSION TEXT);
+CREATE TABLE VALW_SRS (ID INTEGER PRIMARY KEY, SRSCODE INTEGER, NOMBRE TEXT, VERSION_ID INTEGER);
+CREATE TABLE VALW_DATASETS (NOMBRE TEXT, VERSION_ID INTEGER, SRS_ID INTEGER, OBLIGATORIO INTEGER);
+CREATE TABLE VALW_OBJETOS_TOTALES (GRUPO_DATASET TEXT, NOMBRE_OBJETO TEXT);
+CREATE TABLE VALW_VALIDAR_TABLAS (FICHAX TEXT);
+CREATE TABLE VALW_OBJ_OBLIGATORIOS (NOMBRE_CAPA TEXT, DOCUMENTO_TECNICO TEXT, ETAPA TEXT);
+CREATE TABLE VALW_OBJETOS_ATRIBUTOS (NOMBRE TEXT, ALIAS TEXT, GEOMETRIA TEXT, CODIGO_OBJETO TEXT,
+    NOMBRE_ATRIBUTO TEXT, ALIAS_ATRIBUTO TEXT, CODIGO_ATRIBUTO TEXT, TIPO_ATRIBUTO TEXT,
+    TAMANO_ATRIBUTO INTEGER, DOMINIO TEXT, OBLIGACION TEXT);
+"""
+
+
+def crear_base(ruta: str, objetos: Sequence[Objeto], gdbs: Sequence[str], version: str = '1',
+               documento_tecnico: str = 'FBM', etapa: str = 'Exploración', faltantes: float = 0.05) -> None:
+    """
+    Crea la base SQLite con el catálogo de una versión del MDG armado a partir de los objetos de
+    la gdb sintética.
+
+    La versión espera todos los objetos de la gdb más una fracción `faltantes` que la gdb no
+    tiene, para que los validadores produzcan mensajes de ambos tipos.
+
+    Args:
+        ruta str: archivo SQLite a crear.
+        objetos Sequence[Objeto]: feature classes y tablas de la gdb (ver generar_gdb).
+        gdbs Sequence[str]: rutas a registrar en VALW_GDBS_VALIDAR como 'Sin iniciar'.
+        version str: versión del MDG.
+        documento_tecnico str: documento técnico de la obligatoriedad.
+        etapa str: etapa de la obligatoriedad.
+        faltantes float: fracción de objetos de la versión ausentes de la gdb.
+    """
+    features = [objeto for objeto in objetos if objeto.tipo == 'Feature Class']
+    tablas = [objeto.nombre for objeto in objetos if objeto.tipo == 'Table']
+    datasets = list(dict.fromkeys(objeto.dataset for objeto in features))
+    n_faltantes = max(1, int(len(features) * faltantes))
+    ausentes = [(datasets[i % len(datasets)], f'FALTANTE_{i:04d}_PG') for i in range(n_faltantes)]
+    esperados = [(objeto.dataset, objeto.nombre) for objeto in features] + ausentes
+
+    atributos = []
+    for objeto in features:
+        for codigo, campo in enumerate(objeto.campos, start=1):
+            if campo.nombre in ('OBJECTID', 'SHAPE'):
+                continue
+            tipo = next(nombre for valor, nombre, _ in TIPOS_CAMPO if valor == campo.tipo)
+            dominio = DOMINIOS.get(campo.tipo, 'N/A') if campo.nombre != 'COD_EXPEDIENTE' else 'N/A'
+            atributos.append((objeto.nombre, objeto.nombre.title(), 'Polygon', objeto.nombre, campo.nombre,
+                              campo.alias, str(codigo), tipo, campo.longitud, dominio, 'Opcional'))
+    atributos += [(nombre, nombre.title(), 'Polygon', nombre, 'COD_EXPEDIENTE', 'Cod Expediente', '1',
+                   'String', 50, 'N/A', 'Obligatorio') for _, nombre in ausentes]
+
+    with sqlite3.connect(ruta) as conn:
+        conn.executescript(DDL)
+        conn.execute(sql_vista_mensajes(prefijo=''))
+        conn.executemany('INSERT INTO VALW_ESTADO_PROCESO VALUES (?, ?)', enumerate(ESTADOS, start=1))
+        conn.executemany('INSERT INTO VALW_GDBS_VALIDAR (RUTA, ESTADO_ID) VALUES (?, 1)', [(gdb,) for gdb in gdbs])
+        conn.executemany('INSERT INTO VALW_DOM_VALIDADORES VALUES (?, ?)', enumerate(VALIDADORES, start=1))
+        conn.execute('INSERT INTO VALW_VERSION VALUES (1, ?)', (version,))
+        conn.execute('INSERT INTO VALW_SRS VALUES (1, ?, ?, 1)', (SRSCODE, 'MAGNA-SIRGAS'))
+        conn.executemany('INSERT INTO VALW_DATASETS VALUES (?, 1, 1, 1)', [(nombre,) for nombre in datasets])
+        conn.executemany('INSERT INTO VALW_OBJETOS_TOTALES VALUES (?, ?)', esperados)
+        conn.executemany('INSERT INTO VALW_VALIDAR_TABLAS VALUES (?)',
+                         [(nombre,) for nombre in tablas + ['Ficha_Faltante']])
+        conn.executemany('INSERT INTO VALW_OBJ_OBLIGATORIOS VALUES (?, ?, ?)',
+                         [(nombre, documento_tecnico, etapa) for _, nombre in esperados[::2]])
+        conn.executemany('INSERT INTO VALW_OBJETOS_ATRIBUTOS VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)', atributos)
+
+
+class ServidorTitulos:
+    """
+    WFS local que responde cualquier GetFeature con un título cuyo polígono es `anillos`.
+
+    Responde 304 a las peticiones condicionales con el ETag vigente, como el servicio de la ANM.
+
+    Args:
+        anillos: anillos del título en grados (sentido Esri).
+        retardo float: segundos de espera por petición, para simular la latencia del servicio.
+    """
+
+    def __init__(self, anillos: List[List[Tuple[float, float]]], retardo: float = 0.0):
+        self.consultas = 0
+        cuerpo = json.dumps({
+            'geometryType': 'esriGeometryPolygon',
+            'spatialReference': {'wkid': SRSCODE, 'latestWkid': SRSCODE},
+            'features': [{'attributes': {'CODIGO_EXPEDIENTE': 'SINTETICO'},
+                          'geometry': {'rings': anillos}}]}).encode('utf-8')
+        servidor = self
+
+        class Manejador(BaseHTTPRequestHandler):
+            def do_GET(self):
+                servidor.consultas += 1
+                if retardo:
+                    time.sleep(retardo)
+                if self.headers.get('If-None-Match') == '"1"':
+                    self.send_response(304)
+                    self.end_headers()
+                    return
+                self.send_response(200)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('ETag', '"1"')
+                self.send_header('Content-Length', str(len(cuerpo)))
+                self.end_headers()
+                self.wfile.write(cuerpo)
+
+            def log_message(self, *args):
+                pass
+
+        self._http = ThreadingHTTPServer(('127.0.0.1', 0), Manejador)
+        self._hilo: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        return f'http://127.0.0.1:{self._http.server_port}/'
+
+    def __enter__(self) -> 'ServidorTitulos':
+        self._hilo = threading.Thread(target=self._http.serve_forever, daemon=True)
+        self._hilo.start()
+        return self
+
+    def __exit__(self, *args) -> None:
+        self._http.shutdown()
+        self._http.server_close()
@@ -0,0 +1,404 @@
+"""
+Generador de File Geodatabases sintéticas para el benchmark.
+
+Escribe el subconjunto del formato (.gdbtable / .gdbtablx versión 10.x) que lee
+Validador/filegdb.py: las tablas del sistema GDB_SystemCatalog, GDB_Items y GDB_ItemTypes y
+feature classes de polígonos con campos de texto, enteros, dobles y fechas. Los campos de texto
+y enteros de las feature classes tienen un dominio (ver DOMINIOS) que una parte de los valores
+no cumple, una de cada CADA_AUTOINTERSECCION geometrías se cruza a sí misma y uno de cada
+CADA_EXPEDIENTE_ERRADO registros tiene otro COD_EXPEDIENTE. Así el benchmark mide los mismos
+lectores que en producción sin ArcGIS ni gdbs reales.
+"""
+import os
+import shutil
+import struct
+import uuid
+import zipfile
+import numpy as np
+
+from datetime import datetime
+from typing import Any, List, NamedTuple, Optional, Sequence, Tuple
+
+from Validador.filegdb import (FGFT_DATETIME, FGFT_FLOAT64, FGFT_GEOMETRY, FGFT_GUID, FGFT_INT32, FGFT_OBJECTID,
+                               FGFT_STRING, FGFT_XML, table_file_name)
+
+# UUID de GDB_ItemTypes de los tipos de ítem que genera el benchmark
+TIPOS_ITEM = {
+    'Workspace': '{C673FE0F-7280-404F-8532-20755DD8FC06}',
+    'Feature Dataset': '{74737149-DCB5-4257-8904-B9724E32A530}',
+    'Feature Class': '{70737809-852C-4A03-9E22-2CECEA5B9BFA}',
+    'Table': '{CD06BC3B-789D-4C51-AAFA-A467912B8965}',
+    'Coded Value Domain': '{8C368B12-A12E-4C7E-9638-C9C64E69E98F}',
+    'Range Domain': '{C29DA988-8C3E-45F7-8B5C-18E51EE7BEB4}',
+}
+TABLAS_SISTEMA = ['GDB_SystemCatalog', 'GDB_DBTune', 'GDB_SpatialRefs', 'GDB_Items', 'GDB_ItemTypes',
+                  'GDB_ItemRelationships', 'GDB_ItemRelationshipTypes', 'GDB_ReplicaLog']
+
+SRSCODE = 4686
+WKT = ('GEOGCS["GCS_MAGNA",DATUM["D_MAGNA",SPHEROID["GRS_1980",6378137.0,298.257222101]],'
+       'PRIMEM["Greenwich",0.0],UNIT["Degree",0.0174532925199433],AUTHORITY["EPSG",4686]]')
+XORIGIN = YORIGIN = -400.0
+XYSCALE = 1e9
+XYTOLERANCE = 8.983152841195214e-09
+
+# Tipos de los campos de atributos, en rotación: (tipo, nombre arcpy, longitud)
+TIPOS_CAMPO = [(FGFT_STRING, 'String', 50), (FGFT_INT32, 'Integer', 4),
+               (FGFT_FLOAT64, 'Double', 8), (FGFT_DATETIME, 'Date', 8)]
+
+# Dominio de los campos de atributos de las feature classes por tipo; los valores de texto toman
+# VALORES_TEXTO valores de los que el dominio admite CODIGOS_TEXTO y los enteros son uniformes
+# en [0, 1000000), de los que el rango admite el 90 %
+CODIGOS_TEXTO = 48
+VALORES_TEXTO = 50
+DOMINIOS = {FGFT_STRING: 'Dom_Atributo', FGFT_INT32: 'Dom_Entero'}
+
+# Una de cada tantas geometrías de las feature classes se autointersecta (ver _poligonos)
+CADA_AUTOINTERSECCION = 50
+# Uno de cada tantos registros tiene un COD_EXPEDIENTE distinto del expediente de la gdb
+CADA_EXPEDIENTE_ERRADO = 100
+# Con delimitación, una de cada tantas geometrías queda fuera de ella (ver _poligonos)
+CADA_FUERA_DELIMITACION = 100
+
+_EPOCH = datetime(1899, 12, 30)
+_XSI = 'xmlns:xsi="http://www.w3.org/2001/XMLSchema-instance" xmlns:typens="http://www.esri.com/schemas/ArcGIS/10.1"'
+
+
+class Campo(NamedTuple):
+    nombre: str
+    tipo: int
+    nullable: bool = True
+    longitud: int = 0
+    alias: str = ''
+
+
+class Objeto(NamedTuple):
+    """
+    Feature class o tabla de la gdb sintética.
+    """
+    nombre: str
+    tipo: str
+    dataset: Optional[str]
+    campos: List[Campo]
+    filas: int
+
+
+def escribir_tabla(carpeta: str, table_id: int, campos: Sequence[Campo], filas: Sequence[Sequence[Any]],
+                   tipo_geometria: int = 0) -> None:
+    """
+    Escribe aXXXXXXXX.gdbtable y .gdbtablx con las filas dadas (sin el OBJECTID, que es el orden).
+
+    Args:
+        carpeta str: carpeta .gdb.
+        table_id int: número de la tabla.
+        campos Sequence[Campo]: campos, el primero de tipo OBJECTID.
+        filas Sequence[Sequence[Any]]: valores de los demás campos; geometrías como listas de anillos.
+        tipo_geometria int: código de tipo de geometría de la capa (4 = polígono).
+    """
+    definicion = _definicion_campos(campos, tipo_geometria)
+    inicio = 40 + len(definicion)
+    contenido = bytearray()
+    offsets = []
+    for fila in filas:
+        registro = _fila(campos, fila)
+        offsets.append(inicio + len(contenido))
+        contenido += struct.pack('<i', len(registro)) + registro
+    mayor = max((struct.unpack_from('<i', contenido, offset - inicio)[0] for offset in offsets), default=0)
+    cabecera = struct.pack('<iiiiiiqq', 3, len(filas), mayor, 5, 0, 0, inicio + len(contenido), 40)
+
+    base = os.path.join(carpeta, table_file_name(table_id))
+    with open(f'{base}.gdbtable', 'wb') as archivo:
+        archivo.write(cabecera + definicion + contenido)
+    bloques = (len(filas) + 1023) // 1024
+    indice = np.zeros(bloques * 1024, dtype='<u8')
+    indice[:len(offsets)] = offsets
+    posiciones = indice.view(np.uint8).reshape(-1, 8)[:, :5].tobytes()
+    with open(f'{base}.gdbtablx', 'wb') as archivo:
+        archivo.write(struct.pack('<iiii', 3, bloques, len(filas), 5) + posiciones + bytes(16))
+
+
+def generar_gdb(destino: str, datasets: int, feature_classes: int, campos: int, filas: int,
+                tablas: int = 2, delimitacion: Optional[List[List[Tuple[float, float]]]] = None,
+                semilla: int = 0, expediente: Optional[str] = None) -> List[Objeto]:
+    """
+    Genera una carpeta .gdb sintética.
+
+    Las feature classes se reparten entre los datasets; la primera es DELIMIT_PROYEC_PG en
+    TOPOGRAFIA_LOCAL con el polígono `delimitacion`, para el validador espacial, y las geometrías
+    de las demás quedan dentro de su extensión salvo una de cada CADA_FUERA_DELIMITACION.
+
+    Args:
+        destino str: ruta de la carpeta .gdb a crear (se reemplaza si existe).
+        datasets int: cantidad de feature datasets.
+        feature_classes int: cantidad de feature classes.
+        campos int: campos de atributos por feature class, además de OBJECTID y SHAPE.
+        filas int: registros por feature class.
+        tablas int: tablas sin geometría.
+        delimitacion: anillos del polígono de DELIMIT_PROYEC_PG en grados.
+        semilla int: semilla de los valores aleatorios.
+        expediente str: valor de COD_EXPEDIENTE salvo en uno de cada CADA_EXPEDIENTE_ERRADO
+            registros; si no se indica, todos los valores son aleatorios.
+    Returns:
+        List[Objeto]: feature classes y tablas generadas.
+    """
+    aleatorio = np.random.default_rng(semilla)
+    if os.path.exists(destino):
+        shutil.rmtree(destino)
+    os.makedirs(destino)
+
+    nombres_ds = ['TOPOGRAFIA_LOCAL'] + [f'DATASET_{i:03d}' for i in range(1, datasets)]
+    objetos = []
+    for i in range(feature_classes):
+        nombre = 'DELIMIT_PROYEC_PG' if i == 0 else f'OBJETO_{i:04d}_PG'
+        objetos.append(Objeto(nombre, 'Feature Class', nombres_ds[i % len(nombres_ds)],
+                              campos_objeto(campos, geometria=True), filas))
+    objetos += [Objeto(f'Ficha_{i:03d}', 'Table', None, campos_objeto(campos, geometria=False), filas)
+                for i in range(tablas)]
+
+    items = [('Workspace', '', '', '')]
+    items += [('Feature Dataset', nombre, f'\\{nombre}', _xml_dataset(nombre)) for nombre in nombres_ds]
+    items += [('Coded Value Domain', DOMINIOS[FGFT_STRING], '', _xml_dominio_texto()),
+              ('Range Domain', DOMINIOS[FGFT_INT32], '', _xml_dominio_entero())]
+    catalogo = [(nombre, 0) for nombre in TABLAS_SISTEMA]
+    for table_id, objeto in enumerate(objetos, start=len(TABLAS_SISTEMA) + 1):
+        ruta = f'\\{objeto.dataset}\\{objeto.nombre}' if objeto.dataset else f'\\{objeto.nombre}'
+        items.append((objeto.tipo, objeto.nombre, ruta, _xml_objeto(objeto)))
+        catalogo.append((objeto.nombre, 0))
+        geometria = objeto.tipo == 'Feature Class'
+        if objeto.nombre == 'DELIMIT_PROYEC_PG' and delimitacion is not None:
+            poligonos = [delimitacion] * objeto.filas
+        else:
+            poligonos = _poligonos(aleatorio, objeto.filas, delimitacion) if geometria else None
+        escribir_tabla(destino, table_id, objeto.campos, _filas(aleatorio, objeto, poligonos, expediente),
+                       tipo_geometria=4 if geometria else 0)
+
+    escribir_tabla(destino, 1, [Campo('ID', FGFT_OBJECTID, False, 4), Campo('Name', FGFT_STRING, False, 160),
+                                Campo('FileFormat', FGFT_INT32, False, 4)], catalogo)
+    escribir_tabla(destino, 4, [Campo('ObjectID', FGFT_OBJECTID, False, 4), Campo('UUID', FGFT_GUID, False, 16),
+                                Campo('Type', FGFT_GUID, False, 16), Campo('Name', FGFT_STRING, True, 160),
+                                Campo('Path', FGFT_STRING, True, 260), Campo('Definition', FGFT_XML, True)],
+                   [(str(uuid.UUID(bytes=aleatorio.bytes(16))), TIPOS_ITEM[tipo], nombre, ruta, definicion)
+                    for tipo, nombre, ruta, definicion in items])
+    escribir_tabla(destino, 5, [Campo('ObjectID', FGFT_OBJECTID, False, 4), Campo('UUID', FGFT_GUID, False, 16),
+                                Campo('Name', FGFT_STRING, False, 160)],
+                   [(uuid_tipo, tipo) for tipo, uuid_tipo in TIPOS_ITEM.items()])
+    return objetos
+
+
+def comprimir_gdb(carpeta: str, destino: str, comprimido: bool = False) -> str:
+    """
+    Empaqueta la carpeta .gdb en un .gdb.zip, almacenado sin compresión por defecto.
+    """
+    nombre = os.path.basename(carpeta.rstrip('\\/'))
+    metodo = zipfile.ZIP_DEFLATED if comprimido else zipfile.ZIP_STORED
+    with zipfile.ZipFile(destino, 'w', compression=metodo) as archivo:
+        for nombre_archivo in sorted(os.listdir(carpeta)):
+            archivo.write(os.path.join(carpeta, nombre_archivo), f'{nombre}/{nombre_archivo}')
+    return destino
+
+
+def campos_objeto(cantidad: int, geometria: bool) -> List[Campo]:
+    """
+    OBJECTID, SHAPE si `geometria` y `cantidad` campos de atributos ATRIBUTO_NNN.
+    """
+    campos = [Campo('OBJECTID', FGFT_OBJECTID, False, 4)]
+    if geometria:
+        campos.append(Campo('SHAPE', FGFT_GEOMETRY, True))
+    for i in range(cantidad):
+        tipo, _, longitud = TIPOS_CAMPO[i % len(TIPOS_CAMPO)]
+        nombre = 'COD_EXPEDIENTE' if i == 0 else f'ATRIBUTO_{i:03d}'
+        campos.append(Campo(nombre, tipo, True, longitud, alias=nombre.replace('_', ' ').title()))
+    return campos
+
+
+def _filas(aleatorio: np.random.Generator, objeto: Objeto, poligonos,
+           expediente: Optional[str] = None) -> List[List[Any]]:
+    filas = []
+    enteros = aleatorio.integers(0, 1_000_000, size=objeto.filas)
+    dobles = aleatorio.random(objeto.filas) * 1000
+    for i in range(objeto.filas):
+        fila = []
+        for campo in objeto.campos[1:]:
+            if campo.tipo == FGFT_GEOMETRY:
+                fila.append(poligonos[i])
+            elif campo.tipo == FGFT_STRING and campo.nombre != 'COD_EXPEDIENTE':
+                fila.append(f'ATR-{int(enteros[i]) % VALORES_TEXTO:06d}')
+            elif campo.tipo == FGFT_STRING and expediente is not None and i % CADA_EXPEDIENTE_ERRADO:
+                fila.append(expediente)
+            elif campo.tipo == FGFT_STRING:
+                fila.append(f'{campo.nombre[:3]}-{int(enteros[i]):06d}')
+            elif campo.tipo == FGFT_INT32:
+                fila.append(int(enteros[i]))
+            elif campo.tipo == FGFT_FLOAT64:
+                fila.append(float(dobles[i]))
+            else:
+                fila.append(_EPOCH.replace(year=2000) if i % 2 else _EPOCH.replace(year=2020))
+        filas.append(fila)
+    return filas
+
+
+def _poligonos(aleatorio: np.random.Generator, cantidad: int,
+               delimitacion: Optional[List[List[Tuple[float, float]]]] = None) -> List[List[List[Tuple[float, float]]]]:
+    """
+    Cuadriláteros en sentido horario dentro de Colombia o, si se da, de la extensión de
+    `delimitacion`, salvo uno de cada CADA_FUERA_DELIMITACION que se desplaza fuera de ella; uno
+    de cada CADA_AUTOINTERSECCION tiene los dos últimos vértices invertidos (un moño).
+    """
+    if delimitacion is None:
+        x = aleatorio.uniform(-77.0, -70.0, cantidad)
+        y = aleatorio.uniform(0.0, 10.0, cantidad)
+        lado = aleatorio.uniform(0.001, 0.01, cantidad)
+    else:
+        vertices = np.concatenate([np.asarray(anillo, dtype=float) for anillo in delimitacion])
+        (xmin, ymin), (xmax, ymax) = vertices.min(axis=0), vertices.max(axis=0)
+        lado = aleatorio.uniform(0.01, 0.1, cantidad) * min(xmax - xmin, ymax - ymin)
+        x = xmin + aleatorio.random(cantidad) * (xmax - xmin - lado)
+        y = ymin + aleatorio.random(cantidad) * (ymax - ymin - lado)
+        x[2::CADA_FUERA_DELIMITACION] += xmax - xmin
+    return [[[(x0, y0), (x0, y0 + d), (x0 + d, y0), (x0 + d, y0 + d), (x0, y0)]] if i % CADA_AUTOINTERSECCION == 1
+            else [[(x0, y0), (x0, y0 + d), (x0 + d, y0 + d), (x0 + d, y0), (x0, y0)]]
+            for i, (x0, y0, d) in enumerate(zip(x.tolist(), y.tolist(), lado.tolist()))]
+
+
+def _definicion_campos(campos: Sequence[Campo], tipo_geometria: int) -> bytes:
+    cuerpo = bytearray(struct.pack('<iIh', 4, tipo_geometria, len(campos)))
+    for campo in campos:
+        cuerpo += _texto_corto(campo.nombre) + _texto_corto(campo.alias) + bytes([campo.tipo])
+        flags = 5 if campo.nullable else 4
+        if campo.tipo == FGFT_OBJECTID:
+            cuerpo += bytes([4, 2])
+        elif campo.tipo == FGFT_GUID:
+            cuerpo += bytes([38, flags])
+        elif campo.tipo in (FGFT_INT32, FGFT_FLOAT64, FGFT_DATETIME):
+            cuerpo += bytes([campo.longitud, flags, 0])
+        elif campo.tipo == FGFT_STRING:
+            cuerpo += struct.pack('<iBB', campo.longitud, flags, 0)
+        elif campo.tipo == FGFT_XML:
+            cuerpo += bytes([0, flags])
+        elif campo.tipo == FGFT_GEOMETRY:
+            wkt = WKT.encode('utf-16-le')
+            cuerpo += bytes([0, flags]) + struct.pack('<H', len(wkt)) + wkt + bytes([1])
+            cuerpo += struct.pack('<3d', XORIGIN, YORIGIN, XYSCALE)
+            cuerpo += struct.pack('<d', XYTOLERANCE)
+            cuerpo += struct.pack('<4d', -80.0, -5.0, -66.0, 14.0)
+            cuerpo += struct.pack('<BId', 0, 1, 0.1)
+        else:
+            raise ValueError(f'Tipo de campo no soportado por el generador ({campo.tipo}) -> {campo.nombre}')
+    return struct.pack('<i', len(cuerpo)) + bytes(cuerpo)
+
+
+def _texto_corto(texto: str) -> bytes:
+    return bytes([len(texto)]) + texto.encode('utf-16-le')
+
+
+def _fila(campos: Sequence[Campo], valores: Sequence[Any]) -> bytes:
+    campos = [campo for campo in campos if campo.tipo != FGFT_OBJECTID]
+    anulables = [campo for campo in campos if campo.nullable]
+    nulos = bytearray((len(anulables) + 7) // 8)
+    cuerpo = bytearray()
+    indice = 0
+    for campo, valor in zip(campos, valores):
+        if campo.nullable:
+            if valor is None:
+                nulos[indice >> 3] |= 1 << (indice & 7)
+                indice += 1
+                continue
+            indice += 1
+        if campo.tipo == FGFT_INT32:
+            cuerpo += struct.pack('<i', valor)
+        elif campo.tipo == FGFT_FLOAT64:
+            cuerpo += struct.pack('<d', valor)
+        elif campo.tipo == FGFT_DATETIME:
+            cuerpo += struct.pack('<d', (valor - _EPOCH).total_seconds() / 86400.0)
+        elif campo.tipo == FGFT_GUID:
+            cuerpo += uuid.UUID(valor).bytes_le
+        elif campo.tipo in (FGFT_STRING, FGFT_XML):
+            texto = valor.encode('utf-8')
+            cuerpo += _varuint(len(texto)) + texto
+        elif campo.tipo == FGFT_GEOMETRY:
+            forma = _forma(valor)
+            cuerpo += _varuint(len(forma)) + forma
+    return bytes(nulos) + bytes(cuerpo)
+
+
+def _forma(anillos: List[List[Tuple[float, float]]]) -> bytes:
+    """
+    Geometría comprimida de un polígono simple (tipo 5), inversa de read_shape.
+    """
+    puntos = np.round((np.concatenate([np.asarray(anillo, dtype=float) for anillo in anillos])
+                       - (XORIGIN, YORIGIN)) * XYSCALE).astype(np.int64)
+    minimo, maximo = puntos.min(axis=0), puntos.max(axis=0)
+    forma = bytearray(_varuint(5) + _varuint(len(puntos)) + _varuint(len(anillos)))
+    for valor in (minimo[0], minimo[1], maximo[0] - minimo[0], maximo[1] - minimo[1]):
+        forma += _varuint(int(valor))
+    for anillo in anillos[:-1]:
+        forma += _varuint(len(anillo))
+    for delta in np.diff(puntos, axis=0, prepend=[[0, 0]]).ravel().tolist():
+        forma += _varint(delta)
+    return bytes(forma)
+
+
+def _varuint(valor: int) -> bytes:
+    salida = bytearray()
+    while True:
+        byte = valor & 0x7F
+        valor >>= 7
+        if valor:
+            salida.append(byte | 0x80)
+        else:
+            salida.append(byte)
+            return bytes(salida)
+
+
+def _varint(valor: int) -> bytes:
+    magnitud = abs(valor)
+    byte = magnitud & 0x3F | (0x40 if valor < 0 else 0)
+    magnitud >>= 6
+    if not magnitud:
+        return bytes([byte])
+    return bytes([byte | 0x80]) + _varuint(magnitud)
+
+
+def _xml_dataset(nombre: str) -> str:
+    return (f'<DEFeatureDataset {_XSI} xsi:type="typens:DEFeatureDataset"><Name>{nombre}</Name>'
+            f'{_xml_srs()}</DEFeatureDataset>')
+
+
+def _xml_objeto(objeto: Objeto) -> str:
+    def dominio(campo: Campo) -> str:
+        if objeto.tipo == 'Table' or campo.nombre == 'COD_EXPEDIENTE' or campo.tipo not in DOMINIOS:
+            return ''
+        return f'<DomainName>{DOMINIOS[campo.tipo]}</DomainName>'
+
+    campos = ''.join(
+        f'<GPFieldInfoEx xsi:type="typens:GPFieldInfoEx"><Name>{campo.nombre}</Name>{dominio(campo)}'
+        f'<Required>{"true" if not campo.nullable else "false"}</Required></GPFieldInfoEx>'
+        for campo in objeto.campos)
+    if objeto.tipo == 'Table':
+        return (f'<DETableInfo {_XSI} xsi:type="typens:DETableInfo"><Name>{objeto.nombre}</Name>'
+                f'<GPFieldInfoExs xsi:type="typens:ArrayOfGPFieldInfoEx">{campos}</GPFieldInfoExs></DETableInfo>')
+    return (f'<DEFeatureClassInfo {_XSI} xsi:type="typens:DEFeatureClassInfo"><Name>{objeto.nombre}</Name>'
+            f'<GPFieldInfoExs xsi:type="typens:ArrayOfGPFieldInfoEx">{campos}</GPFieldInfoExs>'
+            f'<AliasName>{objeto.nombre.title()}</AliasName><FeatureType>esriFTSimple</FeatureType>'
+            f'<ShapeType>esriGeometryPolygon</ShapeType><ShapeFieldName>SHAPE</ShapeFieldName>'
+            f'{_xml_srs()}</DEFeatureClassInfo>')
+
+
+def _xml_dominio_texto() -> str:
+    codigos = ''.join(
+        f'<CodedValue xsi:type="typens:CodedValue"><Name>Valor {i}</Name>'
+        f'<Code xsi:type="xs:string">ATR-{i:06d}</Code></CodedValue>' for i in range(CODIGOS_TEXTO))
+    return (f'<GPCodedValueDomain2 {_XSI} xsi:type="typens:GPCodedValueDomain2">'
+            f'<DomainName>{DOMINIOS[FGFT_STRING]}</DomainName><FieldType>esriFieldTypeString</FieldType>'
+            f'<CodedValues xsi:type="typens:ArrayOfCodedValue">{codigos}</CodedValues></GPCodedValueDomain2>')
+
+
+def _xml_dominio_entero() -> str:
+    return (f'<GPRangeDomain2 {_XSI} xsi:type="typens:GPRangeDomain2">'
+            f'<DomainName>{DOMINIOS[FGFT_INT32]}</DomainName><FieldType>esriFieldTypeInteger</FieldType>'
+            f'<MaxValue xsi:type="xs:int">899999</MaxValue><MinValue xsi:type="xs:int">0</MinValue>'
+            f'</GPRangeDomain2>')
+
+
+def _xml_srs() -> str:
+    return (f'<SpatialReference xsi:type="typens:GeographicCoordinateSystem"><WKT>{WKT}</WKT>'
+            f'<WKID>{SRSCODE}</WKID><LatestWKID>{SRSCODE}</LatestWKID></SpatialReference>')
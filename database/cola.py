@@ -0,0 +1,233 @@
+"""
+Cola de gdbs por validar con arrendamientos, para correr worker.py en varios nodos a la vez.
+
+Un nodo reclama un lote de gdbs 'Sin iniciar' (ver reclamar) y las pasa a 'En proceso' a su
+nombre con un arrendamiento que vence en VALW_ARRENDAMIENTO_SEGUNDOS; mientras las valida lo
+renueva con un latido (ver Latido). Si el nodo muere, el arrendamiento vence y reencolar_vencidos
+devuelve la gdb a 'Sin iniciar' para que la tome otro nodo, o la marca 'Error' si ya se intentó
+VALW_MAX_INTENTOS veces. Las horas son siempre las de la base de datos, no las de los nodos.
+
+Columnas de MJEREZ.VALW_GDBS_VALIDAR que usa la cola:
+
+    ALTER TABLE MJEREZ.VALW_GDBS_VALIDAR ADD (
+        ARRENDADO_POR VARCHAR2(120),    -- nodo que la valida, ver identificador_nodo
+        ARRENDADO_HASTA TIMESTAMP,      -- vencimiento del arrendamiento
+        INTENTOS NUMBER DEFAULT 0       -- veces que se ha reclamado
+    );
+    CREATE INDEX MJEREZ.VALW_GDBS_VALIDAR_COLA ON MJEREZ.VALW_GDBS_VALIDAR (ESTADO_ID, ID);
+
+En Oracle el lote se toma con SELECT ... FOR UPDATE SKIP LOCKED, de modo que dos nodos nunca
+reclaman la misma gdb ni se esperan entre sí. SQLite no tiene SKIP LOCKED: ahí cada gdb se
+reclama con un UPDATE condicionado a que siga 'Sin iniciar', lo que basta para una base local.
+"""
+import os
+import socket
+import threading
+import uuid
+import sqlalchemy
+
+from typing import List, Optional, Tuple
+
+from database.connection import schema
+from utils.arcgis import arcpy
+from utils.utils import valw_gdbs_validar
+
+# Segundos que dura un arrendamiento sin latidos
+arrendamiento_segundos = float(os.getenv('VALW_ARRENDAMIENTO_SEGUNDOS', '300'))
+# Reclamos de una gdb antes de marcarla 'Error' por arrendamiento vencido
+max_intentos = int(os.getenv('VALW_MAX_INTENTOS', '3'))
+
+# Hora actual y hora dentro de :segundos en la base de datos, por dialecto
+_AHORA = {
+    'oracle': 'SYSTIMESTAMP',
+    'sqlite': "strftime('%Y-%m-%d %H:%M:%f', 'now')",
+}
+_VENCIMIENTO = {
+    'oracle': "SYSTIMESTAMP + NUMTODSINTERVAL(:segundos, 'SECOND')",
+    'sqlite': "strftime('%Y-%m-%d %H:%M:%f', 'now', '+' || :segundos || ' seconds')",
+}
+
+_TABLA = f'{schema}.{valw_gdbs_validar.table_name}'
+
+
+def _estado(estado: str) -> str:
+    return f"""(SELECT ID_ESTADO_PROCESO FROM {schema}.VALW_ESTADO_PROCESO WHERE ESTADO = '{estado}')"""
+
+
+SQL_CANDIDATAS = f"""SELECT {valw_gdbs_validar.id}, {valw_gdbs_validar.ruta_column}
+    FROM {_TABLA}
+    WHERE {valw_gdbs_validar.estado_column} = {_estado('Sin iniciar')}
+    ORDER BY {valw_gdbs_validar.id}"""
+
+SQL_RECLAMAR = f"""UPDATE {_TABLA}
+    SET {valw_gdbs_validar.estado_column} = {_estado('En proceso')},
+        {valw_gdbs_validar.arrendado_por_column} = :nodo,
+        {valw_gdbs_validar.arrendado_hasta_column} = {{vencimiento}},
+        {valw_gdbs_validar.intentos_column} = COALESCE({valw_gdbs_validar.intentos_column}, 0) + 1
+    WHERE {valw_gdbs_validar.id} = :id_bd"""
+
+SQL_RENOVAR = f"""UPDATE {_TABLA}
+    SET {valw_gdbs_validar.arrendado_hasta_column} = {{vencimiento}}
+    WHERE {valw_gdbs_validar.arrendado_por_column} = :nodo
+        AND {valw_gdbs_validar.estado_column} = {_estado('En proceso')}"""
+
+SQL_REENCOLAR = f"""UPDATE {_TABLA}
+    SET {valw_gdbs_validar.estado_column} = CASE
+            WHEN COALESCE({valw_gdbs_validar.intentos_column}, 0) < :max_intentos THEN {_estado('Sin iniciar')}
+            ELSE {_estado('Error')} END,
+        {valw_gdbs_validar.arrendado_por_column} = NULL,
+        {valw_gdbs_validar.arrendado_hasta_column} = NULL
+    WHERE {valw_gdbs_validar.estado_column} = {_estado('En proceso')}
+        AND {valw_gdbs_validar.arrendado_hasta_column} < {{ahora}}"""
+
+SQL_LIBERAR = f"""UPDATE {_TABLA}
+    SET {valw_gdbs_validar.estado_column} = (SELECT ID_ESTADO_PROCESO FROM {schema}.VALW_ESTADO_PROCESO
+                                              WHERE ESTADO = :estado),
+        {valw_gdbs_validar.arrendado_hasta_column} = NULL
+    WHERE {valw_gdbs_validar.id} = :id_bd
+        AND {valw_gdbs_validar.arrendado_por_column} = :nodo"""
+
+
+def identificador_nodo() -> str:
+    """
+    Nombre único del proceso que reclama gdbs: equipo, PID y un sufijo aleatorio, para que un
+    proceso reiniciado con el mismo PID no herede los arrendamientos del anterior.
+    """
+    return f'{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}'
+
+
+def _sql(connection, plantilla: str) -> str:
+    dialecto = connection.dialecto
+    if dialecto not in _AHORA:
+        raise ValueError(f'La cola de gdbs no soporta el dialecto {dialecto}; use Oracle o SQLite.')
+    return plantilla.format(ahora=_AHORA[dialecto], vencimiento=_VENCIMIENTO[dialecto])
+
+
+def reclamar(connection, nodo: str, limite: int, segundos: Optional[float] = None) -> List[Tuple[int, str]]:
+    """
+    Reclama hasta `limite` gdbs 'Sin iniciar', en orden de llegada, y las deja 'En proceso' a
+    nombre de `nodo`.
+
+    Args:
+        connection: capa de acceso a datos (BaseDatos).
+        nodo str: identificador del nodo, ver identificador_nodo.
+        limite int: cantidad máxima de gdbs a reclamar.
+        segundos float: duración del arrendamiento, por defecto VALW_ARRENDAMIENTO_SEGUNDOS.
+    Returns:
+        List[Tuple[int, str]]: id y ruta de cada gdb reclamada.
+    """
+    if limite <= 0:
+        return []
+    params = {'nodo': nodo, 'segundos': segundos or arrendamiento_segundos}
+    if connection.dialecto == 'sqlite':
+        # Solo si otro nodo no la reclamó entre la consulta y el UPDATE
+        sql_reclamar = sqlalchemy.text(_sql(connection, SQL_RECLAMAR) + f"""
+        AND {valw_gdbs_validar.estado_column} = {_estado('Sin iniciar')}""")
+        reclamadas = []
+        for id_bd, ruta in connection.filas(f'{SQL_CANDIDATAS} LIMIT :cantidad', cantidad=limite):
+            with connection.transaccion() as conn:
+                if conn.execute(sql_reclamar, {**params, 'id_bd': id_bd}).rowcount == 1:
+                    reclamadas.append((int(id_bd), ruta))
+        return reclamadas
+
+    sql_reclamar = sqlalchemy.text(_sql(connection, SQL_RECLAMAR))
+    with connection.transaccion() as conn:
+        # Con SKIP LOCKED Oracle bloquea las filas a medida que las trae al cliente, incluidas las
+        # que prebusca: prefetchrows y arraysize se limitan a `limite` para no bloquear más que esas
+        sql_candidatas = sqlalchemy.text(f'{SQL_CANDIDATAS} FOR UPDATE SKIP LOCKED')
+        result = conn.execute(sql_candidatas.execution_options(prefetch_rows=limite))
+        reclamadas = [(int(id_bd), ruta) for id_bd, ruta in result.fetchmany(limite)]
+        result.close()
+        if reclamadas:
+            conn.execute(sql_reclamar, [{**params, 'id_bd': id_bd} for id_bd, _ in reclamadas])
+    return reclamadas
+
+
+def renovar(connection, nodo: str, segundos: Optional[float] = None) -> int:
+    """
+    Extiende los arrendamientos de todas las gdbs 'En proceso' de `nodo`.
+
+    Returns:
+        int: gdbs renovadas.
+    """
+    return connection.ejecutar(_sql(connection, SQL_RENOVAR), nodo=nodo,
+                               segundos=segundos or arrendamiento_segundos)
+
+
+def reencolar_vencidos(connection, intentos: Optional[int] = None) -> int:
+    """
+    Devuelve a 'Sin iniciar' las gdbs 'En proceso' cuyo arrendamiento venció (el nodo murió o
+    perdió la conexión), o las marca 'Error' si ya se reclamaron `intentos` veces. Las gdbs
+    'En proceso' sin arrendamiento, p. ej. las de app.py, no se tocan.
+
+    Args:
+        connection: capa de acceso a datos (BaseDatos).
+        intentos int: reclamos permitidos por gdb, por defecto VALW_MAX_INTENTOS.
+    Returns:
+        int: gdbs reencoladas o marcadas 'Error'.
+    """
+    reencoladas = connection.ejecutar(_sql(connection, SQL_REENCOLAR), max_intentos=intentos or max_intentos)
+    if reencoladas:
+        arcpy.AddWarning(f'{reencoladas} gdbs con el arrendamiento vencido volvieron a la cola')
+    return reencoladas
+
+
+def liberar(connection, id: int, nodo: str, estado: str) -> bool:
+    """
+    Pasa la gdb a `estado` y termina su arrendamiento, solo si sigue a nombre de `nodo`.
+
+    Returns:
+        bool: False si la gdb ya no era del nodo (su arrendamiento venció y la reclamó otro).
+    """
+    return connection.ejecutar(SQL_LIBERAR, estado=estado, id_bd=int(id), nodo=nodo) == 1
+
+
+def finalizar(conn: sqlalchemy.engine.Connection, id: int, nodo: str) -> bool:
+    """
+    Como liberar(estado='Finalizado'), pero dentro de la transacción `conn` que escribe los
+    mensajes de la gdb (EscritorMensajes.conexion): si devuelve False el arrendamiento venció y
+    otro nodo puede estar validando la gdb, así que la transacción se debe revertir.
+
+    Returns:
+        bool: False si la gdb ya no era del nodo.
+    """
+    params = {'estado': 'Finalizado', 'id_bd': int(id), 'nodo': nodo}
+    return conn.execute(sqlalchemy.text(SQL_LIBERAR), params).rowcount == 1
+
+
+class Latido:
+    """
+    Hilo que renueva los arrendamientos de un nodo cada tercio de su duración:
+
+        with Latido(bd, nodo):
+            ...  # validar las gdbs reclamadas
+
+    Args:
+        connection: capa de acceso a datos (BaseDatos).
+        nodo str: identificador del nodo, ver identificador_nodo.
+        segundos float: duración del arrendamiento, por defecto VALW_ARRENDAMIENTO_SEGUNDOS.
+    """
+
+    def __init__(self, connection, nodo: str, segundos: Optional[float] = None):
+        self.connection = connection
+        self.nodo = nodo
+        self.segundos = segundos or arrendamiento_segundos
+        self._detener = threading.Event()
+        self._hilo = threading.Thread(target=self._latir, name='latido', daemon=True)
+
+    def _latir(self) -> None:
+        while not self._detener.wait(self.segundos / 3):
+            try:
+                renovar(self.connection, self.nodo, self.segundos)
+            except Exception as error:
+                # Se reintenta en el siguiente latido, antes de que venza el arrendamiento
+                arcpy.AddWarning(f'No fue posible renovar los arrendamientos de {self.nodo}: {error}')
+
+    def __enter__(self) -> 'Latido':
+        self._hilo.start()
+        return self
+
+    def __exit__(self, *args) -> bool:
+        self._detener.set()
+        self._hilo.join()
+        return False
@@ -1,32 +1,230 @@
-import arcpy
 import os
-import cx_Oracle as cx
+import threading
+import zlib
 import sqlalchemy
 import pandas as pd
 
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional
+from sqlalchemy.pool import NullPool
+
+from Validador import metricas
+from utils.arcgis import arcpy
+
 # Esto no puede quedar en git.
 user = os.environ.get('USER')
 password = os.getenv('PASSWORD')
 ip = os.getenv('IP')
 port = os.getenv('PORT')
 db = os.getenv('DB')
+# URL SQLAlchemy alternativa, p. ej. sqlite:///validador.db como reemplazo local de Oracle
+db_url = os.getenv('DB_URL')
+
+# Pool de sesiones de Oracle
+pool_min = int(os.getenv('DB_POOL_MIN', '1'))
+pool_max = int(os.getenv('DB_POOL_MAX', '4'))
+pool_increment = int(os.getenv('DB_POOL_INCREMENT', '1'))
+stmt_cache_size = int(os.getenv('DB_STMT_CACHE_SIZE', '50'))
+arraysize = int(os.getenv('DB_ARRAYSIZE', '1000'))
+prefetch_rows = int(os.getenv('DB_PREFETCH_ROWS', '1000'))
 
-arcpy.AddMessage(f'0. Database connection user: {user}')
 schema = 'MJEREZ'
 dsn = f'{ip}:{port}/{db}'
-connection_string = f'oracle+cx_oracle://{user}:{password}@{ip}:{port}/?service_name={db}'
-# TODO esto debe ser un pooling connection https://cx-oracle.readthedocs.io/en/latest/user_guide/connection_handling.html
-# seccion Connection Pooling
-con = cx.connect(user, password, dsn)
-con.autocommit = True
 
-engine = sqlalchemy.create_engine(connection_string, arraysize=1000)
-ruta = r'E:\VWMDG\validador_web\Data\IDO-08061_202203071.gdb'
 
+def pd_upper_columns(sql: str, connection, params: Optional[Dict[str, Any]] = None) -> pd.DataFrame:
+    """
+    Ejecuta la consulta y devuelve un DataFrame con los nombres de columna en mayúscula.
 
-def pd_upper_columns(sql: str, connection):
-    # TODO check connection
-    df = pd.read_sql_query(sql, connection)
+    Args:
+        sql str: consulta con parámetros nombrados (:nombre).
+        connection: BaseDatos, engine o conexión de SQLAlchemy.
+        params Dict[str, Any]: valores de los parámetros.
+    """
+    if isinstance(connection, BaseDatos):
+        connection = connection.engine
+    df = pd.read_sql_query(sqlalchemy.text(sql), connection, params=params or {})
     df.columns = map(str.upper, df.columns)
     return df
 
+
+class BaseDatos:
+    """
+    Capa única de acceso a datos. Todas las lecturas y escrituras de los validadores pasan por
+    aquí; las conexiones salen del pool configurado en el engine.
+
+    Con `fabrica` el engine se crea en el primer uso, no al importar: importar el módulo no
+    abre conexiones y cada proceso del pool de worker.py crea las suyas.
+
+    Args:
+        engine: engine de SQLAlchemy, ver crear_engine.
+        fabrica Callable[[], Engine]: función que crea el engine, en lugar de `engine`.
+    """
+
+    def __init__(self, engine: Optional[sqlalchemy.engine.Engine] = None,
+                 fabrica: Optional[Callable[[], sqlalchemy.engine.Engine]] = None):
+        if engine is None and fabrica is None:
+            raise ValueError('BaseDatos requiere un engine o una fábrica de engines')
+        self._engine = engine
+        self._fabrica = fabrica
+        self._lock = threading.Lock()
+
+    @classmethod
+    def desde_url(cls, url: Optional[str] = None) -> 'BaseDatos':
+        """
+        Base de datos de la URL (Oracle con las variables de entorno si es None), conectada en la
+        primera consulta.
+        """
+        return cls(fabrica=lambda: crear_engine(url))
+
+    @property
+    def engine(self) -> sqlalchemy.engine.Engine:
+        if self._engine is None:
+            with self._lock:
+                if self._engine is None:
+                    self._engine = self._fabrica()
+        return self._engine
+
+    @property
+    def dialecto(self) -> str:
+        """
+        Nombre del dialecto de SQLAlchemy del engine, p. ej. 'oracle' o 'sqlite'.
+        """
+        return self.engine.dialect.name
+
+    def consultar(self, sql: str, **params) -> pd.DataFrame:
+        """
+        Consulta como DataFrame con columnas en mayúscula.
+        """
+        with metricas.consulta_bd() as consulta:
+            df = pd_upper_columns(sql, self.engine, params)
+            consulta.contar(filas=len(df))
+        return df
+
+    def escalar(self, sql: str, **params) -> Any:
+        """
+        Primer valor de la primera fila de la consulta, None si no hay filas.
+        """
+        with metricas.consulta_bd() as consulta, self.engine.connect() as conn:
+            consulta.contar(filas=1)
+            return conn.execute(sqlalchemy.text(sql), params).scalar()
+
+    def filas(self, sql: str, limite: Optional[int] = None, **params) -> List[tuple]:
+        """
+        Filas de la consulta; con `limite` solo se traen las primeras.
+        """
+        with metricas.consulta_bd() as consulta, self.engine.connect() as conn:
+            result = conn.execute(sqlalchemy.text(sql), params)
+            rows = result.fetchall() if limite is None else result.fetchmany(limite)
+            consulta.contar(filas=len(rows))
+            return [tuple(row) for row in rows]
+
+    def ejecutar(self, sql: str, **params) -> int:
+        """
+        Ejecuta una sentencia DML en su propia transacción.
+
+        Returns:
+            int: filas afectadas.
+        """
+        with metricas.consulta_bd() as consulta, self.transaccion() as conn:
+            rowcount = conn.execute(sqlalchemy.text(sql), params).rowcount
+            consulta.contar(filas=max(rowcount, 0))
+            return rowcount
+
+    def ejecutar_varios(self, sql: str, filas: List[Dict[str, Any]]) -> None:
+        """
+        Ejecuta la sentencia una vez por cada registro con un único executemany.
+        """
+        if not filas:
+            return
+        with metricas.consulta_bd() as consulta, self.transaccion() as conn:
+            conn.execute(sqlalchemy.text(sql), filas)
+            consulta.contar(filas=len(filas))
+
+    @contextmanager
+    def transaccion(self) -> Iterator[sqlalchemy.engine.Connection]:
+        """
+        Conexión del pool con una transacción que se confirma al salir, o se revierte si hay error.
+        """
+        with self.engine.begin() as conn:
+            yield conn
+
+
+def crear_engine(url: Optional[str] = None) -> sqlalchemy.engine.Engine:
+    """
+    Crea el engine de SQLAlchemy del validador.
+
+    Con Oracle las conexiones se toman de un cx_Oracle.SessionPool (DB_POOL_MIN, DB_POOL_MAX,
+    DB_POOL_INCREMENT, DB_STMT_CACHE_SIZE) y cada cursor usa DB_ARRAYSIZE y DB_PREFETCH_ROWS.
+    Con una URL sqlite:// la misma base se adjunta como el esquema MJEREZ y se registra ORA_HASH
+    (un CRC32 del texto) para que las consultas corran sin cambios.
+
+    Args:
+        url str: URL SQLAlchemy alternativa a Oracle.
+    Returns:
+        sqlalchemy.engine.Engine
+    """
+    # La URL puede llevar la contraseña: solo se informa sin ella
+    usuario = sqlalchemy.engine.make_url(url).render_as_string(hide_password=True) if url else user
+    arcpy.AddMessage(f'0. Database connection user: {usuario}')
+    if url:
+        engine = sqlalchemy.create_engine(url)
+        if engine.dialect.name == 'sqlite':
+            _adjuntar_esquema_sqlite(engine)
+        return engine
+
+    # Solo con Oracle: para otras URL no hace falta tener cx_Oracle instalado
+    import cx_Oracle as cx
+
+    session_pool = cx.SessionPool(
+        user=user,
+        password=password,
+        dsn=dsn,
+        min=pool_min,
+        max=pool_max,
+        increment=pool_increment,
+        threaded=True,
+        getmode=cx.SPOOL_ATTRVAL_WAIT,
+        stmtcachesize=stmt_cache_size)
+    # SQLAlchemy no guarda conexiones: al cerrarlas vuelven al SessionPool.
+    engine = sqlalchemy.create_engine(
+        'oracle+cx_oracle://',
+        creator=session_pool.acquire,
+        poolclass=NullPool,
+        arraysize=arraysize)
+
+    @sqlalchemy.event.listens_for(engine, 'before_cursor_execute')
+    def _prefetch(conn, cursor, statement, parameters, context, executemany):
+        # execution_options(prefetch_rows=n) en consultas de las que solo se leen n filas, p. ej.
+        # con FOR UPDATE SKIP LOCKED: Oracle bloquea todas las filas que trae, también las prebuscadas
+        filas = context.execution_options.get('prefetch_rows') if context is not None else None
+        if filas is None:
+            cursor.prefetchrows = prefetch_rows
+        else:
+            cursor.prefetchrows = cursor.arraysize = filas
+
+    return engine
+
+
+def _adjuntar_esquema_sqlite(engine: sqlalchemy.engine.Engine) -> None:
+    database = engine.url.database or ':memory:'
+
+    @sqlalchemy.event.listens_for(engine, 'connect')
+    def _adjuntar(dbapi_connection, connection_record):
+        dbapi_connection.execute(f"ATTACH DATABASE '{database}' AS {schema}")
+        dbapi_connection.create_function('ORA_HASH', 1, _ora_hash, deterministic=True)
+
+
+def _ora_hash(valor) -> Optional[int]:
+    # Mismo rango que ORA_HASH de Oracle (0 a 2^32 - 1), no los mismos valores
+    return None if valor is None else zlib.crc32(str(valor).encode('utf-8'))
+
+
+bd = BaseDatos.desde_url(db_url)
+
+
+def __getattr__(name: str):
+    # `engine` se conserva como atributo del módulo, creado al pedirlo
+    if name == 'engine':
+        return bd.engine
+    raise AttributeError(f"module 'database.connection' has no attribute '{name}'")
@@ -1,8 +1,7 @@
 import pandas as pd
-from typing import Tuple
+from typing import List, Tuple
 
 from pydantic import ValidationError
-from database.connection import pd_upper_columns
 
 def por_validar (connection) -> int:
     """
@@ -14,13 +13,31 @@ def por_validar (connection) -> int:
     Returns:
         int: indicando la cantidad de gbs que faltan por validar.
     """
-    with connection.cursor() as cur:
-        row = cur.execute("""SELECT count(*) 
-            FROM MJEREZ.VALW_GDBS_VALIDAR vgds 
-            INNER JOIN MJEREZ.VALW_ESTADO_PROCESO vep 
-                ON vgds.ESTADO_ID = vep.ID_ESTADO_PROCESO 
-            WHERE vep.ESTADO ='Sin iniciar'""")
-        return row.rowcount
+    return int(connection.escalar("""SELECT count(*) 
+        FROM MJEREZ.VALW_GDBS_VALIDAR vgds 
+        INNER JOIN MJEREZ.VALW_ESTADO_PROCESO vep 
+            ON vgds.ESTADO_ID = vep.ID_ESTADO_PROCESO 
+        WHERE vep.ESTADO ='Sin iniciar'"""))
+
+
+def gdbs_sin_iniciar(connection, limite: int) -> List[Tuple[int, str]]:
+    """
+    Consulta las siguientes gdbs pendientes por validar, en orden de llegada.
+
+    Args:
+        connection: conexión a la base de datos
+        limite int: cantidad máxima de gdbs a devolver.
+
+    Returns:
+        List[Tuple[int, str]]: id y ruta de cada gdb.
+    """
+    rows = connection.filas("""SELECT vgds.ID, vgds.RUTA
+        FROM MJEREZ.VALW_GDBS_VALIDAR vgds
+        INNER JOIN MJEREZ.VALW_ESTADO_PROCESO vep
+            ON vgds.ESTADO_ID = vep.ID_ESTADO_PROCESO
+        WHERE vep.ESTADO ='Sin iniciar'
+        ORDER BY vgds.ID""", limite=limite)
+    return [(int(id_bd), ruta) for id_bd, ruta in rows]
 
 
 def gdb_para_validar(connection, gdb: str) -> Tuple[str, str]:
@@ -40,11 +57,11 @@ def gdb_para_validar(connection, gdb: str) -> Tuple[str, str]:
     # TODO en caso de que no la entre debe arrojar un mensaje claro.
     """
     try: 
-        sql = f"""
+        sql = """
             SELECT ID, RUTA FROM MJEREZ.VALW_GDBS_VALIDAR  gdb_val
-            WHERE RUTA = '{gdb}'
+            WHERE RUTA = :ruta
             """
-        df = pd_upper_columns(sql, connection)
+        df = connection.consultar(sql, ruta=gdb)
         if df.shape[0] > 1:
             raise ValidationError('No pueden existir dos registros iguales de gdb en la base de datos. Revise la unicidad.')
         return int(df.loc[0, 'ID']), df.loc[0,'RUTA']
@@ -59,21 +76,21 @@ def update_estado(connection, id: int, estado:str) -> None:
     UPDATE MJEREZ.VALW_GDBS_VALIDAR SET ESTADO_ID = :estado WHERE ID = :id_bd
     """
     id_estado = get_id_estado(connection, estado)
-    with connection.cursor() as cur:
-        cur.execute(sql, estado=id_estado, id_bd=id)
+    connection.ejecutar(sql, estado=id_estado, id_bd=id)
 
 def get_id_estado(connection, estado:str) -> int:
     sql = """
     SELECT ID_ESTADO_PROCESO FROM MJEREZ.VALW_ESTADO_PROCESO WHERE ESTADO = :estado
     """
-    with connection.cursor() as cur:
-        return cur.execute(sql, estado=estado).fetchone()[0]
+    id_estado = connection.escalar(sql, estado=estado)
+    if id_estado is None:
+        raise TypeError(f'No existe el estado {estado} en la tabla VALW_ESTADO_PROCESO.')
+    return int(id_estado)
 
 def borrar_registros_mensajes(connection, id) -> None:
     """
     En caso de que la gdb ya haya sido valida borra los mensajes en la base de datos.
     """
     sql = """DELETE FROM MJEREZ.VALW_GDB_MENSAJE WHERE GDB_ID = :id_bd"""
-    with connection.cursor() as cur:
-        cur.execute(sql, id_bd=id)
+    connection.ejecutar(sql, id_bd=id)
     
\ No newline at end of file
@@ -0,0 +1,69 @@
+"""
+Huellas de contenido de cada gdb validada, para la revalidación incremental (ver Validador/huellas.py).
+
+Se guardan en MJEREZ.VALW_GDB_HUELLA, junto a VALW_GDBS_VALIDAR:
+
+    CREATE TABLE MJEREZ.VALW_GDB_HUELLA (
+        GDB_ID NUMBER NOT NULL,         -- VALW_GDBS_VALIDAR.ID
+        TIPO VARCHAR2(20) NOT NULL,     -- CATALOGO, TABLA, CABECERA o VALIDADOR
+        OBJETO VARCHAR2(160) NOT NULL,  -- tabla, feature class o validador
+        HUELLA VARCHAR2(64) NOT NULL,
+        CONSTRAINT VALW_GDB_HUELLA_PK PRIMARY KEY (GDB_ID, TIPO, OBJETO)
+    );
+
+Las huellas se escriben en la misma transacción que los mensajes: si existen, los mensajes de
+esa gdb corresponden a ellas.
+"""
+import sqlalchemy
+import pandas as pd
+
+from typing import List, Tuple
+
+from database.connection import schema
+from utils.utils import valw_gdb_huella
+
+SQL_HUELLAS_VALIDADORES = f"""SELECT h.{valw_gdb_huella.gdb_id_column}, vgds.RUTA,
+        h.{valw_gdb_huella.objeto_column}, h.{valw_gdb_huella.huella_column}
+    FROM {schema}.{valw_gdb_huella.table_name} h
+    INNER JOIN {schema}.VALW_GDBS_VALIDAR vgds
+        ON vgds.ID = h.{valw_gdb_huella.gdb_id_column}
+    WHERE h.{valw_gdb_huella.tipo_column} = 'VALIDADOR'
+        AND (h.{valw_gdb_huella.gdb_id_column} = :id_gdb OR vgds.RUTA LIKE :ruta)"""
+
+SQL_BORRAR_HUELLAS = f"""DELETE FROM {schema}.{valw_gdb_huella.table_name}
+    WHERE {valw_gdb_huella.gdb_id_column} = :gdb_id"""
+
+SQL_INSERTAR_HUELLA = f"""INSERT INTO {schema}.{valw_gdb_huella.table_name}
+    ({valw_gdb_huella.gdb_id_column}, {valw_gdb_huella.tipo_column}, {valw_gdb_huella.objeto_column}, {valw_gdb_huella.huella_column})
+    VALUES (:gdb_id, :tipo, :objeto, :huella)"""
+
+
+def huellas_validadores(connection, id_gdb: int, expediente: str) -> pd.DataFrame:
+    """
+    Huellas de los validadores de la gdb `id_gdb` y de las demás cargas cuya ruta contiene el
+    expediente.
+
+    Args:
+        connection: capa de acceso a datos (BaseDatos).
+        id_gdb int: identificador de la gdb en la tabla VALW_GDBS_VALIDAR.
+        expediente str: código del expediente.
+    Returns:
+        pd.DataFrame: columnas GDB_ID, RUTA, OBJETO y HUELLA.
+    """
+    return connection.consultar(SQL_HUELLAS_VALIDADORES, id_gdb=int(id_gdb), ruta=f'%{expediente}%')
+
+
+def guardar_huellas(conn: sqlalchemy.engine.Connection, id_gdb: int, filas: List[Tuple[str, str, str]]) -> None:
+    """
+    Reemplaza las huellas de la gdb.
+
+    Args:
+        conn: conexión con una transacción abierta, p. ej. EscritorMensajes.conexion.
+        id_gdb int: identificador de la gdb en la tabla VALW_GDBS_VALIDAR.
+        filas List[Tuple[str, str, str]]: registros (TIPO, OBJETO, HUELLA).
+    """
+    conn.execute(sqlalchemy.text(SQL_BORRAR_HUELLAS), {'gdb_id': int(id_gdb)})
+    if filas:
+        conn.execute(sqlalchemy.text(SQL_INSERTAR_HUELLA), [
+            {'gdb_id': int(id_gdb), 'tipo': tipo, 'objeto': objeto, 'huella': valor}
+            for tipo, objeto, valor in filas])
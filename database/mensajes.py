@@ -0,0 +1,360 @@
+import os
+import sys
+import time
+import sqlalchemy
+import pandas as pd
+
+from typing import Callable, Iterable, List, Optional
+
+from database.connection import schema
+from Validador import metricas
+from Validador.plantillas import PLANTILLAS, sql_vista_mensajes, texto_mensajes
+from utils.arcgis import arcpy
+from utils.utils import valw_gdb_mensaje, valw_mensaje_plantilla
+
+tamano_lote = int(os.getenv('VALW_MENSAJES_LOTE', '1000'))
+# Inserción directa (APPEND_VALUES) de todos los mensajes de la gdb en un solo arreglo, en Oracle
+insercion_directa = os.getenv('VALW_MENSAJES_DIRECTO', '0') == '1'
+# Tamaño del bind de MENSAJE_VAL (VARCHAR2), fijado antes de cada arreglo
+longitud_mensaje = int(os.getenv('VALW_MENSAJES_LONGITUD', '4000'))
+# Guardar los mensajes como plantilla y parámetros (PLANTILLA_ID, PARAM_n) en vez de MENSAJE_VAL
+guardar_plantillas = os.getenv('VALW_MENSAJES_PLANTILLAS', '0') == '1'
+
+_COLUMNAS_PLANTILLA = [valw_gdb_mensaje.plantilla_column] + valw_gdb_mensaje.parametro_columns
+
+SQL_INSERTAR_MENSAJE = f"""INSERT INTO {schema}.{valw_gdb_mensaje.table_name}
+    ({valw_gdb_mensaje.gdb_id_column}, {valw_gdb_mensaje.mensaje_column}, {valw_gdb_mensaje.validador_id}, {valw_gdb_mensaje.bool_column})
+    VALUES (:gdb_id, :mensaje, :validador_id, :esta_bien)"""
+
+# Para el cursor de cx_Oracle: binds posicionales, con el hint de inserción directa si aplica
+SQL_INSERTAR_MENSAJE_ORACLE = f"""INSERT {{hint}}INTO {schema}.{valw_gdb_mensaje.table_name}
+    ({valw_gdb_mensaje.gdb_id_column}, {valw_gdb_mensaje.mensaje_column}, {valw_gdb_mensaje.validador_id}, {valw_gdb_mensaje.bool_column})
+    VALUES (:1, :2, :3, :4)"""
+
+SQL_INSERTAR_PLANTILLA = f"""INSERT INTO {schema}.{valw_gdb_mensaje.table_name}
+    ({valw_gdb_mensaje.gdb_id_column}, {valw_gdb_mensaje.mensaje_column}, {valw_gdb_mensaje.validador_id}, {valw_gdb_mensaje.bool_column},
+    {', '.join(_COLUMNAS_PLANTILLA)})
+    VALUES (:gdb_id, :mensaje, :validador_id, :esta_bien, {', '.join(f':{columna.lower()}' for columna in _COLUMNAS_PLANTILLA)})"""
+
+SQL_INSERTAR_PLANTILLA_ORACLE = f"""INSERT {{hint}}INTO {schema}.{valw_gdb_mensaje.table_name}
+    ({valw_gdb_mensaje.gdb_id_column}, {valw_gdb_mensaje.mensaje_column}, {valw_gdb_mensaje.validador_id}, {valw_gdb_mensaje.bool_column},
+    {', '.join(_COLUMNAS_PLANTILLA)})
+    VALUES (:1, :2, :3, :4, {', '.join(f':{numero}' for numero in range(5, 5 + len(_COLUMNAS_PLANTILLA)))})"""
+
+SQL_BORRAR_MENSAJES = f"""DELETE FROM {schema}.{valw_gdb_mensaje.table_name}
+    WHERE {valw_gdb_mensaje.gdb_id_column} = :gdb_id"""
+
+SQL_COPIAR_MENSAJES = f"""INSERT INTO {schema}.{valw_gdb_mensaje.table_name}
+    ({valw_gdb_mensaje.gdb_id_column}, {valw_gdb_mensaje.mensaje_column}, {valw_gdb_mensaje.validador_id}, {valw_gdb_mensaje.bool_column})
+    SELECT :destino, {valw_gdb_mensaje.mensaje_column}, {valw_gdb_mensaje.validador_id}, {valw_gdb_mensaje.bool_column}
+    FROM {schema}.{valw_gdb_mensaje.table_name}
+    WHERE {valw_gdb_mensaje.gdb_id_column} = :origen AND {valw_gdb_mensaje.validador_id} IN :ids"""
+
+SQL_COPIAR_PLANTILLAS = f"""INSERT INTO {schema}.{valw_gdb_mensaje.table_name}
+    ({valw_gdb_mensaje.gdb_id_column}, {valw_gdb_mensaje.mensaje_column}, {valw_gdb_mensaje.validador_id}, {valw_gdb_mensaje.bool_column},
+    {', '.join(_COLUMNAS_PLANTILLA)})
+    SELECT :destino, {valw_gdb_mensaje.mensaje_column}, {valw_gdb_mensaje.validador_id}, {valw_gdb_mensaje.bool_column},
+    {', '.join(_COLUMNAS_PLANTILLA)}
+    FROM {schema}.{valw_gdb_mensaje.table_name}
+    WHERE {valw_gdb_mensaje.gdb_id_column} = :origen AND {valw_gdb_mensaje.validador_id} IN :ids"""
+
+SQL_PLANTILLAS = f"""SELECT {valw_mensaje_plantilla.id}, {valw_mensaje_plantilla.texto_column}
+    FROM {schema}.{valw_mensaje_plantilla.table_name}"""
+
+SQL_INSERTAR_PLANTILLA_TEXTO = f"""INSERT INTO {schema}.{valw_mensaje_plantilla.table_name}
+    ({valw_mensaje_plantilla.id}, {valw_mensaje_plantilla.texto_column}) VALUES (:id, :texto)"""
+
+# Vista con MENSAJE_VAL armado, la que leen los reportes con VALW_MENSAJES_PLANTILLAS activo
+SQL_VISTA_MENSAJES = sql_vista_mensajes(f'{schema}.')
+
+# Si las plantillas del catálogo ya se comprobaron en VALW_MENSAJE_PLANTILLA en este proceso
+# (ver registrar_plantillas)
+_plantillas_registradas = False
+# Si VALW_GDB_MENSAJE tiene PLANTILLA_ID y PARAM_n, comprobado una vez por proceso (ver copiar_mensajes)
+_columnas_plantilla: Optional[bool] = None
+
+
+def registrar_plantillas(connection) -> None:
+    """
+    Inserta en VALW_MENSAJE_PLANTILLA las plantillas del catálogo que faltan, una vez por proceso.
+
+    Raises:
+        ValueError: si una plantilla ya registrada tiene otro texto; los mensajes guardados con
+            ella cambiarían de texto.
+    """
+    global _plantillas_registradas
+    if _plantillas_registradas:
+        return
+    for intento in range(2):
+        registradas = connection.consultar(SQL_PLANTILLAS)
+        registradas = dict(zip(registradas[valw_mensaje_plantilla.id].astype(int),
+                               registradas[valw_mensaje_plantilla.texto_column]))
+        distintas = [plantilla for plantilla, texto in registradas.items()
+                     if plantilla in PLANTILLAS and texto != PLANTILLAS[plantilla]]
+        if distintas:
+            raise ValueError(f'Las plantillas {distintas} de {valw_mensaje_plantilla.table_name} tienen otro texto '
+                             f'que el del catálogo; una plantilla con otra redacción necesita un ID nuevo.')
+        faltantes = [{'id': plantilla, 'texto': texto} for plantilla, texto in PLANTILLAS.items()
+                     if plantilla not in registradas]
+        try:
+            connection.ejecutar_varios(SQL_INSERTAR_PLANTILLA_TEXTO, faltantes)
+            break
+        except sqlalchemy.exc.IntegrityError:
+            # Otro worker las registró a la vez: se vuelven a comparar
+            if intento:
+                raise
+    _plantillas_registradas = True
+
+
+class EscritorMensajes:
+    """
+    Destino único de los mensajes de validación de una gdb en VALW_GDB_MENSAJE.
+
+    Los mensajes se insertan por lotes de `lote` con executemany (arreglos de binds) dentro de
+    una sola transacción, que se confirma al cerrar el escritor. Si la validación falla no queda
+    ningún mensaje parcial de la gdb. Cada validador puede agregar sus mensajes apenas termina
+    (ver validar_gdb): los lotes completos se insertan mientras los demás siguen corriendo.
+
+    La transacción (y su conexión del pool) se abre recién con el primer lote completo o al
+    pedir `conexion`, de modo que una gdb con pocos mensajes no retiene una conexión mientras se
+    valida; `preparar` corre al abrirla, antes de cualquier inserción (p. ej. borrar_mensajes).
+
+    En Oracle los lotes se insertan con el cursor de cx_Oracle y binds posicionales con los
+    tamaños fijados de antemano (setinputsizes), sin que SQLAlchemy infiera tipos por fila ni
+    se redefinan los binds cuando un mensaje es más largo que los anteriores. Con `directo` todos
+    los mensajes se insertan al cerrar en un único arreglo con el hint APPEND_VALUES (inserción
+    directa, sobre el HWM y con menos undo): conviene para gdbs con cientos de miles de mensajes,
+    pero bloquea VALW_GDB_MENSAJE para los demás escritores hasta el commit y guarda todos los
+    mensajes en memoria. En otras bases `directo` no tiene efecto.
+
+    Con `plantillas` los mensajes de plantilla (ver mensajes_plantilla) se guardan como
+    PLANTILLA_ID y PARAM_n con MENSAJE_VAL nulo, y se leen con la vista VALW_GDB_MENSAJE_TEXTO;
+    si no, el texto se arma al agregarlos y se guarda en MENSAJE_VAL como siempre. Las plantillas
+    que faltan se registran en VALW_MENSAJE_PLANTILLA antes de la primera inserción.
+
+    Al cerrar informa los mensajes escritos y las filas por segundo de las inserciones, para
+    ajustar VALW_MENSAJES_LOTE.
+
+    Args:
+        connection: capa de acceso a datos (BaseDatos).
+        id_gdb int: identificador de la gdb en la tabla VALW_GDBS_VALIDAR.
+        lote int: cantidad de mensajes por executemany, por defecto VALW_MENSAJES_LOTE.
+        directo bool: inserción directa en Oracle, por defecto VALW_MENSAJES_DIRECTO.
+        preparar Callable[[Connection], None]: sentencias a ejecutar al abrir la transacción.
+        plantillas bool: guardar plantillas y parámetros, por defecto VALW_MENSAJES_PLANTILLAS.
+    """
+
+    def __init__(self, connection, id_gdb: int, lote: Optional[int] = None, directo: Optional[bool] = None,
+                 preparar: Optional[Callable[[sqlalchemy.engine.Connection], None]] = None,
+                 plantillas: Optional[bool] = None):
+        self.connection = connection
+        self.id_gdb = id_gdb
+        self.lote = lote or tamano_lote
+        self.directo = insercion_directa if directo is None else directo
+        self.preparar = preparar
+        self.plantillas = guardar_plantillas if plantillas is None else plantillas
+        self.total = 0
+        # Segundos dentro de las inserciones, para filas_por_segundo
+        self.segundos = 0.0
+        # (VALIDADOR_ID, MENSAJE_VAL, ESTA_BIEN) más PLANTILLA_ID y PARAM_n con `plantillas`
+        self._pendientes: List[tuple] = []
+        self._activo = False
+        self._transaccion = None
+        self._conn = None
+        self._oracle = False
+
+    def __enter__(self) -> 'EscritorMensajes':
+        self._activo = True
+        self._oracle = self.connection.dialecto == 'oracle'
+        return self
+
+    def __exit__(self, tipo, error, traza) -> bool:
+        if tipo is None:
+            try:
+                self.vaciar(final=True)
+            except BaseException:
+                self._cerrar(*sys.exc_info())
+                raise
+        suprimida = self._cerrar(tipo, error, traza)
+        if tipo is None and self.total:
+            arcpy.AddMessage(f'GDB {self.id_gdb}: {self.total} mensajes escritos en {self.segundos:.2f} s '
+                             f'({self.filas_por_segundo:.0f} filas/s)')
+        return suprimida
+
+    def _cerrar(self, tipo, error, traza) -> bool:
+        """
+        Confirma la transacción, o la revierte si hubo error, y descarta lo pendiente.
+        """
+        self._pendientes.clear()
+        self._activo = False
+        transaccion, self._transaccion, self._conn = self._transaccion, None, None
+        return transaccion.__exit__(tipo, error, traza) if transaccion is not None else False
+
+    @property
+    def conexion(self) -> sqlalchemy.engine.Connection:
+        """
+        Conexión de la transacción del escritor, para otras sentencias que deban confirmarse
+        junto con los mensajes.
+        """
+        if not self._activo:
+            raise RuntimeError('El escritor de mensajes debe usarse dentro de un bloque with.')
+        if self._conn is None:
+            if self.plantillas:
+                registrar_plantillas(self.connection)
+            self._transaccion = self.connection.transaccion()
+            self._conn = self._transaccion.__enter__()
+            if self.preparar is not None:
+                self.preparar(self._conn)
+        return self._conn
+
+    @property
+    def filas_por_segundo(self) -> float:
+        """
+        Mensajes insertados por segundo de inserción.
+        """
+        return self.total / self.segundos if self.segundos else 0.0
+
+    def agregar(self, id_validador: int, mensaje: str, bool_column: int) -> None:
+        """
+        Agrega un mensaje de texto libre; se inserta al completar el lote o al cerrar el escritor.
+        """
+        fila = (int(id_validador), mensaje, int(bool_column))
+        self._pendientes.append(fila + (None,) * len(_COLUMNAS_PLANTILLA) if self.plantillas else fila)
+        if len(self._pendientes) >= self.lote:
+            self.vaciar()
+
+    def agregar_df(self, df: pd.DataFrame) -> None:
+        """
+        Agrega los mensajes de un DataFrame con las columnas de VALW_GDB_MENSAJE.
+        """
+        if df.empty:
+            return
+        columnas = [
+            df[valw_gdb_mensaje.validador_id].astype('int64').tolist(),
+            df[valw_gdb_mensaje.mensaje_column].tolist() if self.plantillas else texto_mensajes(df).tolist(),
+            df[valw_gdb_mensaje.bool_column].astype('int64').tolist()]
+        if self.plantillas:
+            plantillas = df.reindex(columns=_COLUMNAS_PLANTILLA).astype(object)
+            plantillas = plantillas.where(plantillas.notna(), None)
+            columnas.append([None if plantilla is None else int(plantilla)
+                             for plantilla in plantillas[valw_gdb_mensaje.plantilla_column].tolist()])
+            columnas += [plantillas[columna].tolist() for columna in valw_gdb_mensaje.parametro_columns]
+        self._pendientes.extend(zip(*columnas))
+        if len(self._pendientes) >= self.lote:
+            self.vaciar()
+
+    def vaciar(self, final: bool = False) -> None:
+        """
+        Inserta los lotes completos de mensajes pendientes; con `final`, todos. Con inserción
+        directa no se inserta nada hasta el final.
+        """
+        if not self._activo:
+            raise RuntimeError('El escritor de mensajes debe usarse dentro de un bloque with.')
+        completos = len(self._pendientes) if final else len(self._pendientes) - len(self._pendientes) % self.lote
+        directo = self.directo and self._oracle
+        if not completos or (directo and not final):
+            return
+        conn = self.conexion
+        filas, self._pendientes = self._pendientes[:completos], self._pendientes[completos:]
+        with metricas.consulta_bd() as consulta:
+            inicio = time.perf_counter()
+            if directo:
+                self._insertar_oracle(filas, hint='/*+ APPEND_VALUES */ ')
+            else:
+                for i in range(0, len(filas), self.lote):
+                    if self._oracle:
+                        self._insertar_oracle(filas[i:i + self.lote])
+                    else:
+                        self._insertar(conn, filas[i:i + self.lote])
+            self.segundos += time.perf_counter() - inicio
+            consulta.contar(filas=len(filas))
+        self.total += len(filas)
+
+    def _insertar(self, conn: sqlalchemy.engine.Connection, filas: List[tuple]) -> None:
+        """
+        Inserta un lote de mensajes con SQLAlchemy, en la transacción del escritor.
+        """
+        id_gdb = int(self.id_gdb)
+        if not self.plantillas:
+            conn.execute(sqlalchemy.text(SQL_INSERTAR_MENSAJE), [
+                {'gdb_id': id_gdb, 'mensaje': mensaje, 'validador_id': id_validador, 'esta_bien': esta_bien}
+                for id_validador, mensaje, esta_bien in filas])
+            return
+        binds = [columna.lower() for columna in _COLUMNAS_PLANTILLA]
+        conn.execute(sqlalchemy.text(SQL_INSERTAR_PLANTILLA), [
+            {'gdb_id': id_gdb, 'mensaje': mensaje, 'validador_id': id_validador, 'esta_bien': esta_bien,
+             **dict(zip(binds, plantilla))}
+            for id_validador, mensaje, esta_bien, *plantilla in filas])
+
+    def _insertar_oracle(self, filas: List[tuple], hint: str = '') -> None:
+        """
+        Inserta un arreglo de mensajes con el cursor de cx_Oracle, en la transacción del escritor.
+        """
+        id_gdb = int(self.id_gdb)
+        cursor = self._conn.connection.cursor()
+        try:
+            if self.plantillas:
+                cursor.setinputsizes(int, longitud_mensaje, int, int, int,
+                                     *[longitud_mensaje] * len(valw_gdb_mensaje.parametro_columns))
+                sql = SQL_INSERTAR_PLANTILLA_ORACLE
+            else:
+                cursor.setinputsizes(int, longitud_mensaje, int, int)
+                sql = SQL_INSERTAR_MENSAJE_ORACLE
+            cursor.executemany(sql.format(hint=hint),
+                               [(id_gdb, mensaje, id_validador, esta_bien, *plantilla)
+                                for id_validador, mensaje, esta_bien, *plantilla in filas])
+        finally:
+            cursor.close()
+
+
+def borrar_mensajes(conn: sqlalchemy.engine.Connection, id_gdb: int,
+                    ids_validador: Optional[Iterable[int]] = None) -> None:
+    """
+    Borra los mensajes de la gdb; con `ids_validador` solo los de esos validadores.
+
+    Args:
+        conn: conexión con una transacción abierta, p. ej. EscritorMensajes.conexion.
+        id_gdb int: identificador de la gdb en la tabla VALW_GDBS_VALIDAR.
+        ids_validador Iterable[int]: IDs de VALW_DOM_VALIDADORES.
+    """
+    if ids_validador is None:
+        conn.execute(sqlalchemy.text(SQL_BORRAR_MENSAJES), {'gdb_id': int(id_gdb)})
+        return
+    ids = [int(id_validador) for id_validador in ids_validador]
+    if ids:
+        sql = sqlalchemy.text(f'{SQL_BORRAR_MENSAJES} AND {valw_gdb_mensaje.validador_id} IN :ids').bindparams(
+            sqlalchemy.bindparam('ids', expanding=True))
+        conn.execute(sql, {'gdb_id': int(id_gdb), 'ids': ids})
+
+
+def _tiene_columnas_plantilla(conn: sqlalchemy.engine.Connection) -> bool:
+    global _columnas_plantilla
+    if _columnas_plantilla is None:
+        columnas = {columna['name'].upper()
+                    for columna in sqlalchemy.inspect(conn).get_columns(valw_gdb_mensaje.table_name, schema=schema)}
+        _columnas_plantilla = all(columna.upper() in columnas for columna in _COLUMNAS_PLANTILLA)
+    return _columnas_plantilla
+
+
+def copiar_mensajes(conn: sqlalchemy.engine.Connection, id_origen: int, id_destino: int,
+                    ids_validador: Iterable[int], plantillas: Optional[bool] = None) -> int:
+    """
+    Copia los mensajes de los validadores `ids_validador` de la gdb `id_origen` a `id_destino`
+    tal como están guardados: si VALW_GDB_MENSAJE tiene PLANTILLA_ID y PARAM_n se copian
+    también, sin importar VALW_MENSAJES_PLANTILLAS en este proceso, porque los mensajes de
+    origen pudo escribirlos un proceso con la opción contraria.
+
+    Args:
+        plantillas bool: si la tabla tiene las columnas de plantilla; por defecto se consulta
+            una vez por proceso.
+    Returns:
+        int: mensajes copiados.
+    """
+    ids = [int(id_validador) for id_validador in ids_validador]
+    if not ids:
+        return 0
+    if plantillas is None:
+        plantillas = _tiene_columnas_plantilla(conn)
+    sql = sqlalchemy.text(SQL_COPIAR_PLANTILLAS if plantillas else SQL_COPIAR_MENSAJES).bindparams(
+        sqlalchemy.bindparam('ids', expanding=True))
+    return conn.execute(sql, {'origen': int(id_origen), 'destino': int(id_destino), 'ids': ids}).rowcount
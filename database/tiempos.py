@@ -0,0 +1,51 @@
+"""
+Registro por gdb de los tiempos de cada etapa de la validación (ver Validador/metricas.py).
+
+Solo se escribe con VALW_METRICAS=1 y VALW_METRICAS_BD=1, en MJEREZ.VALW_GDB_TIEMPOS:
+
+    CREATE TABLE MJEREZ.VALW_GDB_TIEMPOS (
+        GDB_ID NUMBER NOT NULL,          -- VALW_GDBS_VALIDAR.ID
+        EXPEDIENTE VARCHAR2(40),
+        ETAPA VARCHAR2(80) NOT NULL,
+        SEGUNDOS NUMBER NOT NULL,
+        BD_SEGUNDOS NUMBER,
+        BD_CONSULTAS NUMBER,
+        BD_FILAS NUMBER,
+        BYTES_GDB NUMBER,
+        REGISTROS NUMBER,
+        FECHA DATE DEFAULT SYSDATE
+    );
+"""
+from typing import Iterable
+
+from database.connection import schema
+from utils.utils import valw_gdb_tiempos
+
+SQL_INSERTAR_TIEMPO = f"""INSERT INTO {schema}.{valw_gdb_tiempos.table_name}
+    ({valw_gdb_tiempos.gdb_id_column}, {valw_gdb_tiempos.expediente_column}, {valw_gdb_tiempos.etapa_column},
+     {valw_gdb_tiempos.segundos_column}, {valw_gdb_tiempos.bd_segundos_column}, {valw_gdb_tiempos.bd_consultas_column},
+     {valw_gdb_tiempos.bd_filas_column}, {valw_gdb_tiempos.bytes_gdb_column}, {valw_gdb_tiempos.registros_column})
+    VALUES (:gdb_id, :expediente, :etapa, :segundos, :bd_segundos, :bd_consultas, :bd_filas, :bytes_gdb, :registros)"""
+
+
+def guardar_tiempos(connection, id_gdb: int, expediente: str, tramos: Iterable) -> None:
+    """
+    Inserta un registro por tramo medido de la gdb.
+
+    Args:
+        connection: capa de acceso a datos (BaseDatos).
+        id_gdb int: identificador de la gdb en la tabla VALW_GDBS_VALIDAR.
+        expediente str: código del expediente.
+        tramos Iterable[Tramo]: tramos de metricas.gdb(...).tramos.
+    """
+    connection.ejecutar_varios(SQL_INSERTAR_TIEMPO, [{
+        'gdb_id': int(id_gdb),
+        'expediente': expediente,
+        'etapa': tramo.etapa,
+        'segundos': tramo.segundos,
+        'bd_segundos': tramo.valores['bd_segundos'],
+        'bd_consultas': int(tramo.valores['bd_consultas']),
+        'bd_filas': int(tramo.valores['bd_filas']),
+        'bytes_gdb': int(tramo.valores['bytes_gdb']),
+        'registros': int(tramo.valores['registros']),
+    } for tramo in tramos])
@@ -0,0 +1,46 @@
+"""
+Base SQLite con las tablas del esquema MJEREZ (las del benchmark), adjunta como MJEREZ igual
+que con DB_URL=sqlite:///..., y gdbs sintéticas del benchmark.
+"""
+import sqlite3
+
+import pytest
+
+from benchmark.entorno import DDL, ESTADOS, VALIDADORES
+from benchmark.gdb_sintetica import generar_gdb
+from database.connection import BaseDatos
+
+EXPEDIENTE = 'TST-00001'
+# Polígono de DELIMIT_PROYEC_PG en las gdbs sintéticas
+DELIMITACION = [[(-74.0, 4.0), (-74.0, 4.01), (-73.99, 4.01), (-73.99, 4.0), (-74.0, 4.0)]]
+
+
+@pytest.fixture
+def ruta_bd(tmp_path) -> str:
+    ruta = str(tmp_path / 'valw.db')
+    with sqlite3.connect(ruta) as conn:
+        conn.executescript(DDL)
+        conn.executemany('INSERT INTO VALW_ESTADO_PROCESO VALUES (?, ?)', enumerate(ESTADOS, start=1))
+        conn.executemany('INSERT INTO VALW_DOM_VALIDADORES VALUES (?, ?)', enumerate(VALIDADORES, start=1))
+    return ruta
+
+
+@pytest.fixture
+def bd(ruta_bd) -> BaseDatos:
+    base = BaseDatos.desde_url(f'sqlite:///{ruta_bd}')
+    yield base
+    if base._engine is not None:
+        base.engine.dispose()
+
+
+@pytest.fixture(scope='session')
+def gdb_sintetica(tmp_path_factory) -> str:
+    """
+    Carpeta .gdb con 2 datasets, 3 feature classes y 2 tablas de 2500 registros (3 bloques del
+    .gdbtablx), con COD_EXPEDIENTE = EXPEDIENTE salvo uno de cada CADA_EXPEDIENTE_ERRADO y
+    DELIMIT_PROYEC_PG = DELIMITACION.
+    """
+    ruta = str(tmp_path_factory.mktemp('gdb') / f'{EXPEDIENTE}_20240101.gdb')
+    generar_gdb(ruta, datasets=2, feature_classes=3, campos=4, filas=2500, delimitacion=DELIMITACION,
+                expediente=EXPEDIENTE)
+    return ruta
@@ -0,0 +1,43 @@
+import pandas as pd
+import pytest
+
+from Validador import cod_expediente
+from Validador.cod_expediente import errores_expediente, validar_expediente
+from Validador.filegdb import open_workspace
+from Validador.gdb_catalog import read_catalog
+from benchmark.gdb_sintetica import CADA_EXPEDIENTE_ERRADO
+
+from conftest import EXPEDIENTE
+
+
+@pytest.fixture
+def workspace(gdb_sintetica):
+    with open_workspace(gdb_sintetica) as workspace:
+        yield workspace
+
+
+def test_errores_expediente_ignora_espacios_y_mayusculas():
+    valores = pd.Series([EXPEDIENTE, f' {EXPEDIENTE.lower()} ', None, 'OTRO'])
+    assert errores_expediente(valores, EXPEDIENTE).tolist() == [None, 'OTRO']
+
+
+def test_cuenta_los_errores_de_cada_tabla(workspace):
+    resultado = validar_expediente(workspace, read_catalog(workspace), EXPEDIENTE)
+    assert sorted(resultado['NOMBRE']) == ['DELIMIT_PROYEC_PG', 'Ficha_000', 'Ficha_001',
+                                           'OBJETO_0001_PG', 'OBJETO_0002_PG']
+    assert resultado['REGISTROS'].tolist() == [2500] * 5
+    assert resultado['ERRORES'].tolist() == [-(-2500 // CADA_EXPEDIENTE_ERRADO)] * 5
+    assert resultado['COMPLETA'].all()
+
+
+@pytest.mark.parametrize('bloque', [10, 1000, 65536])
+def test_se_detiene_al_superar_el_maximo_de_errores(workspace, monkeypatch, bloque):
+    # Con varios bloques por tabla, el generador de read_columns queda suspendido al detenerse
+    monkeypatch.setattr(cod_expediente, 'tamano_bloque_expediente', bloque)
+    resultado = validar_expediente(workspace, read_catalog(workspace), 'ZZZ', max_errores=5, workers=1)
+    primera = resultado.iloc[0]
+    assert primera['REGISTROS'] == min(bloque, 2500)
+    assert primera['COMPLETA'] == (bloque >= 2500)
+    # Las tablas siguientes no se leen
+    assert (resultado['REGISTROS'].iloc[1:] == 0).all()
+    assert not resultado['COMPLETA'].iloc[1:].any()
@@ -0,0 +1,97 @@
+import pytest
+import sqlalchemy
+
+from database.cola import finalizar, liberar, reclamar, reencolar_vencidos, renovar
+
+SQL_GDBS = 'INSERT INTO MJEREZ.VALW_GDBS_VALIDAR (RUTA, ESTADO_ID) VALUES (:ruta, :estado)'
+SQL_ESTADOS = '''SELECT G.ID, E.ESTADO, G.ARRENDADO_POR, G.INTENTOS FROM MJEREZ.VALW_GDBS_VALIDAR G
+    JOIN MJEREZ.VALW_ESTADO_PROCESO E ON E.ID_ESTADO_PROCESO = G.ESTADO_ID ORDER BY G.ID'''
+SQL_VENCER = "UPDATE MJEREZ.VALW_GDBS_VALIDAR SET ARRENDADO_HASTA = '2000-01-01 00:00:00.000' WHERE ID = :id"
+
+
+def registrar(bd, rutas, estado=1):
+    bd.ejecutar_varios(SQL_GDBS, [{'ruta': ruta, 'estado': estado} for ruta in rutas])
+
+
+def estados(bd):
+    return [tuple(fila) for fila in bd.filas(SQL_ESTADOS)]
+
+
+def test_reclamar_en_orden_hasta_el_limite(bd):
+    registrar(bd, ['a.gdb', 'b.gdb', 'c.gdb'])
+    registrar(bd, ['finalizada.gdb'], estado=3)
+    assert reclamar(bd, 'n1', limite=2) == [(1, 'a.gdb'), (2, 'b.gdb')]
+    assert reclamar(bd, 'n2', limite=5) == [(3, 'c.gdb')]
+    assert reclamar(bd, 'n2', limite=5) == []
+    assert estados(bd) == [(1, 'En proceso', 'n1', 1), (2, 'En proceso', 'n1', 1),
+                           (3, 'En proceso', 'n2', 1), (4, 'Finalizado', None, 0)]
+
+
+def test_reclamar_sin_limite(bd):
+    registrar(bd, ['a.gdb'])
+    assert reclamar(bd, 'n1', limite=0) == []
+    assert estados(bd) == [(1, 'Sin iniciar', None, 0)]
+
+
+def test_renovar_solo_las_del_nodo(bd):
+    registrar(bd, ['a.gdb', 'b.gdb', 'c.gdb'])
+    reclamar(bd, 'n1', limite=2)
+    reclamar(bd, 'n2', limite=1)
+    bd.ejecutar(SQL_VENCER, id=1)
+    assert renovar(bd, 'n1') == 2
+    # Renovado, el arrendamiento ya no está vencido
+    assert reencolar_vencidos(bd) == 0
+    assert renovar(bd, 'otro') == 0
+
+
+def test_reencolar_vencidos(bd):
+    registrar(bd, ['a.gdb', 'b.gdb'])
+    registrar(bd, ['app.gdb'], estado=2)
+    reclamar(bd, 'n1', limite=2)
+    bd.ejecutar(SQL_VENCER, id=1)
+    assert reencolar_vencidos(bd) == 1
+    # Las 'En proceso' sin arrendamiento (app.py) no se tocan
+    assert estados(bd) == [(1, 'Sin iniciar', None, 1), (2, 'En proceso', 'n1', 1), (3, 'En proceso', None, 0)]
+    assert reclamar(bd, 'n2', limite=1) == [(1, 'a.gdb')]
+    assert estados(bd)[0] == (1, 'En proceso', 'n2', 2)
+
+
+def test_max_intentos_marca_error(bd):
+    registrar(bd, ['a.gdb'])
+    for _ in range(2):
+        assert reclamar(bd, 'n1', limite=1) == [(1, 'a.gdb')]
+        bd.ejecutar(SQL_VENCER, id=1)
+        assert reencolar_vencidos(bd, intentos=2) == 1
+    assert estados(bd) == [(1, 'Error', None, 2)]
+    assert reclamar(bd, 'n1', limite=1) == []
+
+
+def test_liberar_solo_el_nodo_del_arrendamiento(bd):
+    registrar(bd, ['a.gdb'])
+    reclamar(bd, 'n1', limite=1)
+    assert not liberar(bd, 1, 'n2', 'Error')
+    assert estados(bd) == [(1, 'En proceso', 'n1', 1)]
+    assert liberar(bd, 1, 'n1', 'Finalizado')
+    assert estados(bd) == [(1, 'Finalizado', 'n1', 1)]
+
+
+def test_finalizar_con_el_arrendamiento_vencido(bd):
+    registrar(bd, ['a.gdb'])
+    reclamar(bd, 'n1', limite=1)
+    bd.ejecutar(SQL_VENCER, id=1)
+    reencolar_vencidos(bd)
+    reclamar(bd, 'n2', limite=1)
+
+    # n1 perdió la gdb: sus mensajes se revierten junto con la transacción
+    sql_mensaje = "INSERT INTO MJEREZ.VALW_GDB_MENSAJE (GDB_ID, MENSAJE_VAL) VALUES (1, 'n1')"
+    with pytest.raises(RuntimeError):
+        with bd.transaccion() as conn:
+            conn.execute(sqlalchemy.text(sql_mensaje))
+            if not finalizar(conn, 1, 'n1'):
+                raise RuntimeError('arrendamiento vencido')
+    assert bd.escalar('SELECT COUNT(*) FROM MJEREZ.VALW_GDB_MENSAJE') == 0
+    assert estados(bd) == [(1, 'En proceso', 'n2', 2)]
+
+    with bd.transaccion() as conn:
+        assert finalizar(conn, 1, 'n2')
+    assert estados(bd) == [(1, 'Finalizado', 'n2', 2)]
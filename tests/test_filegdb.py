@@ -0,0 +1,195 @@
+import os
+import struct
+
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from Validador.filegdb import (FGFT_DATETIME, FGFT_FLOAT64, FGFT_INT32, FGFT_OBJECTID, FGFT_STRING, GdbFolder,
+                               GdbTable, GdbZip, _read_geometry_def, _read_varints, open_workspace, read_extent,
+                               read_fields, read_shape, read_varint, read_varuint, table_file_name)
+from Validador.gdb_catalog import read_catalog, table_ids
+from benchmark.gdb_sintetica import Campo, _varint, _varuint, comprimir_gdb, escribir_tabla
+
+from conftest import DELIMITACION
+
+DATA = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'Data')
+# gdb, expediente, tablas y cantidad por tipo de ítem del catálogo
+GDBS = [
+    ('GBH-141_20220303.gdb.zip', 'GBH-141', 146,
+     {'Coded Value Domain': 163, 'Feature Class': 109, 'Table': 37, 'Feature Dataset': 17,
+      'Relationship Class': 16, 'Workspace': 1}),
+    ('IDO-08061_20220307.gdb.zip', 'IDO-08061', 146,
+     {'Coded Value Domain': 163, 'Feature Class': 109, 'Table': 37, 'Feature Dataset': 17,
+      'Relationship Class': 16, 'Workspace': 1}),
+    ('IDO-08061_202203071.gdb.zip', 'IDO-08061', 141,
+     {'Coded Value Domain': 163, 'Feature Class': 107, 'Table': 34, 'Feature Dataset': 17,
+      'Relationship Class': 13, 'Workspace': 1}),
+]
+
+# Tabla con campos fijos y variables, anulables o no, para read_columns
+CAMPOS = [Campo('OBJECTID', FGFT_OBJECTID, False, 4), Campo('ENTERO', FGFT_INT32, False, 4),
+          Campo('TEXTO', FGFT_STRING, True, 50), Campo('DOBLE', FGFT_FLOAT64, True, 8),
+          Campo('FECHA', FGFT_DATETIME, True, 8), Campo('OPCIONAL', FGFT_INT32, True, 4),
+          Campo('FINAL', FGFT_INT32, False, 4)]
+
+
+def fila(i: int) -> list:
+    return [i, 'ñ' * (i % 7) if i % 3 else None, i / 4 if i % 5 else None,
+            datetime(2020, 1, 1 + i % 28) if i % 2 else None, -i if i % 4 else None, 2 * i]
+
+
+@pytest.fixture
+def tabla(tmp_path):
+    carpeta = str(tmp_path / 'tabla.gdb')
+    os.makedirs(carpeta)
+    escribir_tabla(carpeta, 9, CAMPOS, [fila(i) for i in range(3000)])
+    return carpeta
+
+
+def dispersar(carpeta: str, table_id: int, presentes) -> None:
+    """
+    Deja en el .gdbtablx solo los bloques `presentes`, con el mapa de bloques al final, como
+    una tabla a la que se le borraron bloques completos de filas.
+    """
+    ruta = os.path.join(carpeta, f'{table_file_name(table_id)}.gdbtablx')
+    with open(ruta, 'rb') as archivo:
+        datos = archivo.read()
+    _, bloques, filas, tamano = struct.unpack_from('<iiii', datos, 0)
+    posiciones = b''.join(datos[16 + bloque * 1024 * tamano:16 + (bloque + 1) * 1024 * tamano] for bloque in presentes)
+    mapa = sum(1 << bloque for bloque in presentes)
+    with open(ruta, 'wb') as archivo:
+        archivo.write(struct.pack('<iiii', 3, len(presentes), filas, tamano) + posiciones
+                      + struct.pack('<IIII', 1, bloques, len(presentes), 0) + struct.pack('<I', mapa))
+
+
+def test_varuint_y_varint():
+    assert read_varuint(b'\x96\x01', 0) == (150, 2)
+    assert read_varuint(b'\x00\x7f', 1) == (127, 2)
+    assert read_varint(b'\x05', 0) == (5, 1)
+    assert read_varint(b'\x45', 0) == (-5, 1)
+    for valor in [0, 1, -1, 63, -64, 64, 10 ** 12, -(10 ** 12)]:
+        assert read_varint(_varint(valor), 0) == (valor, len(_varint(valor)))
+        assert read_varuint(_varuint(abs(valor)), 0)[0] == abs(valor)
+
+
+@pytest.mark.parametrize('cantidad', [10, 500])
+def test_varints_vectorizados_igual_que_uno_a_uno(cantidad):
+    valores = np.random.default_rng(0).integers(-(10 ** 10), 10 ** 10, cantidad)
+    buffer = b'\xff' + b''.join(_varint(int(valor)) for valor in valores) + b'\x00'
+    leidos, fin = _read_varints(buffer, 1, cantidad)
+    assert leidos.tolist() == valores.tolist()
+    assert fin == len(buffer) - 1
+
+
+@pytest.mark.parametrize('nombre, expediente, tablas, tipos', GDBS)
+def test_catalogo_de_gdbs_reales(nombre, expediente, tablas, tipos):
+    with open_workspace(os.path.join(DATA, nombre)) as workspace:
+        catalog = read_catalog(workspace)
+        assert len(table_ids(catalog)) == tablas
+        assert catalog['TIPO'].value_counts().to_dict() == tipos
+        delimitacion = catalog.loc[catalog['NOMBRE'] == 'DELIMIT_PROYEC_PG'].iloc[0]
+        assert (delimitacion['DATASET'], delimitacion['SRSCODE']) == ('TOPOGRAFIA_LOCAL', 4686)
+
+        with GdbTable.open(workspace, table_ids(catalog)['DELIMIT_PROYEC_PG'], 'DELIMIT_PROYEC_PG') as table:
+            assert table.valid_rows == 1
+            [registro] = list(table.rows())
+            assert registro['COD_EXPEDIENTE'] == expediente
+            assert registro['OBSERV'] is None and registro['AREA_HA'] is None
+            columnas = next(table.read_columns(['OBJECTID', 'COD_EXPEDIENTE', 'OBSERV', 'AREA_HA', 'ID']))
+            assert columnas.to_dict('records') == [{'OBJECTID': 1, 'COD_EXPEDIENTE': expediente, 'OBSERV': None,
+                                                    'AREA_HA': pytest.approx(np.nan, nan_ok=True), 'ID': registro['ID']}]
+
+            # Capa con Z y M: los rangos se saltan antes de los tamaños de grilla
+            geometria = table.geometry_field.geometry
+            assert geometria.wkt.startswith('GEOGCS["GCS_MAGNA"')
+            assert geometria.has_z and geometria.has_m
+            assert geometria.xyscale == pytest.approx(1e9)
+            [anillo] = read_shape(registro['SHAPE'], geometria)
+            assert (anillo[0] == anillo[-1]).all()
+            xmin, ymin, xmax, ymax = geometria.extent
+            assert anillo[:, 0].min() == pytest.approx(xmin) and anillo[:, 1].max() == pytest.approx(ymax)
+            assert read_extent(registro['SHAPE'], geometria) == pytest.approx(geometria.extent)
+
+
+def test_zip_almacenado_y_comprimido_igual_que_la_carpeta(gdb_sintetica, tmp_path):
+    with GdbFolder(gdb_sintetica) as carpeta:
+        esperado = read_catalog(carpeta)
+    for comprimido in (False, True):
+        ruta = comprimir_gdb(gdb_sintetica, str(tmp_path / f'{comprimido}.gdb.zip'), comprimido=comprimido)
+        with GdbZip(ruta) as workspace:
+            catalog = read_catalog(workspace)
+            pd.testing.assert_frame_equal(catalog, esperado)
+            with GdbTable.open(workspace, table_ids(catalog)['DELIMIT_PROYEC_PG']) as table:
+                anillos = read_shape(next(table.rows(['SHAPE']))['SHAPE'], table.geometry_field.geometry)
+                np.testing.assert_allclose(anillos[0], DELIMITACION[0], atol=1e-8)
+
+
+def test_catalogo_sintetico(gdb_sintetica):
+    with open_workspace(gdb_sintetica) as workspace:
+        catalog = read_catalog(workspace)
+        assert catalog['TIPO'].value_counts().to_dict() == {'Feature Dataset': 2, 'Feature Class': 3, 'Table': 2,
+                                                             'Coded Value Domain': 1, 'Range Domain': 1}
+        fields, geometry_type = read_fields(workspace, table_ids(catalog)['OBJETO_0001_PG'])
+        assert [field.type_name for field in fields] == ['OID', 'Geometry', 'String', 'Integer', 'Double', 'Date']
+        assert geometry_type == 4
+
+
+# Solo ENTERO tiene posición constante; los demás se ubican saltando los campos anulables y variables
+@pytest.mark.parametrize('campos', [['ENTERO'], ['ENTERO', 'FINAL'], ['TEXTO', 'DOBLE', 'FECHA', 'OPCIONAL', 'FINAL'],
+                                    ['OBJECTID', 'FINAL', 'TEXTO']])
+def test_read_columns_igual_que_read_row(tabla, campos):
+    with GdbFolder(tabla) as workspace, GdbTable.open(workspace, 9) as table:
+        bloques = list(table.read_columns(campos, chunk_size=1000))
+        assert [len(bloque) for bloque in bloques] == [1000, 1000, 1000]
+        columnas = pd.concat(bloques, ignore_index=True)
+        filas = list(table.rows())
+    assert columnas['OBJECTID'].tolist() == list(range(1, 3001))
+    for campo in campos:
+        esperado = [registro[campo] for registro in filas]
+        leido = columnas[campo].astype(object).where(columnas[campo].notna(), None).tolist()
+        if campo == 'FECHA':
+            leido = [None if valor is None else pd.Timestamp(valor).to_pydatetime() for valor in leido]
+        assert leido == esperado, campo
+    assert filas[2]['TEXTO'] == 'ññ' and filas[3]['TEXTO'] is None
+
+
+def test_mapa_de_bloques_disperso(tabla):
+    dispersar(tabla, 9, [0, 2])
+    with GdbFolder(tabla) as workspace, GdbTable.open(workspace, 9) as table:
+        esperados = list(range(1, 1025)) + list(range(2049, 3001))
+        oids, offsets = table.row_offsets()
+        assert oids.tolist() == esperados
+        assert table.row_offset(1500) == 0
+        assert table.row_offset(2049) == offsets[1024]
+        assert table.row_offsets(1000, 2100)[0].tolist() == list(range(1000, 1025)) + list(range(2049, 2100))
+        assert table.row_offsets(1100, 2000)[0].tolist() == []
+        columnas = pd.concat(table.read_columns(['ENTERO', 'TEXTO'], chunk_size=700), ignore_index=True)
+        assert columnas['OBJECTID'].tolist() == esperados
+        assert columnas['ENTERO'].tolist() == [oid - 1 for oid in esperados]
+        assert [registro['ENTERO'] for registro in table.rows(['ENTERO'])] == [oid - 1 for oid in esperados]
+
+
+def definicion_geometria(*rangos: float, grillas=(0.1,)) -> bytes:
+    wkt = 'GEOGCS["GCS_MAGNA"]'.encode('utf-16-le')
+    return (struct.pack('<H', len(wkt)) + wkt + bytes([1]) + struct.pack('<3d', -400, -400, 1e9)
+            + struct.pack('<d', 1e-8) + struct.pack('<4d', -80, -5, -66, 14)
+            + struct.pack(f'<{len(rangos)}d', *rangos) + struct.pack('<BI', 0, len(grillas))
+            + struct.pack(f'<{len(grillas)}d', *grillas))
+
+
+@pytest.mark.parametrize('rangos', [(), (-1.0, 1.0)])
+def test_definicion_de_geometria(rangos):
+    datos = definicion_geometria(*rangos, grillas=(0.1, 1.0)) + b'\xaa'
+    geometria, fin = _read_geometry_def(datos, 0)
+    assert geometria.extent == (-80, -5, -66, 14)
+    assert geometria.xyscale == 1e9 and not geometria.has_z
+    assert fin == len(datos) - 1
+
+
+def test_definicion_de_geometria_sin_grilla():
+    datos = definicion_geometria()[:-13] + b'\x01' * 24
+    with pytest.raises(ValueError):
+        _read_geometry_def(datos, 0)
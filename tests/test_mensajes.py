@@ -0,0 +1,34 @@
+import pytest
+
+from database import mensajes
+from database.mensajes import copiar_mensajes
+
+SQL_MENSAJE = '''INSERT INTO MJEREZ.VALW_GDB_MENSAJE (GDB_ID, MENSAJE_VAL, VALIDADOR_ID, ESTA_BIEN, PLANTILLA_ID, PARAM_1)
+    VALUES (:gdb, :mensaje, :validador, 1, :plantilla, :param)'''
+SQL_COPIADOS = '''SELECT VALIDADOR_ID, MENSAJE_VAL, PLANTILLA_ID, PARAM_1 FROM MJEREZ.VALW_GDB_MENSAJE
+    WHERE GDB_ID = 2 ORDER BY VALIDADOR_ID'''
+
+
+@pytest.fixture(autouse=True)
+def sin_columnas_comprobadas(monkeypatch):
+    monkeypatch.setattr(mensajes, '_columnas_plantilla', None)
+
+
+@pytest.mark.parametrize('guardar_plantillas', [False, True])
+def test_copiar_mensajes_como_se_guardaron(bd, monkeypatch, guardar_plantillas):
+    # Los mensajes de origen los escribió un proceso con la opción contraria, o con ambas
+    monkeypatch.setattr(mensajes, 'guardar_plantillas', guardar_plantillas)
+    bd.ejecutar_varios(SQL_MENSAJE, [
+        {'gdb': 1, 'mensaje': None, 'validador': 1, 'plantilla': 4, 'param': 'VIA'},
+        {'gdb': 1, 'mensaje': 'Texto', 'validador': 2, 'plantilla': None, 'param': None},
+        {'gdb': 1, 'mensaje': 'Otro', 'validador': 3, 'plantilla': None, 'param': None},
+    ])
+    with bd.transaccion() as conn:
+        assert copiar_mensajes(conn, 1, 2, [1, 2]) == 2
+    assert [tuple(fila) for fila in bd.filas(SQL_COPIADOS)] == [(1, None, 4, 'VIA'), (2, 'Texto', None, None)]
+
+
+def test_copiar_mensajes_sin_ids(bd):
+    with bd.transaccion() as conn:
+        assert copiar_mensajes(conn, 1, 2, []) == 0
+    assert mensajes._columnas_plantilla is None
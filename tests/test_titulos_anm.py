@@ -0,0 +1,143 @@
+import asyncio
+import json
+import re
+import threading
+
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+import requests
+
+from Validador.titulos_anm import ProveedorTitulos
+
+ETAG = '"v1"'
+LAST_MODIFIED = 'Mon, 07 Mar 2022 10:00:00 GMT'
+
+
+def titulo(expediente: str) -> dict:
+    return {'geometryType': 'esriGeometryPolygon', 'spatialReference': {'wkid': 4686},
+            'features': [{'attributes': {'CODIGO_EXPEDIENTE': expediente},
+                          'geometry': {'rings': [[[-74, 4], [-74, 5], [-73, 5], [-73, 4], [-74, 4]]]}}]}
+
+
+class ServicioANM:
+    """
+    WFS local que responde ESRI GeoJSON. `respuestas[expediente]` es una lista de códigos HTTP
+    que se consumen en orden (el último se repite); por defecto 200.
+    """
+
+    def __init__(self):
+        self.respuestas = {}
+        self.peticiones = []
+        servicio = self
+
+        class Manejador(BaseHTTPRequestHandler):
+            def do_GET(self):
+                filtro = parse_qs(urlparse(self.path).query)['Filter'][0]
+                expediente = re.search(r'<ogc:Literal>(.*)</ogc:Literal>', filtro).group(1)
+                servicio.peticiones.append((expediente, dict(self.headers)))
+                codigos = servicio.respuestas.get(expediente, [200])
+                codigo = codigos.pop(0) if len(codigos) > 1 else codigos[0]
+                if codigo == 200 and self.headers.get('If-None-Match') == ETAG:
+                    codigo = 304
+                if codigo != 200:
+                    self.send_response(codigo)
+                    self.end_headers()
+                    return
+                cuerpo = json.dumps(titulo(expediente) if expediente != 'INVALIDO' else {'error': 'x'}).encode()
+                self.send_response(200)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('ETag', ETAG)
+                self.send_header('Last-Modified', LAST_MODIFIED)
+                self.send_header('Content-Length', str(len(cuerpo)))
+                self.end_headers()
+                self.wfile.write(cuerpo)
+
+            def log_message(self, *args):
+                pass
+
+        self._http = ThreadingHTTPServer(('127.0.0.1', 0), Manejador)
+        self.url = f'http://127.0.0.1:{self._http.server_port}/'
+        threading.Thread(target=self._http.serve_forever, daemon=True).start()
+
+    def detener(self) -> None:
+        self._http.shutdown()
+        self._http.server_close()
+
+    def de(self, expediente: str) -> list:
+        return [encabezados for nombre, encabezados in self.peticiones if nombre == expediente]
+
+
+@pytest.fixture
+def servicio():
+    servicio = ServicioANM()
+    yield servicio
+    servicio.detener()
+
+
+@pytest.fixture(autouse=True)
+def sin_esperas(monkeypatch):
+    # Los reintentos esperan 1, 2, 4... segundos
+    async def dormir(segundos):
+        pass
+    monkeypatch.setattr(asyncio, 'sleep', dormir)
+
+
+def proveedor(servicio: ServicioANM, tmp_path, **kwargs) -> ProveedorTitulos:
+    return ProveedorTitulos(url=servicio.url, directorio=str(tmp_path / 'titulos'), timeout=5, **kwargs)
+
+
+def test_dentro_del_ttl_no_consulta_el_servicio(servicio, tmp_path):
+    anm = proveedor(servicio, tmp_path, ttl=3600)
+    assert anm.titulo('IDO-08061') == titulo('IDO-08061')
+    assert anm.titulo('IDO-08061') == titulo('IDO-08061')
+    assert len(servicio.de('IDO-08061')) == 1
+    # Otro proceso con la misma carpeta también usa la copia
+    assert proveedor(servicio, tmp_path, ttl=3600).titulo('IDO-08061') == titulo('IDO-08061')
+    assert len(servicio.de('IDO-08061')) == 1
+
+
+def test_vencido_se_revalida_con_peticion_condicional(servicio, tmp_path):
+    anm = proveedor(servicio, tmp_path, ttl=0)
+    anm.titulo('IDO-08061')
+    assert anm.titulo('IDO-08061') == titulo('IDO-08061')
+    primera, segunda = servicio.de('IDO-08061')
+    assert 'If-None-Match' not in primera
+    assert segunda['If-None-Match'] == ETAG
+    assert segunda['If-Modified-Since'] == LAST_MODIFIED
+
+
+def test_reintenta_los_errores_5xx(servicio, tmp_path):
+    servicio.respuestas['IDO-08061'] = [503, 502, 200]
+    assert proveedor(servicio, tmp_path, reintentos=3).titulo('IDO-08061') == titulo('IDO-08061')
+    assert len(servicio.de('IDO-08061')) == 3
+
+
+def test_no_reintenta_los_errores_4xx(servicio, tmp_path):
+    servicio.respuestas['IDO-08061'] = [404]
+    with pytest.raises(requests.HTTPError):
+        proveedor(servicio, tmp_path, reintentos=3).titulo('IDO-08061')
+    assert len(servicio.de('IDO-08061')) == 1
+
+
+def test_usa_la_copia_vencida_si_el_servicio_no_responde(servicio, tmp_path):
+    proveedor(servicio, tmp_path).titulo('IDO-08061')
+    servicio.respuestas['IDO-08061'] = [500]
+    assert proveedor(servicio, tmp_path, ttl=0, reintentos=2).titulo('IDO-08061') == titulo('IDO-08061')
+
+    servicio.detener()
+    assert proveedor(servicio, tmp_path, ttl=0, reintentos=1).titulo('IDO-08061') == titulo('IDO-08061')
+    with pytest.raises(requests.ConnectionError):
+        proveedor(servicio, tmp_path, ttl=0, reintentos=1).titulo('SIN-COPIA')
+
+
+def test_precargar_informa_el_error_de_cada_expediente(servicio, tmp_path):
+    servicio.respuestas['CAIDO'] = [500]
+    errores = proveedor(servicio, tmp_path, reintentos=2).precargar(['IDO-08061', 'CAIDO', 'INVALIDO', 'IDO-08061'])
+    assert list(errores) == ['IDO-08061', 'CAIDO', 'INVALIDO']
+    assert errores['IDO-08061'] is None
+    assert isinstance(errores['CAIDO'], requests.HTTPError)
+    assert isinstance(errores['INVALIDO'], ValueError)
+    assert len(servicio.de('IDO-08061')) == 1
+    assert len(servicio.de('CAIDO')) == 2
@@ -0,0 +1,43 @@
+from types import SimpleNamespace
+
+import pytest
+
+from Validador import plantillas, validator_web
+from Validador.filegdb import open_workspace
+from Validador.gdb_catalog import read_catalog
+from utils.utils import valw_gdb_mensaje
+
+from conftest import DELIMITACION, EXPEDIENTE
+
+
+def titulo(anillos) -> dict:
+    return {'spatialReference': {'wkid': 4686}, 'features': [{'geometry': {'rings': anillos}}]}
+
+
+@pytest.fixture
+def coincidencia(gdb_sintetica, monkeypatch):
+    monkeypatch.setattr(validator_web, '_id_validador', lambda connection, validador: 7)
+
+    def validar(anillos):
+        monkeypatch.setattr(validator_web, 'proveedor_titulos',
+                            lambda: SimpleNamespace(titulo=lambda expediente: titulo(anillos)))
+        with open_workspace(gdb_sintetica) as workspace:
+            mensaje = validator_web.spatial_matching(None, 1, EXPEDIENTE, workspace, read_catalog(workspace))
+        return mensaje[valw_gdb_mensaje.plantilla_column].item(), mensaje[valw_gdb_mensaje.bool_column].item()
+    return validar
+
+
+def test_delimitacion_coincide(coincidencia):
+    assert coincidencia(DELIMITACION) == (plantillas.DELIMITACION_COINCIDE, 1)
+
+
+def test_delimitacion_no_coincide(coincidencia):
+    desplazada = [[(x + 0.001, y) for x, y in anillo] for anillo in DELIMITACION]
+    assert coincidencia(desplazada) == (plantillas.DELIMITACION_NO_COINCIDE, 0)
+
+
+def test_sin_arcgis_no_se_verifica(coincidencia, monkeypatch):
+    # P. ej. DELIMIT_PROYEC_PG proyectada o con curvas: no es un error de la entrega
+    monkeypatch.setattr(validator_web, '_comparar_delimitacion', lambda gdb, catalog, geojson: None)
+    monkeypatch.setattr(validator_web.arcpy, 'disponible', lambda: False)
+    assert coincidencia(DELIMITACION) == (plantillas.DELIMITACION_SIN_VERIFICAR, 1)
@@ -0,0 +1,70 @@
+import os
+import stat
+import sqlite3
+
+import pytest
+
+from Validador import version_cache
+from Validador.version_cache import directorio_privado, en_cache, firma_version
+
+
+@pytest.fixture
+def catalogo(ruta_bd):
+    with sqlite3.connect(ruta_bd) as conn:
+        conn.execute("INSERT INTO VALW_VERSION VALUES (1, '1')")
+        conn.execute("INSERT INTO VALW_SRS VALUES (1, 4686, 'MAGNA-SIRGAS', 1)")
+        conn.execute("INSERT INTO VALW_DATASETS VALUES ('Cartografia', 1, 1, 1)")
+        conn.execute("INSERT INTO VALW_OBJETOS_ATRIBUTOS VALUES ('VIA_LN', 'Via', 'Polyline', 'VIA_LN', 'NOMBRE', "
+                     "'Nombre', '1', 'String', 50, 'N/A', 'Opcional')")
+    return ruta_bd
+
+
+@pytest.mark.parametrize('sql', [
+    "UPDATE VALW_OBJETOS_ATRIBUTOS SET ALIAS_ATRIBUTO = 'Nombre vía'",
+    "UPDATE VALW_OBJETOS_ATRIBUTOS SET TAMANO_ATRIBUTO = 100",
+    "UPDATE VALW_OBJETOS_ATRIBUTOS SET DOMINIO = NULL",
+    "UPDATE VALW_SRS SET SRSCODE = 9377",
+])
+def test_firma_cambia_con_el_contenido_aunque_no_cambien_las_cantidades(bd, catalogo, sql):
+    anterior = firma_version(bd, '1')
+    assert firma_version(bd, '1') == anterior
+    with sqlite3.connect(catalogo) as conn:
+        conn.execute(sql)
+    assert firma_version(bd, '1') != anterior
+
+
+def test_cache_se_invalida_cuando_cambia_la_firma(tmp_path, monkeypatch):
+    monkeypatch.setattr(version_cache, 'cache_dir', str(tmp_path / 'cache'))
+    firma = ['a']
+    consultas = []
+
+    def consultar():
+        consultas.append(1)
+        return len(consultas)
+
+    assert en_cache('prueba', lambda: firma[0], consultar, ttl=0) == 1
+    assert en_cache('prueba', lambda: firma[0], consultar, ttl=0) == 1
+    firma[0] = 'b'
+    assert en_cache('prueba', lambda: firma[0], consultar, ttl=0) == 2
+    assert stat.S_IMODE(os.stat(tmp_path / 'cache').st_mode) == 0o700
+
+
+@pytest.mark.skipif(not hasattr(os, 'getuid'), reason='permisos POSIX')
+def test_no_lee_pickles_de_una_carpeta_que_otros_pueden_escribir(tmp_path, monkeypatch):
+    compartida = tmp_path / 'compartida'
+    compartida.mkdir()
+    compartida.chmod(0o777)
+    monkeypatch.setattr(version_cache, 'cache_dir', str(compartida))
+    with pytest.raises(PermissionError):
+        en_cache('prueba', lambda: 'a', lambda: 1)
+    with pytest.raises(PermissionError):
+        directorio_privado(str(compartida))
+
+
+@pytest.mark.skipif(not hasattr(os, 'symlink'), reason='enlaces simbólicos')
+def test_no_sigue_enlaces(tmp_path):
+    destino = tmp_path / 'destino'
+    destino.mkdir(mode=0o700)
+    (tmp_path / 'enlace').symlink_to(destino)
+    with pytest.raises(PermissionError):
+        directorio_privado(str(tmp_path / 'enlace'))
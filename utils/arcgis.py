@@ -0,0 +1,83 @@
+"""
+Acceso a arcpy cargado en el primer uso.
+
+Los módulos del validador importan `arcpy` desde aquí en lugar del paquete de ArcGIS:
+
+    from utils.arcgis import arcpy
+
+Importar arcpy tarda varios segundos y solo existe donde hay ArcGIS, pero la mayoría del
+validador solo lo usa para informar el progreso. Por eso los mensajes (AddMessage, AddWarning y
+AddError) van a arcpy únicamente si ya está cargado, p. ej. al ejecutarse como herramienta de
+ArcGIS, y si no al logger 'Validador'; cualquier otra función (AsShape, Describe, da.Walk...)
+carga arcpy en ese momento y falla con ModuleNotFoundError si no está instalado. Así los
+cargadores y validadores no espaciales importan y corren en un Python sin ArcGIS, y los procesos
+del pool de worker.py arrancan sin cargarlo.
+"""
+import importlib
+import importlib.util
+import logging
+import sys
+import threading
+
+from types import ModuleType
+
+_log = logging.getLogger('Validador')
+
+
+class _Arcpy:
+    """
+    Sustituto del módulo arcpy que lo importa en el primer uso de una función de ArcGIS.
+    """
+
+    def __init__(self):
+        self._modulo = None
+        self._lock = threading.Lock()
+
+    def AddMessage(self, message: str) -> None:
+        modulo = sys.modules.get('arcpy')
+        if modulo is not None:
+            modulo.AddMessage(message)
+        else:
+            _log.info(message)
+
+    def AddWarning(self, message: str) -> None:
+        modulo = sys.modules.get('arcpy')
+        if modulo is not None:
+            modulo.AddWarning(message)
+        else:
+            _log.warning(message)
+
+    def AddError(self, message: str) -> None:
+        modulo = sys.modules.get('arcpy')
+        if modulo is not None:
+            modulo.AddError(message)
+        else:
+            _log.error(message)
+
+    def __getattr__(self, name: str):
+        return getattr(self.modulo(), name)
+
+    def modulo(self) -> ModuleType:
+        """
+        El módulo arcpy, importándolo si hace falta.
+        """
+        if self._modulo is None:
+            with self._lock:
+                if self._modulo is None:
+                    try:
+                        self._modulo = importlib.import_module('arcpy')
+                    except ImportError as error:
+                        raise ModuleNotFoundError(
+                            'arcpy no está disponible: esta operación requiere ArcGIS') from error
+        return self._modulo
+
+    def disponible(self) -> bool:
+        """
+        True si arcpy se puede importar, sin importarlo si ya se sabe.
+        """
+        if self._modulo is not None or 'arcpy' in sys.modules:
+            return True
+        return importlib.util.find_spec('arcpy') is not None
+
+
+arcpy = _Arcpy()
@@ -1,14 +1,7 @@
-from lib2to3.pytree import Base
-import arcpy
-import os
-import sys
-import pandas as pd
-
-
-from importlib.resources import path
-from typing import List, Dict
-from zipfile import ZipFile
 from pydantic import BaseModel
+from typing import List
+
+from utils.arcgis import arcpy
 
 
 def conversion_format(path: str):
@@ -35,6 +28,46 @@ class ValwGdbMensaje(BaseModel):
     validador_id: str = 'VALIDADOR_ID'
     mensaje_column: str = 'MENSAJE_VAL'
     bool_column: str = 'ESTA_BIEN'
+    plantilla_column: str = 'PLANTILLA_ID'
+    parametro_columns: List[str] = ['PARAM_1', 'PARAM_2', 'PARAM_3', 'PARAM_4', 'PARAM_5', 'PARAM_6']
+    vista_name: str = 'VALW_GDB_MENSAJE_TEXTO'
+
+
+class ValwMensajePlantilla(BaseModel):
+    table_name: str = 'VALW_MENSAJE_PLANTILLA'
+    id: str = 'ID'
+    texto_column: str = 'TEXTO'
+
+
+class ValwGdbsValidar(BaseModel):
+    table_name: str = 'VALW_GDBS_VALIDAR'
+    id: str = 'ID'
+    ruta_column: str = 'RUTA'
+    estado_column: str = 'ESTADO_ID'
+    arrendado_por_column: str = 'ARRENDADO_POR'
+    arrendado_hasta_column: str = 'ARRENDADO_HASTA'
+    intentos_column: str = 'INTENTOS'
+
+
+class ValwGdbHuella(BaseModel):
+    table_name: str = 'VALW_GDB_HUELLA'
+    gdb_id_column: str = 'GDB_ID'
+    tipo_column: str = 'TIPO'
+    objeto_column: str = 'OBJETO'
+    huella_column: str = 'HUELLA'
+
+
+class ValwGdbTiempos(BaseModel):
+    table_name: str = 'VALW_GDB_TIEMPOS'
+    gdb_id_column: str = 'GDB_ID'
+    expediente_column: str = 'EXPEDIENTE'
+    etapa_column: str = 'ETAPA'
+    segundos_column: str = 'SEGUNDOS'
+    bd_segundos_column: str = 'BD_SEGUNDOS'
+    bd_consultas_column: str = 'BD_CONSULTAS'
+    bd_filas_column: str = 'BD_FILAS'
+    bytes_gdb_column: str = 'BYTES_GDB'
+    registros_column: str = 'REGISTROS'
 
 
 class ValwDomValidadores(BaseModel):
@@ -62,5 +95,9 @@ class ValwVersion(BaseModel):
 valw_srs = ValwSRS()
 valw_version = ValwVersion()
 valw_gdb_mensaje = ValwGdbMensaje()
+valw_mensaje_plantilla = ValwMensajePlantilla()
+valw_gdbs_validar = ValwGdbsValidar()
+valw_gdb_huella = ValwGdbHuella()
+valw_gdb_tiempos = ValwGdbTiempos()
 valw_dom_validadores = ValwDomValidadores()
     
\ No newline at end of file
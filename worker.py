@@ -0,0 +1,169 @@
+"""
+Worker de validación: toma las gdbs 'Sin iniciar' de MJEREZ.VALW_GDBS_VALIDAR y las valida
+en paralelo sobre un pool de procesos.
+
+Las gdbs se reclaman con arrendamientos (ver database/cola.py), así que se pueden correr varios
+workers, en el mismo equipo o en otros, contra la misma cola: para sumar capacidad basta con
+arrancar más nodos. Si un nodo muere, sus gdbs vuelven a la cola al vencer el arrendamiento.
+
+Uso:
+    python worker.py --procesos 4 --documento-tecnico "Formato Básico Minero - FBM" --etapa Exploración
+"""
+import argparse
+import signal
+import threading
+import logging
+import os
+import time
+import multiprocessing as mp
+
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, ThreadPoolExecutor, wait
+from typing import Dict, Optional
+
+from Validador import validez_geometria
+from Validador.pipeline import CatalogoVersion, cargar_catalogo_version, expediente_de_ruta, validar_gdb
+from Validador.titulos_anm import proveedor_titulos
+from database.connection import bd
+from database.cola import Latido, identificador_nodo, liberar, reclamar, reencolar_vencidos
+from database.gdb_path_to_validate import gdbs_sin_iniciar
+from utils.arcgis import arcpy
+
+# Catálogo de la versión cargado una vez por proceso en _inicializar_proceso
+_catalogo: Optional[CatalogoVersion] = None
+
+# Sin ArcGIS los mensajes de progreso (arcpy.AddMessage) van al logger 'Validador'
+FORMATO_LOG = '%(asctime)s %(processName)s %(levelname)s %(message)s'
+
+
+def _inicializar_proceso(documento_tecnico: str, etapa: str, version: str) -> None:
+    """
+    Inicializa cada proceso del pool: el apagado lo controla el proceso principal.
+
+    Las gdbs ya se reparten entre los procesos del pool, así que cada una valida sus geometrías
+    en su proceso, sin otro pool por gdb, salvo que se indique VALW_GEOMETRIA_PROCESOS.
+    """
+    global _catalogo
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    if 'VALW_GEOMETRIA_PROCESOS' not in os.environ:
+        validez_geometria.procesos_geometria = 1
+    logging.basicConfig(level=logging.INFO, format=FORMATO_LOG)
+    _catalogo = cargar_catalogo_version(bd, documento_tecnico, etapa, version)
+
+
+def _validar(id_bd_gdb: int, ruta_gdb: str, version: str, nodo: str) -> int:
+    validar_gdb(bd, id_bd_gdb, ruta_gdb, expediente_de_ruta(ruta_gdb), version, _catalogo, nodo=nodo)
+    return id_bd_gdb
+
+
+def _terminar(futuro: Future, id_bd_gdb: int, nodo: str) -> None:
+    error = futuro.exception()
+    if error is None:
+        arcpy.AddMessage(f'GDB {id_bd_gdb} validada')
+    else:
+        arcpy.AddWarning(f'GDB {id_bd_gdb} con error: {error}')
+        try:
+            if not liberar(bd, id=id_bd_gdb, nodo=nodo, estado='Error'):
+                arcpy.AddWarning(f'La GDB {id_bd_gdb} ya no estaba arrendada a este nodo; no se marca con Error')
+        except Exception:
+            arcpy.AddWarning(f'No fue posible marcar la GDB {id_bd_gdb} con estado Error en VALW_ESTADO_PROCESO')
+
+
+def _precargar_titulos(limite: int) -> None:
+    """
+    Trae a la caché en un lote los títulos ANM de las siguientes gdbs de la cola.
+    """
+    expedientes = [expediente_de_ruta(ruta_gdb) for _, ruta_gdb in gdbs_sin_iniciar(bd, limite=limite)]
+    errores = proveedor_titulos().precargar(expedientes)
+    for expediente, error in errores.items():
+        if error is not None:
+            arcpy.AddWarning(f'No fue posible precargar el título {expediente}: {error}')
+
+
+def drenar_cola(procesos: int, documento_tecnico: str, etapa: str, version: str,
+                max_pendientes: Optional[int] = None, intervalo: float = 10.0, una_vez: bool = False,
+                precarga: int = 100) -> None:
+    """
+    Reclama las gdbs pendientes y las despacha al pool hasta recibir SIGINT/SIGTERM. Mientras
+    haya gdbs en curso un latido renueva sus arrendamientos; en cada vuelta se reencolan las de
+    los nodos caídos.
+
+    Args:
+        procesos int: tamaño del pool.
+        documento_tecnico str: documento técnico de la tabla de obligatoriedad.
+        etapa str: etapa de la tabla de obligatoriedad.
+        version str: versión del MDG.
+        max_pendientes int: gdbs despachadas sin terminar como máximo (por defecto 2 por proceso);
+            no se toman más de la cola hasta que alguna termine.
+        intervalo float: segundos de espera entre consultas cuando la cola está vacía.
+        una_vez bool: terminar cuando la cola quede vacía en vez de seguir esperando.
+        precarga int: gdbs de la cola cuyos títulos ANM se precargan en segundo plano, a lo sumo
+            una vez cada `intervalo` segundos; 0 para no precargar.
+    """
+    max_pendientes = max_pendientes or 2 * procesos
+    detener = threading.Event()
+
+    def _apagar(signum, frame):
+        arcpy.AddMessage('Apagando: se terminan las gdbs en curso y no se toman nuevas...')
+        detener.set()
+
+    signal.signal(signal.SIGINT, _apagar)
+    signal.signal(signal.SIGTERM, _apagar)
+
+    nodo = identificador_nodo()
+    arcpy.AddMessage(f'Nodo {nodo}')
+    en_curso: Dict[Future, int] = {}
+    precargando: Optional[Future] = None
+    ultima_precarga = float('-inf')
+    with Latido(bd, nodo), ThreadPoolExecutor(max_workers=1, thread_name_prefix='precarga') as precargas, ProcessPoolExecutor(
+            max_workers=procesos,
+            mp_context=mp.get_context('spawn'),
+            initializer=_inicializar_proceso,
+            initargs=(documento_tecnico, etapa, version)) as pool:
+        while not detener.is_set():
+            if (precarga and (precargando is None or precargando.done())
+                    and time.monotonic() - ultima_precarga >= intervalo):
+                ultima_precarga = time.monotonic()
+                precargando = precargas.submit(_precargar_titulos, precarga)
+            libres = max_pendientes - len(en_curso)
+            if libres > 0:
+                reencolar_vencidos(bd)
+            for id_bd_gdb, ruta_gdb in reclamar(bd, nodo, limite=libres):
+                en_curso[pool.submit(_validar, id_bd_gdb, ruta_gdb, version, nodo)] = id_bd_gdb
+
+            if not en_curso:
+                if una_vez:
+                    break
+                detener.wait(intervalo)
+                continue
+
+            terminados, _ = wait(en_curso, timeout=intervalo, return_when=FIRST_COMPLETED)
+            for futuro in terminados:
+                _terminar(futuro, en_curso.pop(futuro), nodo)
+
+        for futuro in wait(en_curso).done:
+            _terminar(futuro, en_curso.pop(futuro), nodo)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Valida en paralelo las gdbs pendientes de VALW_GDBS_VALIDAR.')
+    parser.add_argument('--procesos', type=int, default=mp.cpu_count())
+    parser.add_argument('--max-pendientes', type=int, default=None)
+    parser.add_argument('--intervalo', type=float, default=10.0)
+    parser.add_argument('--una-vez', action='store_true', help='Terminar cuando no queden gdbs pendientes.')
+    parser.add_argument('--precarga', type=int, default=100,
+                        help='GDBs de la cola cuyos títulos ANM se precargan; 0 para no precargar.')
+    parser.add_argument('--documento-tecnico', default='Formato Básico Minero - FBM')
+    parser.add_argument('--etapa', default='Exploración')
+    parser.add_argument('--version', default='1')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format=FORMATO_LOG)
+    drenar_cola(
+        procesos=args.procesos,
+        documento_tecnico=args.documento_tecnico,
+        etapa=args.etapa,
+        version=args.version,
+        max_pendientes=args.max_pendientes,
+        intervalo=args.intervalo,
+        una_vez=args.una_vez,
+        precarga=args.precarga)